@@ -49,6 +49,20 @@ class NLPAnalyzer:
         }
     }
     
+    # Words ignored when counting complaint keywords
+    STOP_WORDS = {'the', 'is', 'in', 'at', 'of', 'and', 'a', 'to', 'for', 'on', 'with', 'be',
+                  'this', 'that', 'have', 'has'}
+    
+    @staticmethod
+    def extract_keywords(text):
+        """Split text into the keywords counted for top issues"""
+        keywords = []
+        for word in text.lower().split():
+            word = word.strip('.,!?;:')
+            if len(word) > 3 and word not in NLPAnalyzer.STOP_WORDS:
+                keywords.append(word)
+        return keywords
+    
     @staticmethod
     def analyze_sentiment(text):
         """Analyze sentiment of text with enhanced accuracy"""
@@ -126,6 +140,40 @@ class NLPAnalyzer:
         else:
             return 'Normal'
     
+    @staticmethod
+    def analyze_complaint(text):
+        """(category, priority) of a complaint description"""
+        return NLPAnalyzer.categorize_complaint(text), NLPAnalyzer.assess_priority(text)
+    
+    @staticmethod
+    def analyze_complaints(texts, pool=None):
+        """(category, priority) for each text of a batch; repeated texts,
+        common in survey imports, are analyzed once. Runs on `pool` (a
+        concurrent.futures executor) when one is given."""
+        unique = list(dict.fromkeys(texts))
+        if pool is not None and len(unique) > 1:
+            results = pool.map(NLPAnalyzer.analyze_complaint, unique, chunksize=256)
+        else:
+            results = map(NLPAnalyzer.analyze_complaint, unique)
+        analyzed = dict(zip(unique, results))
+        return [analyzed[text] for text in texts]
+    
+    @staticmethod
+    def analyze_feedback(texts, pool=None):
+        """(sentiment, themes) for each text of a batch; repeated texts are
+        analyzed once. Sentiment is the slow part and runs on `pool` (a
+        concurrent.futures executor) when one is given."""
+        unique = list(dict.fromkeys(texts))
+        if pool is not None and len(unique) > 1:
+            sentiments = pool.map(NLPAnalyzer.analyze_sentiment, unique, chunksize=64)
+        else:
+            sentiments = map(NLPAnalyzer.analyze_sentiment, unique)
+        analyzed = {
+            text: (sentiment, NLPAnalyzer.extract_themes(text))
+            for text, sentiment in zip(unique, sentiments)
+        }
+        return [analyzed[text] for text in texts]
+    
     @staticmethod
     def generate_insights(text):
         """Generate AI insights from complaint text"""
@@ -3,11 +3,15 @@ from sqlalchemy import func
 from datetime import datetime, timedelta
 import json
 from sqlalchemy import case
+from sqlalchemy.orm import joinedload, undefer
 import statistics
+from instrumentation import traced
+from warmer import cache_warmer
 
 class PredictiveAnalytics:
     
     @staticmethod
+    @traced('predictions.predict_complaint_trends')
     def predict_complaint_trends():
         """Predict complaint trends for next month with improved algorithm"""
         
@@ -85,6 +89,7 @@ class PredictiveAnalytics:
         }
     
     @staticmethod
+    @traced('predictions.identify_high_risk_areas')
     def identify_high_risk_areas():
         """Identify districts with high complaint rates with risk scoring"""
         
@@ -154,6 +159,7 @@ class PredictiveAnalytics:
         return high_risk
     
     @staticmethod
+    @traced('predictions.predict_resolution_time')
     def predict_resolution_time(complaint_id):
         """Predict resolution time for a complaint with ML-like approach"""
         
@@ -195,11 +201,15 @@ class PredictiveAnalytics:
         }
     
     @staticmethod
+    @traced('predictions.identify_systemic_issues')
     def identify_systemic_issues():
         """Identify recurring systemic issues with pattern matching"""
         
         # Get unresolved complaints
-        complaints = Complaint.query.filter(
+        complaints = Complaint.query.options(
+            joinedload(Complaint.district),
+            undefer(Complaint.description)
+        ).filter(
             Complaint.status != 'Resolved'
         ).all()
         
@@ -249,6 +259,7 @@ class PredictiveAnalytics:
         return sorted(systemic_issues, key=lambda x: x['complaint_count'], reverse=True)
     
     @staticmethod
+    @traced('predictions.ministry_workload_forecast')
     def ministry_workload_forecast():
         """Forecast ministry workload for next month with capacity analysis"""
         
@@ -307,6 +318,7 @@ class PredictiveAnalytics:
         return sorted(forecasts, key=lambda x: x['expected_total_workload'], reverse=True)
     
     @staticmethod
+    @traced('predictions.analyze_policy_feedback_sentiment')
     def analyze_policy_feedback_sentiment():
         """Analyze overall sentiment trends in policy feedback"""
         
@@ -346,4 +358,21 @@ class PredictiveAnalytics:
             'sentiment_counts': sentiment_counts,
             'sentiment_percentages': sentiment_percentages,
             'overall_sentiment': overall
-        }
\ No newline at end of file
+        }
+
+def _complaints_version_key(name):
+    """Cache key of a forecast for the current complaints and day, so the
+    warmer only recomputes it after complaints change"""
+    def key():
+        version = db.session.query(func.max(Complaint.id), func.max(Complaint.updated_at)).one()
+        return ('warm', name, tuple(version), datetime.utcnow().date())
+    return key
+
+# Forecasts the cache warmer keeps fresh; read them with cache_warmer.get()
+for _name, _compute in (
+    ('predictions.complaint-trends', PredictiveAnalytics.predict_complaint_trends),
+    ('predictions.high-risk-areas', PredictiveAnalytics.identify_high_risk_areas),
+    ('predictions.systemic-issues', PredictiveAnalytics.identify_systemic_issues),
+    ('predictions.workload-forecast', PredictiveAnalytics.ministry_workload_forecast)
+):
+    cache_warmer.register(_name, _compute, key=_complaints_version_key(_name))
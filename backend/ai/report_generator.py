@@ -1,5 +1,8 @@
 from models import db, SystemReport, AIPrediction, Complaint, Ministry, District, PolicyFeedback, ServiceRating, Citizen
-from ai.predictions import PredictiveAnalytics
+import ai.predictions  # registers the prediction warm jobs read below
+from warmer import cache_warmer
+from instrumentation import trace
+from sketches import unique_citizens, channel_overlap, days_ago, RELATIVE_ERROR
 from datetime import datetime, timedelta
 from sqlalchemy import func, case, desc
 import json
@@ -7,12 +10,11 @@ import json
 class ReportGenerator:
     
     @staticmethod
-    def generate_system_report(generated_by_id):
-        """Generate comprehensive AI-powered system report with deep analysis"""
+    def generate_system_report(generated_by_id, track_memory=False):
+        """Generate comprehensive AI-powered system report with deep analysis.
         
-        predictor = PredictiveAnalytics()
-        
-        print("🤖 AI Report Generator: Starting comprehensive analysis...")
+        `track_memory` adds peak memory to the section timings; it traces
+        every thread, so only offline runs should ask for it."""
         
         # Gather all data sources
         report_data = {
@@ -31,62 +33,65 @@ class ReportGenerator:
             'visualizations_data': {}
         }
         
-        # 1. EXECUTIVE SUMMARY with Deep Insights
-        print("📊 Analyzing executive summary...")
-        exec_summary = ReportGenerator._generate_executive_summary()
-        report_data['executive_summary'] = exec_summary
-        
-        # 2. COMPLAINT TREND ANALYSIS
-        print("📈 Performing trend analysis...")
-        complaint_trends = predictor.predict_complaint_trends()
-        trend_analysis = ReportGenerator._analyze_complaint_trends(complaint_trends)
-        report_data['deep_analysis']['complaint_trends'] = trend_analysis
-        
-        # 3. GEOGRAPHIC ANALYSIS
-        print("🗺️ Analyzing geographic patterns...")
-        geographic_analysis = ReportGenerator._analyze_geographic_patterns()
-        report_data['deep_analysis']['geographic_patterns'] = geographic_analysis
-        
-        # 4. MINISTRY PERFORMANCE DEEP DIVE
-        print("🏛️ Analyzing ministry performance...")
-        ministry_analysis = ReportGenerator._analyze_ministry_performance()
-        report_data['deep_analysis']['ministry_performance'] = ministry_analysis
-        
-        # 5. SYSTEMIC ISSUES DETECTION
-        print("🔍 Detecting systemic issues...")
-        systemic_issues = predictor.identify_systemic_issues()
-        systemic_analysis = ReportGenerator._analyze_systemic_issues(systemic_issues)
-        report_data['deep_analysis']['systemic_issues'] = systemic_analysis
-        
-        # 6. CITIZEN ENGAGEMENT ANALYSIS
-        print("👥 Analyzing citizen engagement...")
-        engagement_analysis = ReportGenerator._analyze_citizen_engagement()
-        report_data['deep_analysis']['citizen_engagement'] = engagement_analysis
-        
-        # 7. POLICY FEEDBACK SENTIMENT ANALYSIS
-        print("💬 Analyzing policy feedback...")
-        policy_analysis = ReportGenerator._analyze_policy_sentiment()
-        report_data['deep_analysis']['policy_feedback'] = policy_analysis
-        
-        # 8. SERVICE QUALITY ANALYSIS
-        print("⭐ Analyzing service quality...")
-        service_analysis = ReportGenerator._analyze_service_quality()
-        report_data['deep_analysis']['service_quality'] = service_analysis
-        
-        # 9. PREDICTIVE FORECASTING
-        print("🔮 Generating predictions...")
-        predictions = ReportGenerator._generate_predictions(predictor)
-        report_data['predictions'] = predictions
-        
-        # 10. AI-POWERED RECOMMENDATIONS
-        print("💡 Generating AI recommendations...")
-        recommendations = ReportGenerator._generate_ai_recommendations(report_data)
-        report_data['recommendations'] = recommendations
-        
-        # 11. DATA FOR VISUALIZATIONS
-        print("📊 Preparing visualization data...")
-        viz_data = ReportGenerator._prepare_visualization_data()
-        report_data['visualizations_data'] = viz_data
+        with trace('report.generate_system_report', track_memory=track_memory) as report_span:
+            # 1. EXECUTIVE SUMMARY with Deep Insights
+            with trace('report.executive_summary'):
+                exec_summary = ReportGenerator._generate_executive_summary()
+                report_data['executive_summary'] = exec_summary
+            
+            # 2. COMPLAINT TREND ANALYSIS
+            with trace('report.complaint_trends'):
+                complaint_trends = cache_warmer.get('predictions.complaint-trends')
+                trend_analysis = ReportGenerator._analyze_complaint_trends(complaint_trends)
+                report_data['deep_analysis']['complaint_trends'] = trend_analysis
+            
+            # 3. GEOGRAPHIC ANALYSIS
+            with trace('report.geographic_patterns'):
+                geographic_analysis = ReportGenerator._analyze_geographic_patterns()
+                report_data['deep_analysis']['geographic_patterns'] = geographic_analysis
+            
+            # 4. MINISTRY PERFORMANCE DEEP DIVE
+            with trace('report.ministry_performance'):
+                ministry_analysis = ReportGenerator._analyze_ministry_performance()
+                report_data['deep_analysis']['ministry_performance'] = ministry_analysis
+            
+            # 5. SYSTEMIC ISSUES DETECTION
+            with trace('report.systemic_issues'):
+                systemic_issues = cache_warmer.get('predictions.systemic-issues')
+                systemic_analysis = ReportGenerator._analyze_systemic_issues(systemic_issues)
+                report_data['deep_analysis']['systemic_issues'] = systemic_analysis
+            
+            # 6. CITIZEN ENGAGEMENT ANALYSIS
+            with trace('report.citizen_engagement'):
+                engagement_analysis = ReportGenerator._analyze_citizen_engagement()
+                report_data['deep_analysis']['citizen_engagement'] = engagement_analysis
+            
+            # 7. POLICY FEEDBACK SENTIMENT ANALYSIS
+            with trace('report.policy_feedback'):
+                policy_analysis = ReportGenerator._analyze_policy_sentiment()
+                report_data['deep_analysis']['policy_feedback'] = policy_analysis
+            
+            # 8. SERVICE QUALITY ANALYSIS
+            with trace('report.service_quality'):
+                service_analysis = ReportGenerator._analyze_service_quality()
+                report_data['deep_analysis']['service_quality'] = service_analysis
+            
+            # 9. PREDICTIVE FORECASTING
+            with trace('report.predictions'):
+                predictions = ReportGenerator._generate_predictions()
+                report_data['predictions'] = predictions
+            
+            # 10. AI-POWERED RECOMMENDATIONS
+            with trace('report.recommendations'):
+                recommendations = ReportGenerator._generate_ai_recommendations(report_data)
+                report_data['recommendations'] = recommendations
+            
+            # 11. DATA FOR VISUALIZATIONS
+            with trace('report.visualizations_data'):
+                viz_data = ReportGenerator._prepare_visualization_data()
+                report_data['visualizations_data'] = viz_data
+        
+        report_data['metadata']['timings'] = report_span.to_dict()
         
         # Calculate overall AI confidence score
         confidence_scores = [
@@ -119,8 +124,6 @@ class ReportGenerator:
         db.session.add(prediction)
         db.session.commit()
         
-        print("✅ Report generation complete!")
-        
         return report.to_dict()
     
     @staticmethod
@@ -149,8 +152,8 @@ class ReportGenerator:
             func.avg(func.datediff('day', Complaint.created_at, Complaint.resolved_at))
         ).filter(Complaint.resolved_at.isnot(None)).scalar()
         
-        # Citizen engagement
-        active_citizens = db.session.query(func.count(func.distinct(Complaint.citizen_id))).scalar()
+        # Citizen engagement, estimated from the complaint sketches
+        active_citizens = unique_citizens(['complaints'])
         total_citizens = Citizen.query.count()
         engagement_rate = (active_citizens / total_citizens * 100) if total_citizens > 0 else 0
         
@@ -473,12 +476,8 @@ class ReportGenerator:
     @staticmethod
     def _analyze_citizen_engagement():
         """Analyze citizen engagement patterns"""
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        
-        # Active citizens
-        active_last_30 = db.session.query(
-            func.count(func.distinct(Complaint.citizen_id))
-        ).filter(Complaint.created_at >= thirty_days_ago).scalar()
+        # Distinct-citizen figures are HyperLogLog estimates (see sketches.py)
+        active_last_30 = unique_citizens(['complaints'], since=days_ago(30))
         
         total_citizens = Citizen.query.count()
         
@@ -492,18 +491,13 @@ class ReportGenerator:
             func.count(Complaint.id) > 1
         ).count()
         
-        # Policy feedback participation
-        feedback_participants = db.session.query(
-            func.count(func.distinct(PolicyFeedback.citizen_id))
-        ).scalar()
-        
-        # Service ratings participation
-        rating_participants = db.session.query(
-            func.count(func.distinct(ServiceRating.citizen_id))
-        ).scalar()
+        # Participation per channel and citizens using two or more channels
+        overlap = channel_overlap()
+        feedback_participants = overlap['per_channel']['feedback']
+        rating_participants = overlap['per_channel']['ratings']
+        multi_channel_users = overlap['multi_channel']
         
         engagement_rate = (active_last_30 / total_citizens * 100) if total_citizens > 0 else 0
-        multi_channel_users = min(feedback_participants, rating_participants)  # Users engaging in multiple ways
         
         return {
             'total_registered_citizens': total_citizens,
@@ -513,6 +507,7 @@ class ReportGenerator:
             'policy_feedback_participants': feedback_participants,
             'service_rating_participants': rating_participants,
             'multi_channel_engagement': multi_channel_users,
+            'estimate_relative_error': RELATIVE_ERROR,
             'engagement_quality': 'High' if engagement_rate > 20 else 'Medium' if engagement_rate > 10 else 'Low',
             'insights': ReportGenerator._generate_engagement_insights(
                 engagement_rate, repeat_complainants, multi_channel_users
@@ -674,13 +669,13 @@ class ReportGenerator:
         return insights
     
     @staticmethod
-    def _generate_predictions(predictor):
+    def _generate_predictions():
         """Generate comprehensive predictions"""
         return {
-            'complaint_forecast': predictor.predict_complaint_trends(),
-            'high_risk_areas': predictor.identify_high_risk_areas(),
-            'ministry_workload': predictor.ministry_workload_forecast(),
-            'systemic_issues': predictor.identify_systemic_issues()
+            'complaint_forecast': cache_warmer.get('predictions.complaint-trends'),
+            'high_risk_areas': cache_warmer.get('predictions.high-risk-areas'),
+            'ministry_workload': cache_warmer.get('predictions.workload-forecast'),
+            'systemic_issues': cache_warmer.get('predictions.systemic-issues')
         }
     
     @staticmethod
@@ -0,0 +1,334 @@
+"""
+"Similar complaints": top-k cosine similarity over TF-IDF vectors of
+complaint descriptions and resolution notes.
+
+The index lives in each worker process. Term postings are stored
+term-major in CSR form (indptr, row indices, log term frequencies), about
+8 bytes per distinct term of a complaint, plus a few per-row arrays. A
+query scores every complaint sharing a term with the source complaint by
+adding each term's posting slice into one dense score array, then takes the
+top k with argpartition; IDF weights are folded into the query so stored
+values never need rewriting.
+
+The index follows the database rather than the write paths: refresh()
+reads complaints whose updated_at moved since the last sync, so writes from
+any process, import or bulk triage are picked up. New and changed
+complaints go to a small pending segment that is merged into the CSR
+arrays, with superseded rows dropped and document norms recomputed, once it
+holds SIMILARITY_MERGE_ROWS complaints. The cache warmer refreshes the index
+in the background; queries refresh it when it is older than
+SIMILARITY_REFRESH_INTERVAL.
+"""
+
+import math
+import threading
+import time
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select
+
+from config import Config
+from instrumentation import traced
+from models import db, Complaint
+from search import tokenize
+from warmer import cache_warmer
+
+# Complaints read per query while building or syncing
+SYNC_CHUNK_SIZE = 5000
+
+# Document frequency below which a term is never ignored, so small corpora
+# are scored exactly
+MIN_FREQUENCY_CUTOFF = 1000
+
+# Changes are re-read this far behind the newest updated_at seen, so rows
+# committed late by slower transactions are not missed
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def _grow(values, size, fill):
+    """`values`, or a copy with room for at least `size` entries"""
+    if size <= len(values):
+        return values
+    grown = np.full(max(size, 2 * len(values), 1024), fill, dtype=values.dtype)
+    grown[:len(values)] = values
+    return grown
+
+
+class SimilarityIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.vocabulary = {}
+        self.document_frequencies = []
+        self.documents = 0
+
+        # Merged segment: postings of term t are indices[indptr[t]:indptr[t + 1]]
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.data = np.zeros(0, dtype=np.float32)
+
+        # Pending segment: one (term, row, log frequency) entry per posting
+        self.pending_terms = array('i')
+        self.pending_rows = array('i')
+        self.pending_data = array('f')
+        self.pending_complaints = 0
+
+        # Per row; a complaint whose text changed gets a new row and its old
+        # one is dead. Other changes only update the row in place.
+        self.rows = 0
+        self.row_complaints = np.zeros(0, dtype=np.int32)
+        self.row_districts = np.zeros(0, dtype=np.int32)
+        self.row_texts = np.zeros(0, dtype=np.int64)
+        self.norms = np.zeros(0, dtype=np.float32)
+        self.dead = []
+
+        # Reusable score accumulator, all zeros between queries
+        self.scores = np.zeros(0, dtype=np.float32)
+
+        # Complaint id -> row, -1 when not indexed
+        self.row_of = np.zeros(0, dtype=np.int32)
+
+        self.synced_to = None
+        self.refreshed_at = None
+        self.merges = 0
+
+    def _frequency_cutoff(self):
+        """Terms in more complaints than this are ignored, like max_df in
+        scikit-learn; they say little about similarity and their posting
+        lists are the longest to scan"""
+        return max(Config.SIMILARITY_MAX_DF * self.documents, MIN_FREQUENCY_CUTOFF)
+
+    def _idf(self, term):
+        return math.log((1 + self.documents) / (1 + self.document_frequencies[term])) + 1
+
+    def _term_frequencies(self, description, resolution_notes, grow):
+        """{term id: 1 + log tf} of a complaint's text; unknown terms are
+        added to the vocabulary when `grow`, otherwise skipped"""
+        counts = Counter(tokenize(' '.join(text for text in (description, resolution_notes) if text)))
+        frequencies = {}
+        for term, count in counts.items():
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                if not grow:
+                    continue
+                term_id = self.vocabulary[term] = len(self.vocabulary)
+                self.document_frequencies.append(0)
+            frequencies[term_id] = 1 + math.log(count)
+        return frequencies
+
+    def _add(self, complaint_id, district_id, description, resolution_notes):
+        district_id = district_id if district_id is not None else -1
+        text = hash((description, resolution_notes))
+        self.row_of = _grow(self.row_of, complaint_id + 1, -1)
+        previous = self.row_of[complaint_id]
+        if previous >= 0:
+            if self.row_texts[previous] == text:
+                self.row_districts[previous] = district_id
+                return
+            self.dead.append(int(previous))
+        else:
+            self.documents += 1
+
+        row = self.rows
+        self.rows += 1
+        self.row_complaints = _grow(self.row_complaints, self.rows, -1)
+        self.row_districts = _grow(self.row_districts, self.rows, -1)
+        self.row_texts = _grow(self.row_texts, self.rows, 0)
+        self.norms = _grow(self.norms, self.rows, 0.0)
+        self.row_complaints[row] = complaint_id
+        self.row_districts[row] = district_id
+        self.row_texts[row] = text
+        self.row_of[complaint_id] = row
+        self.pending_complaints += 1
+
+        norm = 0.0
+        cutoff = self._frequency_cutoff()
+        for term, frequency in self._term_frequencies(description, resolution_notes, grow=True).items():
+            self.document_frequencies[term] += 1
+            self.pending_terms.append(term)
+            self.pending_rows.append(row)
+            self.pending_data.append(frequency)
+            if self.document_frequencies[term] <= cutoff:
+                norm += (frequency * self._idf(term)) ** 2
+        self.norms[row] = math.sqrt(norm)
+
+    def _merge(self):
+        """Fold the pending segment into the CSR arrays, dropping dead rows
+        and recomputing document frequencies and norms"""
+        term_count = len(self.vocabulary)
+        merged_counts = np.diff(self.indptr)
+        merged_terms = np.repeat(np.arange(len(merged_counts), dtype=np.int32), merged_counts)
+        terms = np.concatenate([merged_terms, np.frombuffer(self.pending_terms, dtype=np.int32)])
+        rows = np.concatenate([self.indices, np.frombuffer(self.pending_rows, dtype=np.int32)])
+        data = np.concatenate([self.data, np.frombuffer(self.pending_data, dtype=np.float32)])
+
+        if self.dead:
+            alive = ~np.isin(rows, np.array(self.dead, dtype=np.int32))
+            terms, rows, data = terms[alive], rows[alive], data[alive]
+
+        # The merged postings are already one sorted run, so the stable
+        # (merge) sort is close to linear
+        order = np.argsort(terms, kind='stable')
+        counts = np.bincount(terms, minlength=term_count)
+        self.indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.indices = rows[order]
+        self.data = data[order]
+
+        self.document_frequencies = counts.tolist()
+        idf = np.log((1 + self.documents) / (1 + counts)) + 1
+        weights = np.where(counts[terms] <= self._frequency_cutoff(), data * idf[terms], 0) ** 2
+        self.norms = _grow(np.sqrt(np.bincount(rows, weights=weights, minlength=self.rows)).astype(np.float32), len(self.norms), 0.0)
+
+        self.pending_terms = array('i')
+        self.pending_rows = array('i')
+        self.pending_data = array('f')
+        self.pending_complaints = 0
+        self.dead = []
+        self.merges += 1
+
+    def _sync(self):
+        """Index complaints changed since the last sync"""
+        query = select(
+            Complaint.id, Complaint.district_id, Complaint.description,
+            Complaint.resolution_notes, Complaint.updated_at
+        )
+        if self.synced_to is None:
+            # Full build in id order; rows without updated_at are included
+            last_id = 0
+            while True:
+                rows = db.session.execute(
+                    query.where(Complaint.id > last_id).order_by(Complaint.id).limit(SYNC_CHUNK_SIZE)
+                ).all()
+                if not rows:
+                    break
+                for row in rows:
+                    self._add(row.id, row.district_id, row.description, row.resolution_notes)
+                    if row.updated_at is not None and (self.synced_to is None or row.updated_at > self.synced_to):
+                        self.synced_to = row.updated_at
+                last_id = rows[-1].id
+            self.synced_to = self.synced_to or datetime.min + SYNC_OVERLAP
+            return
+
+        since = self.synced_to - SYNC_OVERLAP
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                query.where(Complaint.updated_at >= since, Complaint.id > last_id)
+                .order_by(Complaint.id).limit(SYNC_CHUNK_SIZE)
+            ).all()
+            if not rows:
+                break
+            for row in rows:
+                self._add(row.id, row.district_id, row.description, row.resolution_notes)
+                self.synced_to = max(self.synced_to, row.updated_at)
+            last_id = rows[-1].id
+
+    @traced('similarity.refresh')
+    def refresh(self):
+        """Bring the index up to date with the database; returns its stats"""
+        with self.lock:
+            self._sync()
+            # The first build is merged at once, later changes in batches
+            if self.pending_complaints and (
+                self.merges == 0 or self.pending_complaints >= Config.SIMILARITY_MERGE_ROWS
+            ):
+                self._merge()
+            self.refreshed_at = time.monotonic()
+            return self.stats()
+
+    def ensure_fresh(self):
+        if self.refreshed_at is None or time.monotonic() - self.refreshed_at >= Config.SIMILARITY_REFRESH_INTERVAL:
+            self.refresh()
+
+    @traced('similarity.similar')
+    def similar(self, complaint, k, district_id=None):
+        """[(complaint id, cosine similarity)] of the k complaints most like
+        `complaint`, best first, optionally limited to one district"""
+        self.ensure_fresh()
+
+        with self.lock:
+            frequencies = self._term_frequencies(complaint.description, complaint.resolution_notes, grow=False)
+            cutoff = self._frequency_cutoff()
+            weights = {
+                term: frequency * self._idf(term) for term, frequency in frequencies.items()
+                if self.document_frequencies[term] <= cutoff
+            }
+            if not weights or not self.rows:
+                return []
+            query_norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+
+            # (rows, contributions) per posting list; the document weight is
+            # log tf * idf / norm, and its idf is applied here
+            postings = []
+            pending_terms = np.frombuffer(self.pending_terms, dtype=np.int32)
+            for term, weight in weights.items():
+                weight = weight * self._idf(term) / query_norm
+                if term + 1 < len(self.indptr):
+                    start, end = self.indptr[term], self.indptr[term + 1]
+                    postings.append((self.indices[start:end], weight * self.data[start:end]))
+                if len(pending_terms):
+                    matches = pending_terms == term
+                    postings.append((
+                        np.frombuffer(self.pending_rows, dtype=np.int32)[matches],
+                        weight * np.frombuffer(self.pending_data, dtype=np.float32)[matches]
+                    ))
+
+            touched = sum(len(rows) for rows, _ in postings)
+            if touched * 4 < self.rows:
+                # Few postings: accumulate into a reusable buffer and only look
+                # at the rows touched. A row occurs once per posting list, so
+                # the best k rows are among the best k * lists entries.
+                self.scores = _grow(self.scores, self.rows, 0.0)
+                for rows, contributions in postings:
+                    self.scores[rows] += contributions
+                candidates = np.concatenate([rows for rows, _ in postings])
+                scores = self.scores[candidates]
+                self.scores[candidates] = 0
+                repeats = len(postings)
+            else:
+                dense = np.zeros(self.rows, dtype=np.float32)
+                for rows, contributions in postings:
+                    dense[rows] += contributions
+                candidates = np.flatnonzero(dense)
+                scores = dense[candidates]
+                repeats = 1
+
+            scores /= np.maximum(self.norms[candidates], 1e-12)
+            excluded = list(self.dead)
+            if complaint.id < len(self.row_of) and self.row_of[complaint.id] >= 0:
+                excluded.append(self.row_of[complaint.id])
+            if excluded:
+                scores[np.isin(candidates, excluded)] = 0
+            if district_id is not None:
+                scores[self.row_districts[candidates] != district_id] = 0
+
+            best = min(len(candidates), k * repeats)
+            top = np.argpartition(scores, -best)[-best:] if best < len(candidates) else np.arange(len(candidates))
+            top = top[scores[top] > 0]
+            rows, first = np.unique(candidates[top], return_index=True)
+            scores = scores[top][first]
+            order = np.lexsort((rows, -scores))[:k]
+            return [(int(self.row_complaints[row]), float(score)) for row, score in zip(rows[order], scores[order])]
+
+    def stats(self):
+        return {
+            'complaints': self.documents,
+            'terms': len(self.vocabulary),
+            'postings': int(len(self.indices) + len(self.pending_rows)),
+            'pending_postings': len(self.pending_rows),
+            'memory_bytes': int(
+                self.indptr.nbytes + self.indices.nbytes + self.data.nbytes
+                + self.row_complaints.nbytes + self.row_districts.nbytes + self.row_texts.nbytes
+                + self.norms.nbytes + self.row_of.nbytes + self.scores.nbytes
+                + len(self.pending_rows) * 12
+            ),
+            'merges': self.merges
+        }
+
+
+similarity_index = SimilarityIndex()
+
+# Keeps each process's index synced in the background
+cache_warmer.register_task('similarity.index', similarity_index.refresh)
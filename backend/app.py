@@ -4,6 +4,9 @@ from flask_mail import Mail
 from config import Config
 from models import db
 from email_service import mail
+from commands import register_commands
+from warmer import cache_warmer
+from passwords import HashingOverloaded
 import routes.auth_routes as auth_routes
 import routes.citizens as citizens_routes
 import routes.policies as policies_routes
@@ -12,13 +15,23 @@ import routes.ussd as ussd_routes
 import routes.admin as admin_routes
 import routes.analytics as analytics_routes
 
+# Imported for its cache warmer job registrations (see warmer.py)
+import ai.predictions
+
 app = Flask(__name__)
 app.config.from_object(Config)
 
 # Initialize extensions
 db.init_app(app)
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor', 'X-Total-Count', 'Link'])
 mail.init_app(app)
+register_commands(app)
+cache_warmer.configure(
+    Config.CACHE_WARM_ENABLED,
+    Config.CACHE_WARM_INTERVAL,
+    Config.CACHE_WARM_JITTER,
+    Config.CACHE_WARM_JOBS
+)
 
 # Register blueprints
 app.register_blueprint(auth_routes.bp, url_prefix='/api/auth')
@@ -29,6 +42,12 @@ app.register_blueprint(ussd_routes.bp, url_prefix='/api/ussd')
 app.register_blueprint(admin_routes.bp, url_prefix='/api/admin')
 app.register_blueprint(analytics_routes.bp, url_prefix='/api/analytics')
 
+@app.before_request
+def start_cache_warmer():
+    # Started by the first request rather than at import, so CLI commands and
+    # the debug reloader's parent process do not run the warmer
+    cache_warmer.ensure_started(app)
+
 @app.route('/')
 def index():
     return jsonify({
@@ -67,6 +86,13 @@ def health():
 def not_found(error):
     return jsonify({'error': 'Resource not found'}), 404
 
+@app.errorhandler(HashingOverloaded)
+def hashing_overloaded(error):
+    db.session.rollback()
+    response = jsonify({'error': 'Too many sign-ins in progress, please retry shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @app.errorhandler(500)
 def internal_error(error):
     db.session.rollback()
@@ -1,16 +1,31 @@
 from functools import wraps
 from flask import request, jsonify
+import calendar
+import threading
+import time
 import jwt
 from datetime import datetime, timedelta
 from config import Config
-from models import Citizen, db
+from models import Citizen, TokenRevocation, db
+from cache import ResponseCache
+from sqlalchemy import select, delete
+from warmer import cache_warmer
 
-def generate_token(citizen_id, role_id):
+def _epoch(value):
+    """Seconds since the epoch of a naive UTC datetime, keeping microseconds"""
+    return calendar.timegm(value.utctimetuple()) + value.microsecond / 1e6
+
+def generate_token(citizen_id, role_id, district_id=None):
     """Generate JWT token"""
+    now = datetime.utcnow()
     payload = {
         'citizen_id': citizen_id,
         'role_id': role_id,
-        'exp': datetime.utcnow() + timedelta(seconds=Config.JWT_ACCESS_TOKEN_EXPIRES)
+        'district_id': district_id,
+        # Sub-second, so a token issued right after a revocation is not
+        # mistaken for one issued before it
+        'iat': _epoch(now),
+        'exp': now + timedelta(seconds=Config.JWT_ACCESS_TOKEN_EXPIRES)
     }
     return jwt.encode(payload, Config.JWT_SECRET_KEY, algorithm='HS256')
 
@@ -24,29 +39,149 @@ def decode_token(token):
     except jwt.InvalidTokenError:
         return None
 
+class Principal:
+    """The fields of a citizen that authorization needs, cached between
+    requests. Any other attribute is read from the full Citizen row."""
+    
+    __slots__ = ('id', 'role_id', 'district_id', 'is_active')
+    
+    def __init__(self, id, role_id, district_id, is_active):
+        self.id = id
+        self.role_id = role_id
+        self.district_id = district_id
+        self.is_active = is_active
+    
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(db.session.get(Citizen, self.id), name)
+
+# Principals by (citizen id, version). Bumping a citizen's version makes
+# their cached entry unreachable at once in this process; other worker
+# processes pick the change up within PRINCIPAL_CACHE_TTL.
+principal_cache = ResponseCache()
+_principal_versions = {}
+
+class RevocationList:
+    """Citizens whose tokens issued up to a given time are revoked, for
+    stateless auth. Mirrors the unexpired rows of TokenRevocations, re-read
+    at most every AUTH_REVOCATION_SYNC_INTERVAL seconds; revocations made in
+    this process apply at once."""
+    
+    def __init__(self):
+        self.revoked = {}
+        self.synced_at = None
+        self.syncs = 0
+        self._lock = threading.Lock()
+    
+    def revoke(self, citizen_id, revoked_at):
+        with self._lock:
+            self.revoked[citizen_id] = max(self.revoked.get(citizen_id, 0), revoked_at)
+    
+    def sync(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=Config.JWT_ACCESS_TOKEN_EXPIRES)
+        rows = db.session.execute(
+            select(TokenRevocation.citizen_id, TokenRevocation.revoked_at)
+            .where(TokenRevocation.revoked_at >= cutoff)
+        ).all()
+        revoked = {}
+        for citizen_id, revoked_at in rows:
+            revoked[citizen_id] = max(revoked.get(citizen_id, 0), _epoch(revoked_at))
+        cutoff = _epoch(cutoff)
+        with self._lock:
+            # Keep newer local revocations, e.g. from a replica lagging behind
+            for citizen_id, revoked_at in self.revoked.items():
+                if revoked_at > revoked.get(citizen_id, cutoff):
+                    revoked[citizen_id] = revoked_at
+            self.revoked = revoked
+            self.synced_at = time.monotonic()
+            self.syncs += 1
+        return self.stats()
+    
+    def is_revoked(self, citizen_id, issued_at):
+        if self.synced_at is None or time.monotonic() - self.synced_at >= Config.AUTH_REVOCATION_SYNC_INTERVAL:
+            self.sync()
+        revoked_at = self.revoked.get(citizen_id)
+        return revoked_at is not None and issued_at <= revoked_at
+    
+    def stats(self):
+        return {'revoked_citizens': len(self.revoked), 'syncs': self.syncs}
+
+revocations = RevocationList()
+
+if Config.AUTH_STATELESS:
+    # Re-read revocations in the background so requests rarely have to
+    cache_warmer.register_task('auth.revocations', revocations.sync, Config.AUTH_REVOCATION_SYNC_INTERVAL)
+
+def revoke_tokens(citizen_id):
+    """Record that a citizen's current tokens no longer reflect their role or
+    status, in stateless auth mode. Call before committing the change;
+    expired rows are pruned."""
+    if not Config.AUTH_STATELESS:
+        return
+    now = datetime.utcnow()
+    db.session.execute(delete(TokenRevocation).where(
+        TokenRevocation.revoked_at < now - timedelta(seconds=Config.JWT_ACCESS_TOKEN_EXPIRES)
+    ))
+    db.session.add(TokenRevocation(citizen_id=citizen_id, revoked_at=now))
+
+def invalidate_principal(citizen_id):
+    """Forget a citizen's cached principal and tokens in this process after
+    a role or status change was committed"""
+    _principal_versions[citizen_id] = _principal_versions.get(citizen_id, 0) + 1
+    if Config.AUTH_STATELESS:
+        revocations.revoke(citizen_id, time.time())
+
+def _load_principal(citizen_id):
+    row = db.session.execute(
+        select(Citizen.id, Citizen.role_id, Citizen.district_id, Citizen.is_active)
+        .where(Citizen.id == citizen_id)
+    ).first()
+    return Principal(*row) if row else None
+
+def _authenticate():
+    """(principal, None) for the request's bearer token, or (None, error response)"""
+    token = None
+    
+    if 'Authorization' in request.headers:
+        auth_header = request.headers['Authorization']
+        try:
+            token = auth_header.split(' ')[1]
+        except IndexError:
+            return None, (jsonify({'error': 'Invalid token format'}), 401)
+    
+    if not token:
+        return None, (jsonify({'error': 'Token is missing'}), 401)
+    
+    payload = decode_token(token)
+    if not payload:
+        return None, (jsonify({'error': 'Token is invalid or expired'}), 401)
+    
+    citizen_id = payload['citizen_id']
+    if Config.AUTH_STATELESS and 'district_id' in payload and 'iat' in payload:
+        # Trust the signed claims unless the user was re-roled or deactivated
+        # after the token was issued
+        if revocations.is_revoked(citizen_id, payload['iat']):
+            return None, (jsonify({'error': 'Token has been revoked'}), 401)
+        return Principal(citizen_id, payload['role_id'], payload['district_id'], True), None
+    
+    current_user = principal_cache.get_or_compute(
+        ('principal', citizen_id, _principal_versions.get(citizen_id, 0)),
+        Config.PRINCIPAL_CACHE_TTL,
+        lambda: _load_principal(citizen_id)
+    )
+    if not current_user or not current_user.is_active:
+        return None, (jsonify({'error': 'User not found or inactive'}), 401)
+    
+    return current_user, None
+
 def token_required(f):
     """Decorator to require valid JWT token"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            try:
-                token = auth_header.split(' ')[1]
-            except IndexError:
-                return jsonify({'error': 'Invalid token format'}), 401
-        
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
-        
-        payload = decode_token(token)
-        if not payload:
-            return jsonify({'error': 'Token is invalid or expired'}), 401
-        
-        current_user = Citizen.query.get(payload['citizen_id'])
-        if not current_user or not current_user.is_active:
-            return jsonify({'error': 'User not found or inactive'}), 401
+        current_user, error = _authenticate()
+        if error:
+            return error
         
         return f(current_user, *args, **kwargs)
     
@@ -56,25 +191,9 @@ def admin_required(f):
     """Decorator to require admin role"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            try:
-                token = auth_header.split(' ')[1]
-            except IndexError:
-                return jsonify({'error': 'Invalid token format'}), 401
-        
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
-        
-        payload = decode_token(token)
-        if not payload:
-            return jsonify({'error': 'Token is invalid or expired'}), 401
-        
-        current_user = Citizen.query.get(payload['citizen_id'])
-        if not current_user or not current_user.is_active:
-            return jsonify({'error': 'User not found or inactive'}), 401
+        current_user, error = _authenticate()
+        if error:
+            return error
         
         if current_user.role_id != 2:  # Admin role_id = 2
             return jsonify({'error': 'Admin access required'}), 403
@@ -87,25 +206,9 @@ def admin_required(f):
     """Decorator to require admin or chairperson role"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            try:
-                token = auth_header.split(' ')[1]
-            except IndexError:
-                return jsonify({'error': 'Invalid token format'}), 401
-        
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
-        
-        payload = decode_token(token)
-        if not payload:
-            return jsonify({'error': 'Token is invalid or expired'}), 401
-        
-        current_user = Citizen.query.get(payload['citizen_id'])
-        if not current_user or not current_user.is_active:
-            return jsonify({'error': 'User not found or inactive'}), 401
+        current_user, error = _authenticate()
+        if error:
+            return error
         
         # Allow admin (role 2) and chairperson (role 4)
         if current_user.role_id not in [2, 4]:
@@ -113,4 +216,4 @@ def admin_required(f):
         
         return f(current_user, *args, **kwargs)
     
-    return decorated
\ No newline at end of file
+    return decorated
@@ -0,0 +1,101 @@
+import itertools
+import threading
+import time
+
+
+class ResponseCache:
+    """In-process TTL cache for computed API responses.
+
+    get_or_compute() is single-flight: when an entry expires, one caller
+    recomputes it while concurrent callers for the same key wait for that
+    result instead of running the same queries in parallel.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            # Re-inserted so the dict stays in order of last write
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                self._evict()
+            self._entries[key] = (value, time.monotonic() + ttl)
+
+    def touch(self, key, ttl):
+        """Extend a live entry's lifetime; returns False when there is none"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] is None or entry[1] <= time.monotonic():
+            return False
+        self._entries[key] = (entry[0], time.monotonic() + ttl)
+        return True
+
+    def _evict(self):
+        """Drop expired entries, then the oldest ones down to 7/8 of
+        max_entries so the next writes do not each scan the cache"""
+        now = time.monotonic()
+        for key, entry in list(self._entries.items()):
+            if entry[1] <= now:
+                del self._entries[key]
+        excess = len(self._entries) - self.max_entries * 7 // 8
+        for key in list(itertools.islice(self._entries, max(excess, 0))):
+            del self._entries[key]
+        # Locks of keys whose computation never produced an entry go too
+        for key in [key for key in self._key_locks if key not in self._entries]:
+            lock = self._key_locks[key]
+            if not lock.locked():
+                del self._key_locks[key]
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def _key_lock(self, key):
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def get_or_compute(self, key, ttl, compute):
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        with self._key_lock(key):
+            # Another request may have refreshed the entry while we waited
+            value = self.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+
+            self.misses += 1
+            value = compute()
+            self.set(key, value, ttl)
+            return value
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total * 100, 2) if total > 0 else 0
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,200 @@
+"""
+Maintenance commands, run through the Flask CLI:
+
+    flask --app app rebuild-rollups
+    flask --app app rebuild-keywords
+    flask --app app rebuild-sketches
+    flask --app app rebuild-search-index
+    flask --app app benchmark-serialization --rows 100000
+    flask --app app import-data complaints offline_complaints.csv
+    flask --app app import-data citizens registry_export.csv
+    flask --app app send-queued-emails
+    flask --app app benchmark-login --nin CM12345678901234 --password admin123
+    flask --app app generate-report --track-memory
+"""
+
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import click
+from flask import current_app
+from models import db, Complaint
+from serializers import COMPLAINT, dumps
+from importers import FORMATS, IMPORTERS, import_rows
+from rollups import rebuild_rollups, rebuild_keyword_counts
+from sketches import rebuild_sketches
+from search import rebuild_search_index
+from email_service import send_queued_emails
+from passwords import password_hasher
+from config import Config
+
+@click.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute the daily complaint rollup table from scratch."""
+    buckets = rebuild_rollups()
+    click.echo(f"Rebuilt complaint rollups: {buckets} buckets")
+
+@click.command('rebuild-keywords')
+@click.option('--chunk-size', default=5000, show_default=True,
+              help='Complaints read per query while streaming descriptions.')
+def rebuild_keywords_command(chunk_size):
+    """Recompute the top-issues keyword counts from complaint descriptions."""
+    rows = rebuild_keyword_counts(chunk_size)
+    click.echo(f"Rebuilt complaint keyword counts: {rows} rows")
+
+@click.command('rebuild-sketches')
+@click.option('--chunk-size', default=5000, show_default=True,
+              help='Rows read per query from each channel table.')
+def rebuild_sketches_command(chunk_size):
+    """Recompute the daily engagement sketches from complaints, feedback and ratings."""
+    sketches = rebuild_sketches(chunk_size)
+    click.echo(f"Rebuilt engagement sketches: {sketches} sketches")
+
+@click.command('rebuild-search-index')
+@click.option('--chunk-size', default=5000, show_default=True,
+              help='Complaints read per query while indexing.')
+def rebuild_search_index_command(chunk_size):
+    """Recompute the complaint search index from descriptions, locations and notes."""
+    indexed = rebuild_search_index(chunk_size)
+    click.echo(f"Rebuilt complaint search index: {indexed} complaints")
+
+@click.command('benchmark-serialization')
+@click.option('--rows', default=100000, show_default=True,
+              help='Newest complaints to serialize.')
+def benchmark_serialization_command(rows):
+    """Time the complaint list built with to_dict() against the column projection."""
+    base = Complaint.query.options(db.undefer_group('text')).order_by(Complaint.created_at.desc(), Complaint.id.desc())
+
+    started = time.perf_counter()
+    orm_body = current_app.json.dumps([c.to_dict() for c in base.limit(rows).all()])
+    orm_seconds = time.perf_counter() - started
+
+    names = list(COMPLAINT.fields)
+    serialize = COMPLAINT.serializer(names)
+    started = time.perf_counter()
+    projected_body = dumps([serialize(row) for row in COMPLAINT.select(base, names).limit(rows).all()])
+    projected_seconds = time.perf_counter() - started
+
+    if json.loads(orm_body) != json.loads(projected_body):
+        raise click.ClickException('Projected output differs from to_dict()')
+
+    count = len(json.loads(projected_body))
+    click.echo(f"Serialized {count} complaints")
+    click.echo(f"  to_dict + jsonify:   {orm_seconds:.3f}s")
+    click.echo(f"  projection + dumps:  {projected_seconds:.3f}s")
+    if projected_seconds:
+        click.echo(f"  speed-up:            {orm_seconds / projected_seconds:.1f}x")
+
+@click.command('import-data')
+@click.argument('kind', type=click.Choice(list(IMPORTERS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS),
+              help='File format; taken from the file extension by default.')
+@click.option('--workers', default=1, show_default=True,
+              help='Processes for the NLP analysis or password hashing of each batch.')
+def import_data_command(kind, path, fmt, workers):
+    """Import complaints, policy feedback or citizens from a CSV or NDJSON file."""
+    fmt = fmt or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            result = import_rows(kind, stream, fmt, pool).to_dict()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    click.echo(f"Imported {result['imported']} {kind} in {result['seconds']}s "
+               f"({result['rows_per_second']} rows/s); {result['failed']} rows failed")
+    for error in result['errors']:
+        click.echo(f"  line {error['line']}: {error['error']}")
+    if result['stopped']:
+        click.echo(f"Stopped at line {result['stopped']['line']}: {result['stopped']['error']}")
+    if result['errors_truncated']:
+        click.echo('  (further errors not shown)')
+
+@click.command('send-queued-emails')
+@click.option('--batch-size', default=500, show_default=True,
+              help='Emails sent per SMTP connection and commit.')
+def send_queued_emails_command(batch_size):
+    """Send queued emails, such as the welcome emails of imported citizens."""
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = send_queued_emails(batch_size)
+        if not sent and not failed:
+            break
+        total_sent += sent
+        total_failed += failed
+    click.echo(f"Sent {total_sent} queued emails; {total_failed} failed")
+
+@click.command('generate-report')
+@click.option('--user-id', type=int, help='Citizen recorded as the report author.')
+@click.option('--track-memory', is_flag=True,
+              help='Record the peak memory of each report section.')
+def generate_report_command(user_id, track_memory):
+    """Generate the system report and print its section timings."""
+    from ai.report_generator import ReportGenerator
+
+    report = ReportGenerator.generate_system_report(user_id, track_memory)
+    timings = json.loads(report['report_data'])['metadata']['timings']
+    click.echo(f"Generated report {report['id']}")
+    click.echo(json.dumps(timings, indent=2))
+
+@click.command('benchmark-login')
+@click.option('--nin', required=True, help='NIN of an existing, active user.')
+@click.option('--password', required=True, help="That user's password.")
+@click.option('--requests', 'total', default=200, show_default=True,
+              help='Login requests to send.')
+@click.option('--concurrency', default=16, show_default=True,
+              help='Requests in flight at once.')
+def benchmark_login_command(nin, password, total, concurrency):
+    """Send concurrent POST /api/auth/login requests and report logins per second per core."""
+    client = current_app.test_client()
+    body = {'nin': nin, 'password': password}
+    if client.post('/api/auth/login', json=body).status_code != 200:
+        raise click.ClickException('Login failed; check --nin and --password')
+
+    def login(_):
+        started = time.perf_counter()
+        status = client.post('/api/auth/login', json=body).status_code
+        return status, time.perf_counter() - started
+
+    # Every request comes from one address and account, so rate limits
+    # would measure themselves rather than hashing
+    rate_limit_enabled = Config.RATE_LIMIT_ENABLED
+    Config.RATE_LIMIT_ENABLED = False
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            results = list(executor.map(login, range(total)))
+        seconds = time.perf_counter() - started
+    finally:
+        Config.RATE_LIMIT_ENABLED = rate_limit_enabled
+
+    statuses = Counter(status for status, _ in results)
+    latencies = sorted(latency for status, latency in results if status == 200)
+    cores = min(password_hasher.workers, os.cpu_count() or 1)
+    succeeded = statuses.get(200, 0)
+
+    click.echo(f"Sent {total} logins with {concurrency} in flight in {seconds:.2f}s "
+               f"({password_hasher.method_prefix()}, {password_hasher.workers} hashing workers)")
+    click.echo(f"  statuses:          {dict(statuses)}")
+    click.echo(f"  logins/s:          {succeeded / seconds:.1f}")
+    click.echo(f"  logins/s per core: {succeeded / seconds / cores:.1f} ({cores} cores)")
+    if latencies:
+        click.echo(f"  p50 / p95 latency: {latencies[len(latencies) // 2] * 1000:.0f} ms / "
+                   f"{latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000:.0f} ms")
+    click.echo(f"  hashing pool:      {password_hasher.stats()}")
+
+def register_commands(app):
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(rebuild_keywords_command)
+    app.cli.add_command(rebuild_sketches_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(benchmark_serialization_command)
+    app.cli.add_command(import_data_command)
+    app.cli.add_command(send_queued_emails_command)
+    app.cli.add_command(benchmark_login_command)
+    app.cli.add_command(generate_report_command)
@@ -19,6 +19,9 @@ class Config:
         "?driver=ODBC+Driver+17+for+SQL+Server"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Send executemany batches (bulk imports, keyword and rollup writes) as
+    # one array-bound pyodbc call instead of a round trip per row
+    SQLALCHEMY_ENGINE_OPTIONS = {"fast_executemany": True}
     SECRET_KEY = os.getenv('SECRET_KEY', 'bwiO3uOadU1q2qjw9KwBcVRD0HpmxL-MhLjOm_zmwiI')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'FxHchpRjhhoiJ6ahlz4U5k2UJs7XI6J_jCimzn7lM4vooUi6zsR_VuVOikVcpTiYObyI9XkB42pzNPU0ACVDSg')
     MAX_FEEDBACK_LENGTH = 5000
@@ -27,5 +30,124 @@ class Config:
         # JWT token expiry in seconds
     JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", 3600))
 
+    # Response cache TTL for the public dashboard endpoint, in seconds
+    DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", 5))
+
+    # Serve analytics aggregates from the ComplaintDailyRollups table
+    ANALYTICS_USE_ROLLUP = os.getenv("ANALYTICS_USE_ROLLUP", "False").lower() == "true"
+
+    # Cache-Control max-age for public analytics responses; clients revalidate
+    # with If-None-Match once it expires
+    ANALYTICS_CACHE_MAX_AGE = int(os.getenv("ANALYTICS_CACHE_MAX_AGE", 0))
+
+    # Worker threads for /api/analytics/bundle. With 1, all widgets run on the
+    # request's own connection; with more, independent widget groups run in
+    # parallel, each on its own pooled connection.
+    ANALYTICS_BUNDLE_WORKERS = int(os.getenv("ANALYTICS_BUNDLE_WORKERS", 1))
+
+    # Live dashboard stream (/api/analytics/stream): open connections allowed,
+    # seconds between heartbeats, milliseconds over which bursts of changes
+    # are merged into one message, and recent events kept per client
+    ANALYTICS_STREAM_MAX_CLIENTS = int(os.getenv("ANALYTICS_STREAM_MAX_CLIENTS", 500))
+    ANALYTICS_STREAM_HEARTBEAT = int(os.getenv("ANALYTICS_STREAM_HEARTBEAT", 15))
+    ANALYTICS_STREAM_COALESCE_MS = int(os.getenv("ANALYTICS_STREAM_COALESCE_MS", 250))
+    ANALYTICS_STREAM_QUEUE_SIZE = int(os.getenv("ANALYTICS_STREAM_QUEUE_SIZE", 50))
+
+    # Background cache warmer for expensive analytics and predictions. Runs
+    # every CACHE_WARM_INTERVAL +/- CACHE_WARM_JITTER seconds; CACHE_WARM_JOBS
+    # is a comma-separated list of job names (empty for all registered jobs).
+    # The warmer's thread also runs periodic tasks (revocation sync, USSD
+    # snapshots, similarity index refresh), which these settings do not stop
+    CACHE_WARM_ENABLED = os.getenv("CACHE_WARM_ENABLED", "True").lower() == "true"
+    CACHE_WARM_INTERVAL = int(os.getenv("CACHE_WARM_INTERVAL", 60))
+    CACHE_WARM_JITTER = int(os.getenv("CACHE_WARM_JITTER", 10))
+    CACHE_WARM_JOBS = [job.strip() for job in os.getenv("CACHE_WARM_JOBS", "").split(",") if job.strip()]
+
+    # Keyset pagination of list endpoints: page size when only a cursor is
+    # given, largest page allowed, and the point above which estimated totals
+    # are reported as "N+"
+    PAGINATION_DEFAULT_LIMIT = int(os.getenv("PAGINATION_DEFAULT_LIMIT", 50))
+    PAGINATION_MAX_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", 500))
+    PAGINATION_COUNT_CAP = int(os.getenv("PAGINATION_COUNT_CAP", 10000))
+
+    # Bulk complaint triage (PUT /api/admin/complaints/assign): most
+    # complaints one request may change, and ids per UPDATE statement (kept
+    # well under SQL Server's 2100 parameter limit)
+    BULK_TRIAGE_MAX_COMPLAINTS = int(os.getenv("BULK_TRIAGE_MAX_COMPLAINTS", 10000))
+    BULK_TRIAGE_CHUNK_SIZE = int(os.getenv("BULK_TRIAGE_CHUNK_SIZE", 500))
+
+    # Bulk complaint/feedback import: rows validated, analyzed and inserted
+    # per batch (and committed together), and per-row errors reported
+    IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 1000))
+    IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))
+    # Citizens accepted per upload to POST /api/admin/import/citizens, whose
+    # passwords are hashed inside the request; larger files go through
+    # `flask import-data citizens`
+    IMPORT_HTTP_MAX_CITIZENS = int(os.getenv("IMPORT_HTTP_MAX_CITIZENS", 1000))
+
+    # Complaint search (GET /api/admin/complaints/search): deepest result
+    # reachable by paging, and how long the collection statistics used for
+    # BM25 ranking (document count, average length) are cached
+    SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", 1000))
+    SEARCH_STATS_TTL = int(os.getenv("SEARCH_STATS_TTL", 60))
+
+    # Similar complaints (GET /api/admin/complaints/<id>/similar): largest k,
+    # seconds after which a query first syncs the in-process index with the
+    # database, changed complaints held before they are merged into it, and
+    # the share of complaints above which a common term is ignored
+    SIMILARITY_MAX_K = int(os.getenv("SIMILARITY_MAX_K", 50))
+    SIMILARITY_REFRESH_INTERVAL = int(os.getenv("SIMILARITY_REFRESH_INTERVAL", 5))
+    SIMILARITY_MERGE_ROWS = int(os.getenv("SIMILARITY_MERGE_ROWS", 5000))
+    SIMILARITY_MAX_DF = float(os.getenv("SIMILARITY_MAX_DF", 0.2))
+
+    # Seconds an authenticated user's role, district and active flag are
+    # cached per token. Role and status changes apply at once in the process
+    # that made them and within this delay in other processes; 0 disables it
+    PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", 30))
+
+    # Stateless auth: trust the role and district signed into the token
+    # instead of reading the user. Role and status changes revoke the user's
+    # tokens; other processes learn of a revocation within
+    # AUTH_REVOCATION_SYNC_INTERVAL seconds, which bounds the staleness
+    AUTH_STATELESS = os.getenv("AUTH_STATELESS", "False").lower() == "true"
+    AUTH_REVOCATION_SYNC_INTERVAL = int(os.getenv("AUTH_REVOCATION_SYNC_INTERVAL", 10))
+
+    # Password hashing (see passwords.py): werkzeug method and cost for new
+    # hashes, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000" (cheaper in
+    # development, stronger in production; older hashes are upgraded at
+    # login), worker threads (0 for one per core), hashes allowed to wait for
+    # a worker before logins are shed, and seconds a request waits at most
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 0))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 64))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 5))
+
+    # Rate limits of public endpoints (see rate_limit.py), each
+    # "<count>/<second|minute|hour|day>" or empty to disable it: logins per
+    # client address and per NIN, registrations and tracking lookups per
+    # address, USSD requests per phone number and per aggregator address, and
+    # complaints per citizen. Counters live in this process unless
+    # RATE_LIMIT_BACKEND names a shared "module:Class" backend
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", 64))
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+    RATE_LIMIT_LOGIN = os.getenv("RATE_LIMIT_LOGIN", "60/minute")
+    RATE_LIMIT_LOGIN_ACCOUNT = os.getenv("RATE_LIMIT_LOGIN_ACCOUNT", "10/minute")
+    RATE_LIMIT_REGISTER = os.getenv("RATE_LIMIT_REGISTER", "10/minute")
+    RATE_LIMIT_TRACK = os.getenv("RATE_LIMIT_TRACK", "120/minute")
+    RATE_LIMIT_USSD_PHONE = os.getenv("RATE_LIMIT_USSD_PHONE", "30/minute")
+    RATE_LIMIT_USSD_CLIENT = os.getenv("RATE_LIMIT_USSD_CLIENT", "3000/minute")
+    RATE_LIMIT_COMPLAINT = os.getenv("RATE_LIMIT_COMPLAINT", "20/minute")
+
+    # USSD dialogue state (see ussd_sessions.py): "memory" keeps sessions in
+    # this process, so every hop of a dialogue must reach the same process,
+    # or "module:Class" names a shared store; seconds a session lives after
+    # its last hop; and whether dialogues in progress are also written to
+    # USSDSessions by the background warmer
+    USSD_SESSION_STORE = os.getenv("USSD_SESSION_STORE", "memory")
+    USSD_SESSION_TTL = int(os.getenv("USSD_SESSION_TTL", 180))
+    USSD_SESSION_SNAPSHOTS = os.getenv("USSD_SESSION_SNAPSHOTS", "False").lower() == "true"
+
 print("Loaded DB user:", DB_USER)
 print("Connection string:", Config.SQLALCHEMY_DATABASE_URI)
@@ -1,4 +1,5 @@
 from flask_mail import Mail, Message
+from sqlalchemy import select, insert
 from models import db, EmailLog
 from datetime import datetime
 
@@ -108,8 +109,8 @@ CitizenVoice AI Team
     
     return send_email(citizen_email, subject, body_text, body_html)
 
-def send_welcome_email(citizen_email, citizen_name):
-    """Send welcome email after registration"""
+def welcome_email(citizen_name):
+    """(subject, text, html) of the welcome email"""
     subject = "Welcome to CitizenVoice AI"
     
     body_text = f"""
@@ -179,4 +180,54 @@ CitizenVoice AI Team
 </html>
 """
     
-    return send_email(citizen_email, subject, body_text, body_html)
+    return subject, body_text, body_html
+
+def send_welcome_email(citizen_email, citizen_name):
+    """Send welcome email after registration"""
+    return send_email(citizen_email, *welcome_email(citizen_name))
+
+def queue_welcome_emails(recipients):
+    """Queue welcome emails for [(email, name)] in the current transaction;
+    send_queued_emails() delivers them"""
+    rows = []
+    for email, name in recipients:
+        subject, body_text, _ = welcome_email(name)
+        rows.append({
+            'recipient_email': email,
+            'subject': subject,
+            'body': body_text,
+            'status': 'Queued',
+            'sent_at': datetime.utcnow(),
+            'error_message': None
+        })
+    if rows:
+        db.session.execute(insert(EmailLog.__table__), rows)
+    return len(rows)
+
+def send_queued_emails(limit=500):
+    """Send up to `limit` queued emails, oldest first, over one SMTP
+    connection. Queued emails are sent as plain text. Returns (sent, failed)."""
+    queued = db.session.scalars(
+        select(EmailLog).options(db.undefer_group('text'))
+        .where(EmailLog.status == 'Queued')
+        .order_by(EmailLog.id)
+        .limit(limit)
+    ).all()
+    if not queued:
+        return 0, 0
+    
+    sent = failed = 0
+    with mail.connect() as connection:
+        for log in queued:
+            try:
+                connection.send(Message(subject=log.subject, recipients=[log.recipient_email], body=log.body))
+                log.status = 'Sent'
+                sent += 1
+            except Exception as e:
+                log.status = 'Failed'
+                log.error_message = str(e)
+                failed += 1
+            log.sent_at = datetime.utcnow()
+    db.session.commit()
+    
+    return sent, failed
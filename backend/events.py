@@ -0,0 +1,218 @@
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db
+
+# Dashboard counter for each complaint status and priority
+STATUS_COUNTERS = {
+    'Pending': 'pending_complaints',
+    'In Progress': 'in_progress_complaints',
+    'Resolved': 'resolved_complaints'
+}
+PRIORITY_COUNTERS = {
+    'Urgent': 'urgent_complaints',
+    'High': 'high_complaints',
+    'Normal': 'normal_complaints'
+}
+
+
+class Subscription:
+    """One listener's pending changes.
+
+    Counter deltas are summed as they arrive, so a burst of changes becomes
+    one message and the pending state never grows beyond the set of counter
+    names. Event details are kept in a bounded queue; when it overflows the
+    oldest entries are dropped and counted.
+    """
+
+    def __init__(self, max_events):
+        self.deltas = Counter()
+        self.events = deque(maxlen=max_events)
+        self.dropped = 0
+        self._condition = threading.Condition()
+
+    def push(self, message):
+        with self._condition:
+            self.deltas.update(message['deltas'])
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(message['event'])
+            self._condition.notify()
+
+    def take(self, timeout, coalesce):
+        """Wait up to `timeout` seconds for changes, then gather any that
+        follow within `coalesce` seconds. Returns None on timeout."""
+        with self._condition:
+            if not self.events and not self._condition.wait_for(lambda: self.events, timeout):
+                return None
+
+        if coalesce > 0:
+            time.sleep(coalesce)
+
+        with self._condition:
+            batch = {
+                'deltas': {name: value for name, value in self.deltas.items() if value},
+                'events': list(self.events)
+            }
+            if self.dropped:
+                batch['dropped'] = self.dropped
+            self.deltas.clear()
+            self.events.clear()
+            self.dropped = 0
+            return batch
+
+
+class EventBus:
+    """In-process publish/subscribe for live dashboard updates"""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, max_events, max_subscribers):
+        """A new Subscription, or None when the subscriber limit is reached"""
+        with self._lock:
+            if len(self._subscribers) >= max_subscribers:
+                return None
+            subscription = Subscription(max_events)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for subscription in subscribers:
+            subscription.push(message)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self.published
+            }
+
+
+event_bus = EventBus()
+
+
+def publish_after_commit(event_type, deltas, **details):
+    """Queue a dashboard event on the current session.
+
+    It is published once the transaction commits and discarded on rollback,
+    so listeners only ever see committed changes.
+    """
+    db.session.info.setdefault('pending_events', []).append({
+        'deltas': deltas,
+        'event': dict(details, type=event_type)
+    })
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending(session):
+    for message in session.info.pop('pending_events', []):
+        event_bus.publish(message)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    # Also fires when a savepoint rolls back (begin_nested() fallbacks); the
+    # outer transaction, and the events queued in it, may still commit
+    if session.in_nested_transaction():
+        return
+    session.info.pop('pending_events', None)
+
+
+def complaint_created(complaint):
+    """Publish a new complaint's contribution to the dashboard counters"""
+    deltas = Counter({'total_complaints': 1, 'recent_complaints': 1})
+    if complaint.status in STATUS_COUNTERS:
+        deltas[STATUS_COUNTERS[complaint.status]] += 1
+    if complaint.priority in PRIORITY_COUNTERS:
+        deltas[PRIORITY_COUNTERS[complaint.priority]] += 1
+
+    publish_after_commit(
+        'complaint_created', dict(deltas),
+        tracking_number=complaint.tracking_number,
+        category=complaint.category,
+        priority=complaint.priority
+    )
+
+
+def complaint_status_changed(complaint, previous_status):
+    """Publish a status change; no-op when the status did not change"""
+    if complaint.status == previous_status:
+        return
+
+    deltas = Counter()
+    if previous_status in STATUS_COUNTERS:
+        deltas[STATUS_COUNTERS[previous_status]] -= 1
+    if complaint.status in STATUS_COUNTERS:
+        deltas[STATUS_COUNTERS[complaint.status]] += 1
+
+    publish_after_commit(
+        'complaint_status_changed', dict(deltas),
+        tracking_number=complaint.tracking_number,
+        previous_status=previous_status,
+        status=complaint.status
+    )
+
+
+def complaints_bulk_updated(previous_statuses, status, count):
+    """Publish one event for a bulk status change.
+
+    `previous_statuses` counts the changed complaints by their old status.
+    """
+    deltas = Counter()
+    if status is not None:
+        for previous_status, moved in previous_statuses.items():
+            if previous_status == status:
+                continue
+            if previous_status in STATUS_COUNTERS:
+                deltas[STATUS_COUNTERS[previous_status]] -= moved
+            if status in STATUS_COUNTERS:
+                deltas[STATUS_COUNTERS[status]] += moved
+
+    publish_after_commit('complaints_bulk_updated', dict(deltas), count=count, status=status)
+
+
+def complaints_imported(complaints):
+    """Publish one event for a batch of imported complaints (dicts of column values)"""
+    recent_since = datetime.utcnow() - timedelta(days=30)
+    deltas = Counter(total_complaints=len(complaints))
+    for complaint in complaints:
+        if complaint['created_at'] >= recent_since:
+            deltas['recent_complaints'] += 1
+        if complaint['status'] in STATUS_COUNTERS:
+            deltas[STATUS_COUNTERS[complaint['status']]] += 1
+        if complaint['priority'] in PRIORITY_COUNTERS:
+            deltas[PRIORITY_COUNTERS[complaint['priority']]] += 1
+
+    publish_after_commit('complaints_imported', dict(deltas), count=len(complaints))
+
+
+def feedback_imported(count):
+    publish_after_commit('feedback_imported', {'total_feedback': count}, count=count)
+
+
+def feedback_submitted(feedback):
+    publish_after_commit('feedback_submitted', {'total_feedback': 1}, policy_id=feedback.policy_id)
+
+
+def rating_submitted(rating):
+    publish_after_commit(
+        'rating_submitted',
+        {'total_ratings': 1, 'rating_sum': rating.rating or 0},
+        service_type=rating.service_type,
+        rating=rating.rating
+    )
@@ -0,0 +1,506 @@
+"""
+Bulk import of complaints, policy feedback and citizens from CSV or NDJSON.
+
+Rows are streamed and handled in chunks of IMPORT_CHUNK_SIZE. Each chunk is
+validated against reference data (small lookup tables are loaded once,
+citizens and policies with one IN query per chunk), analyzed by the NLP
+analyzer as a batch, and inserted with one executemany statement, which
+pyodbc sends as a single array-bound batch with fast_executemany. Rollups,
+keyword counts, the search index, engagement sketches and the dashboard
+stream are updated once per chunk, and every chunk commits on its own.
+
+A bad row never aborts the import: it is skipped and reported with its line
+number. When the database rejects a chunk, its rows are retried one by one
+so only the offending rows are lost.
+
+Complaint columns: description (required), district_id or district (name),
+citizen_id, category, priority, status, ministry_id, location, created_at,
+resolved_at. Category and priority are derived from the description when
+missing, and the ministry from the category, as for submitted complaints.
+
+Feedback columns: policy_id and feedback_text (required), citizen_id,
+submitted_at. Sentiment and themes are always derived from the text.
+
+Citizen columns: nin, name, phone and password (required), email,
+district_id or district. NIN, phone and email must be unique within the file
+and against existing accounts; rows that conflict are reported, not
+inserted. Passwords are hashed on the process pool given by import-data, or
+else a chunk at a time on the shared password hashing pool, using at most
+half its workers so sign-ins keep the rest. An upload takes at most
+IMPORT_HTTP_MAX_CITIZENS rows. When the hashing pool is overloaded the
+import stops, and the result reports the imported rows and the line to
+resume from. Welcome emails are queued with the rows, for send-queued-emails
+to deliver.
+"""
+
+import csv
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import select, insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from werkzeug.security import generate_password_hash
+
+from config import Config
+from models import db, Complaint, PolicyFeedback, Citizen, District, Ministry, Policy
+from ai.nlp_analyzer import NLPAnalyzer
+from rollups import record_complaints_created
+from sketches import record_engagements
+from search import index_documents, invalidate_collection_stats
+from email_service import queue_welcome_emails
+from passwords import password_hasher, HashingOverloaded
+from events import STATUS_COUNTERS, PRIORITY_COUNTERS
+import events
+
+FORMATS = ('csv', 'ndjson')
+
+CATEGORY_LENGTH = Complaint.__table__.c.category.type.length
+LOCATION_LENGTH = Complaint.__table__.c.location.type.length
+NIN_LENGTH = Citizen.__table__.c.nin.type.length
+NAME_LENGTH = Citizen.__table__.c.name.type.length
+PHONE_LENGTH = Citizen.__table__.c.phone.type.length
+EMAIL_LENGTH = Citizen.__table__.c.email.type.length
+STATUSES = list(STATUS_COUNTERS)
+PRIORITIES = list(PRIORITY_COUNTERS)
+
+
+class RowError(ValueError):
+    pass
+
+
+class ImportResult:
+    """Counts and per-row errors of one import"""
+
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.stopped = None
+        self.overloaded = False
+        self.started = time.perf_counter()
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < Config.IMPORT_MAX_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def stop(self, line, message):
+        """The import ended early; rows from `line` on were not read"""
+        self.stopped = {'line': line, 'error': message}
+
+    def to_dict(self):
+        seconds = time.perf_counter() - self.started
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+            'stopped': self.stopped,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(self.imported / seconds) if seconds else None
+        }
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict, error) for each record of a text stream"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f'Invalid JSON: {e}'
+            continue
+        if isinstance(row, dict):
+            yield line_number, row, None
+        else:
+            yield line_number, None, 'Expected a JSON object'
+
+
+def _text(row, name, max_length=None, required=False):
+    value = row.get(name)
+    value = str(value).strip() if value is not None else ''
+    if not value:
+        if required:
+            raise RowError(f'{name} is required')
+        return None
+    if max_length and len(value) > max_length:
+        raise RowError(f'{name} is longer than {max_length} characters')
+    return value
+
+
+def _int(row, name, required=False):
+    value = _text(row, name, required=required)
+    if value is None:
+        return None
+    if not value.isdigit():
+        raise RowError(f'{name} must be a numeric id')
+    return int(value)
+
+
+def _timestamp(row, name):
+    value = _text(row, name)
+    if value is None:
+        return None
+    try:
+        value = datetime.fromisoformat(value)
+    except ValueError:
+        raise RowError(f'{name} must be an ISO 8601 date or date-time')
+    # Timestamps are stored as naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _choice(row, name, choices):
+    value = _text(row, name)
+    if value is not None and value not in choices:
+        raise RowError(f"{name} must be one of: {', '.join(choices)}")
+    return value
+
+
+class ComplaintImporter:
+    def __init__(self, pool=None):
+        self.districts = {}
+        for district_id, name in db.session.execute(select(District.id, District.name)):
+            self.districts[district_id] = district_id
+            self.districts[name.lower()] = district_id
+        self.ministry_ids = set()
+        self.ministries_by_code = {}
+        for ministry_id, code in db.session.execute(select(Ministry.id, Ministry.code).order_by(Ministry.id)):
+            self.ministry_ids.add(ministry_id)
+            self.ministries_by_code[code] = ministry_id
+        self.default_ministry_id = min(self.ministry_ids) if self.ministry_ids else None
+        self.issued = set()
+        self.pool = pool
+
+    def validate(self, row):
+        district_id = _int(row, 'district_id')
+        if district_id is None:
+            name = _text(row, 'district', required=True)
+            district_id = self.districts.get(name.lower())
+            if district_id is None:
+                raise RowError(f'Unknown district: {name}')
+        elif district_id not in self.districts:
+            raise RowError(f'Unknown district_id: {district_id}')
+
+        ministry_id = _int(row, 'ministry_id')
+        if ministry_id is not None and ministry_id not in self.ministry_ids:
+            raise RowError(f'Unknown ministry_id: {ministry_id}')
+
+        status = _choice(row, 'status', STATUSES) or 'Pending'
+        created_at = _timestamp(row, 'created_at') or datetime.utcnow()
+        resolved_at = _timestamp(row, 'resolved_at')
+        if resolved_at is not None:
+            if status != 'Resolved':
+                raise RowError('resolved_at is only allowed for Resolved complaints')
+            if resolved_at < created_at:
+                raise RowError('resolved_at is before created_at')
+
+        return {
+            'citizen_id': _int(row, 'citizen_id'),
+            'ministry_id': ministry_id,
+            'district_id': district_id,
+            'category': _text(row, 'category', CATEGORY_LENGTH),
+            'description': _text(row, 'description', required=True),
+            'location': _text(row, 'location', LOCATION_LENGTH),
+            'priority': _choice(row, 'priority', PRIORITIES),
+            'status': status,
+            'tracking_number': None,
+            'assigned_to': None,
+            'created_at': created_at,
+            'updated_at': datetime.utcnow(),
+            'resolved_at': resolved_at,
+            'resolution_notes': None
+        }
+
+    def check_references(self, rows):
+        """Errors for rows naming citizens that do not exist"""
+        citizen_ids = {values['citizen_id'] for _, values in rows if values['citizen_id'] is not None}
+        known = _existing_ids(Citizen, citizen_ids)
+        return {
+            line: f"Unknown citizen_id: {values['citizen_id']}"
+            for line, values in rows
+            if values['citizen_id'] is not None and values['citizen_id'] not in known
+        }
+
+    def analyze(self, rows):
+        analyzed = NLPAnalyzer.analyze_complaints([values['description'] for values in rows], self.pool)
+        for values, (category, priority) in zip(rows, analyzed):
+            values['category'] = values['category'] or category
+            values['priority'] = values['priority'] or priority
+            if values['ministry_id'] is None:
+                code = NLPAnalyzer.get_ministry_code_for_category(values['category'])
+                values['ministry_id'] = self.ministries_by_code.get(code, self.default_ministry_id)
+        self._assign_tracking_numbers(rows)
+
+    def _assign_tracking_numbers(self, rows):
+        """Same format as submitted complaints, unique within the import and
+        against the numbers already stored"""
+        pending = rows
+        while pending:
+            for values in pending:
+                number = f"CMP-{uuid.uuid4().hex[:8].upper()}"
+                while number in self.issued:
+                    number = f"CMP-{uuid.uuid4().hex[:8].upper()}"
+                self.issued.add(number)
+                values['tracking_number'] = number
+
+            taken = set(db.session.scalars(
+                select(Complaint.tracking_number).where(
+                    Complaint.tracking_number.in_([values['tracking_number'] for values in pending])
+                )
+            ))
+            pending = [values for values in pending if values['tracking_number'] in taken]
+
+    def _inserted_ids(self, tracking_numbers):
+        """Ids of the complaints just inserted, by tracking number"""
+        ids = {}
+        for start in range(0, len(tracking_numbers), Config.IMPORT_CHUNK_SIZE):
+            ids.update(db.session.execute(
+                select(Complaint.tracking_number, Complaint.id).where(
+                    Complaint.tracking_number.in_(tracking_numbers[start:start + Config.IMPORT_CHUNK_SIZE])
+                )
+            ).all())
+        return ids
+
+    def write(self, rows):
+        db.session.execute(insert(Complaint.__table__), rows)
+        record_complaints_created(rows)
+        ids = self._inserted_ids([values['tracking_number'] for values in rows])
+        index_documents([
+            (ids[values['tracking_number']], values['description'], values['location'], None)
+            for values in rows
+        ])
+        record_engagements('complaints', [(values['citizen_id'], values['created_at'].date()) for values in rows])
+        events.complaints_imported(rows)
+
+    def finish(self):
+        invalidate_collection_stats()
+
+
+class FeedbackImporter:
+    def __init__(self, pool=None):
+        self.pool = pool
+
+    def validate(self, row):
+        return {
+            'policy_id': _int(row, 'policy_id', required=True),
+            'citizen_id': _int(row, 'citizen_id'),
+            'feedback_text': _text(row, 'feedback_text', Config.MAX_FEEDBACK_LENGTH, required=True),
+            'sentiment': None,
+            'themes': None,
+            'submitted_at': _timestamp(row, 'submitted_at') or datetime.utcnow()
+        }
+
+    def check_references(self, rows):
+        """Errors for rows naming policies or citizens that do not exist"""
+        policies = _existing_ids(Policy, {values['policy_id'] for _, values in rows})
+        citizens = _existing_ids(Citizen, {values['citizen_id'] for _, values in rows if values['citizen_id'] is not None})
+        errors = {}
+        for line, values in rows:
+            if values['policy_id'] not in policies:
+                errors[line] = f"Unknown policy_id: {values['policy_id']}"
+            elif values['citizen_id'] is not None and values['citizen_id'] not in citizens:
+                errors[line] = f"Unknown citizen_id: {values['citizen_id']}"
+        return errors
+
+    def analyze(self, rows):
+        analyzed = NLPAnalyzer.analyze_feedback([values['feedback_text'] for values in rows], self.pool)
+        for values, (sentiment, themes) in zip(rows, analyzed):
+            values['sentiment'] = sentiment
+            values['themes'] = ','.join(themes)
+
+    def write(self, rows):
+        db.session.execute(insert(PolicyFeedback.__table__), rows)
+        record_engagements('feedback', [(values['citizen_id'], values['submitted_at'].date()) for values in rows])
+        events.feedback_imported(len(rows))
+
+    def finish(self):
+        pass
+
+
+def _hash_password(password):
+    return generate_password_hash(password, Config.PASSWORD_HASH_METHOD)
+
+
+class CitizenImporter:
+    UNIQUE = (('nin', 'NIN'), ('phone', 'Phone number'), ('email', 'Email'))
+
+    def __init__(self, pool=None):
+        self.districts = {}
+        for district_id, name in db.session.execute(select(District.id, District.name)):
+            self.districts[district_id] = district_id
+            self.districts[name.lower()] = district_id
+        # First line of each NIN, phone and email seen in the file
+        self.seen = {column: {} for column, _ in self.UNIQUE}
+        self.pool = pool
+
+    def validate(self, row):
+        district_id = _int(row, 'district_id')
+        if district_id is None:
+            name = _text(row, 'district')
+            if name is not None:
+                district_id = self.districts.get(name.lower())
+                if district_id is None:
+                    raise RowError(f'Unknown district: {name}')
+        elif district_id not in self.districts:
+            raise RowError(f'Unknown district_id: {district_id}')
+
+        email = _text(row, 'email', EMAIL_LENGTH)
+        if email is not None and '@' not in email:
+            raise RowError('email is not a valid address')
+
+        values = {
+            'nin': _text(row, 'nin', NIN_LENGTH, required=True),
+            'name': _text(row, 'name', NAME_LENGTH, required=True),
+            'phone': _text(row, 'phone', PHONE_LENGTH, required=True),
+            'email': email,
+            'password': _text(row, 'password', required=True),
+            'district_id': district_id,
+            'role_id': 1,
+            'is_active': True,
+            'email_verified': False,
+            'created_at': datetime.utcnow(),
+            'last_login': None
+        }
+        return values
+
+    def check_references(self, rows):
+        """Errors for rows whose NIN, phone or email appeared earlier in the
+        file or is already registered"""
+        errors = {}
+        for line, values in rows:
+            for column, label in self.UNIQUE:
+                first = self.seen[column].get(values[column])
+                if first is not None:
+                    errors[line] = f'{label} {values[column]} repeats line {first}'
+                    break
+            else:
+                for column, _ in self.UNIQUE:
+                    if values[column] is not None:
+                        self.seen[column][values[column]] = line
+
+        rows = [(line, values) for line, values in rows if line not in errors]
+        for column, label in self.UNIQUE:
+            taken = _existing_values(getattr(Citizen, column), {
+                values[column] for _, values in rows if values[column] is not None
+            })
+            for line, values in rows:
+                if values[column] in taken and line not in errors:
+                    errors[line] = f'{label} already registered: {values[column]}'
+        return errors
+
+    def analyze(self, rows):
+        passwords = [values.pop('password') for values in rows]
+        if self.pool:
+            hashes = self.pool.map(_hash_password, passwords)
+        else:
+            hashes = password_hasher.hash_many(passwords)
+        for values, password_hash in zip(rows, hashes):
+            values['password_hash'] = password_hash
+
+    def write(self, rows):
+        db.session.execute(insert(Citizen.__table__), rows)
+        queue_welcome_emails([(values['email'], values['name']) for values in rows if values['email']])
+
+    def finish(self):
+        pass
+
+
+IMPORTERS = {
+    'complaints': ComplaintImporter,
+    'feedback': FeedbackImporter,
+    'citizens': CitizenImporter
+}
+
+
+def _existing_ids(model, ids):
+    return _existing_values(model.id, ids)
+
+
+def _existing_values(column, values):
+    values = list(values)
+    existing = set()
+    for start in range(0, len(values), Config.IMPORT_CHUNK_SIZE):
+        existing.update(db.session.scalars(
+            select(column).where(column.in_(values[start:start + Config.IMPORT_CHUNK_SIZE]))
+        ))
+    return existing
+
+
+def _import_chunk(importer, chunk, result):
+    valid = []
+    for line, row in chunk:
+        try:
+            valid.append((line, importer.validate(row)))
+        except RowError as e:
+            result.error(line, str(e))
+
+    errors = importer.check_references(valid)
+    for line, message in errors.items():
+        result.error(line, message)
+    valid = [(line, values) for line, values in valid if line not in errors]
+    if not valid:
+        return
+
+    importer.analyze([values for _, values in valid])
+
+    try:
+        importer.write([values for _, values in valid])
+        db.session.commit()
+        result.imported += len(valid)
+        return
+    except SQLAlchemyError:
+        db.session.rollback()
+
+    # Retry row by row so one rejected row does not lose the whole chunk
+    for line, values in valid:
+        try:
+            importer.write([values])
+            db.session.commit()
+            result.imported += 1
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            result.error(line, f'Rejected by the database: {getattr(e, "orig", e)}')
+
+
+def import_rows(kind, stream, fmt, pool=None, max_rows=None):
+    """Import complaints, feedback or citizens from a text stream, reading
+    at most `max_rows` rows; returns an ImportResult"""
+    importer = IMPORTERS[kind](pool)
+    result = ImportResult()
+
+    chunk = []
+    try:
+        for count, (line, row, error) in enumerate(read_rows(stream, fmt), 1):
+            if max_rows is not None and count > max_rows:
+                result.stop(line, f'At most {max_rows} rows are imported at once; send the rest from this line')
+                break
+            if error:
+                result.error(line, error)
+                continue
+            chunk.append((line, row))
+            if len(chunk) >= Config.IMPORT_CHUNK_SIZE:
+                _import_chunk(importer, chunk, result)
+                chunk = []
+        if chunk:
+            _import_chunk(importer, chunk, result)
+    except HashingOverloaded:
+        # Earlier chunks are committed; this one was not written
+        db.session.rollback()
+        result.overloaded = True
+        result.stop(chunk[0][0], 'Password hashing is overloaded; retry from this line shortly')
+    finally:
+        importer.finish()
+
+    return result
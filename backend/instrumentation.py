@@ -0,0 +1,262 @@
+import json
+import logging
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger('citizenvoice.timing')
+
+_current_span = ContextVar('current_span', default=None)
+_stats = {}
+_stats_lock = threading.Lock()
+
+# tracemalloc is process-wide, so one span tree at a time may own it
+_memory_lock = threading.Lock()
+
+
+class Span:
+    """One timed section: wall time, queries issued, rows fetched and peak memory"""
+
+    __slots__ = ('name', 'parent', 'track_memory', 'started', 'wall_ms', 'queries',
+                 'rows', 'start_memory', 'peak_memory', 'children', 'statements')
+
+    def __init__(self, name, parent, track_memory):
+        self.name = name
+        self.parent = parent
+        self.track_memory = track_memory
+        self.started = time.perf_counter()
+        self.wall_ms = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.start_memory = 0
+        self.peak_memory = 0
+        self.children = []
+        self.statements = None
+
+    def to_dict(self):
+        data = {
+            'name': self.name,
+            'wall_ms': round(self.wall_ms, 2),
+            'queries': self.queries,
+            'rows': self.rows
+        }
+        if self.track_memory:
+            data['peak_memory_kb'] = round((self.peak_memory - self.start_memory) / 1024, 1)
+        if self.children:
+            data['children'] = [child.to_dict() for child in self.children]
+        return data
+
+
+@contextmanager
+def trace(name, track_memory=False):
+    """Time a block of code and record it as a span.
+
+    Nested spans inherit memory tracking from their parent; the outermost
+    span that asks for it starts tracemalloc and stops it again on exit.
+    tracemalloc traces every thread of the process, so memory tracking is
+    for offline runs (the generate-report command): while it is on, other
+    requests are slowed down and their allocations count towards the peak.
+    A span that asks for it while another thread holds it, or while
+    tracemalloc was started outside trace(), goes without.
+    """
+    parent = _current_span.get()
+    inherited = parent is not None and parent.track_memory
+    owns_tracemalloc = False
+    if track_memory and not inherited:
+        owns_tracemalloc = _memory_lock.acquire(blocking=False)
+        if owns_tracemalloc and tracemalloc.is_tracing():
+            _memory_lock.release()
+            owns_tracemalloc = False
+        track_memory = owns_tracemalloc
+        if owns_tracemalloc:
+            tracemalloc.start()
+    track_memory = track_memory or inherited
+
+    span = Span(name, parent, track_memory)
+    if track_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        if parent is not None and parent.track_memory:
+            parent.peak_memory = max(parent.peak_memory, peak)
+        span.start_memory = span.peak_memory = current
+        tracemalloc.reset_peak()
+
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(token)
+        span.wall_ms = (time.perf_counter() - span.started) * 1000
+        if track_memory:
+            span.peak_memory = max(span.peak_memory, tracemalloc.get_traced_memory()[1])
+        if owns_tracemalloc:
+            tracemalloc.stop()
+            _memory_lock.release()
+
+        if parent is not None:
+            parent.children.append(span)
+            parent.queries += span.queries
+            parent.rows += span.rows
+            if parent.track_memory:
+                parent.peak_memory = max(parent.peak_memory, span.peak_memory)
+
+        _record(span)
+
+
+def traced(name):
+    """Decorator form of trace()"""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            with trace(name):
+                return f(*args, **kwargs)
+        return decorated
+    return decorator
+
+
+@contextmanager
+def count_queries():
+    """Count the queries issued inside the block without recording a span.
+
+    Yields the Span; read `span.queries` and `span.statements` (the SQL of
+    each query) after the block. Queries counted here still count towards
+    any enclosing trace.
+    """
+    parent = _current_span.get()
+    span = Span('count_queries', parent, False)
+    span.statements = []
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(token)
+        if parent is not None:
+            parent.queries += span.queries
+            parent.rows += span.rows
+
+
+@contextmanager
+def assert_query_count(expected):
+    """Fail when the block issues a different number of queries.
+
+    Used to check that an endpoint's query count does not grow with the
+    number of rows it returns, e.g. around a test client request:
+
+        with assert_query_count(4):
+            client.get('/api/admin/complaints?limit=100', headers=headers)
+    """
+    with count_queries() as span:
+        yield span
+    if span.queries != expected:
+        raise AssertionError(f'Expected {expected} queries, {span.queries} were issued')
+
+
+def _selected_columns(statement):
+    """The select list of a SELECT statement, lower-cased"""
+    statement = statement.lstrip().lower()
+    if not statement.startswith('select'):
+        return ''
+    return statement.split(' from ', 1)[0]
+
+
+@contextmanager
+def assert_columns_not_selected(*columns):
+    """Fail when a query in the block selects any of the given columns.
+
+    Meant for large text columns, e.g. that list and aggregate paths never
+    fetch complaint descriptions:
+
+        with assert_columns_not_selected(Complaint.description):
+            client.get('/api/admin/complaints', headers=headers)
+
+    Columns only used in WHERE or ORDER BY clauses are not reported.
+    """
+    patterns = [
+        re.compile(rf'{re.escape(column.table.name.lower())}(_\d+)?\W*\.\W*{re.escape(column.name.lower())}\b')
+        for column in (attribute.property.columns[0] for attribute in columns)
+    ]
+    with count_queries() as span:
+        yield span
+    for statement in span.statements:
+        selected = _selected_columns(statement)
+        for column, pattern in zip(columns, patterns):
+            if pattern.search(selected):
+                raise AssertionError(f'{column} was selected by: {statement}')
+
+
+def _record(span):
+    """Emit a structured log event and fold the span into the aggregate stats"""
+    event_data = {
+        'event': 'trace.span',
+        'name': span.name,
+        'parent': span.parent.name if span.parent else None,
+        'wall_ms': round(span.wall_ms, 2),
+        'queries': span.queries,
+        'rows': span.rows
+    }
+    if span.track_memory:
+        event_data['peak_memory_kb'] = round((span.peak_memory - span.start_memory) / 1024, 1)
+    logger.info(json.dumps(event_data))
+
+    with _stats_lock:
+        stats = _stats.setdefault(span.name, {
+            'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'queries': 0, 'rows': 0
+        })
+        stats['calls'] += 1
+        stats['total_ms'] += span.wall_ms
+        stats['max_ms'] = max(stats['max_ms'], span.wall_ms)
+        stats['queries'] += span.queries
+        stats['rows'] += span.rows
+
+
+def timing_summary():
+    """Aggregated timings for every span name seen by this process"""
+    with _stats_lock:
+        return {
+            name: {
+                'calls': s['calls'],
+                'avg_ms': round(s['total_ms'] / s['calls'], 2),
+                'max_ms': round(s['max_ms'], 2),
+                'total_ms': round(s['total_ms'], 2),
+                'avg_queries': round(s['queries'] / s['calls'], 1),
+                'avg_rows': round(s['rows'] / s['calls'], 1)
+            }
+            for name, s in _stats.items()
+        }
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    span = _current_span.get()
+    if span is not None:
+        span.queries += 1
+    # Statements are kept for count_queries() blocks, however deeply nested
+    while span is not None:
+        if span.statements is not None:
+            span.statements.append(statement)
+        span = span.parent
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _count_rows(orm_execute_state):
+    span = _current_span.get()
+    if span is None or not orm_execute_state.is_select:
+        return None
+    # Streamed results (yield_per) are left alone: buffering them would
+    # defeat the streaming and inflate the memory peaks being measured, so
+    # their rows are not counted
+    options = orm_execute_state.execution_options
+    if options.get('yield_per') or options.get('stream_results'):
+        return None
+    # Buffer the result so its rows can be counted, then hand back an
+    # equivalent result object to the caller
+    frozen = orm_execute_state.invoke_statement().freeze()
+    span.rows += len(frozen.data)
+    return frozen()
@@ -1,9 +1,13 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.dialects import mssql
+from passwords import password_hasher
 
 db = SQLAlchemy()
 
+# Large text columns are deferred in group 'text': queries leave them out and
+# they load together on first access, or up front with undefer_group('text').
+
 class District(db.Model):
     __tablename__ = 'Districts'
     
@@ -74,14 +78,20 @@ class Citizen(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
     
+    # Keyset pagination of the user list, optionally by role
+    __table_args__ = (
+        db.Index('ix_Citizens_created', 'created_at'),
+        db.Index('ix_Citizens_role_created', 'role_id', 'created_at'),
+    )
+    
     district = db.relationship('District', foreign_keys=[district_id], backref='citizens')
     role = db.relationship('UserRole', backref='users')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
     
     def to_dict(self):
         return {
@@ -114,6 +124,12 @@ class Policy(db.Model):
     deadline = db.Column(db.DateTime)
     published_at = db.Column(db.DateTime)
     
+    # Keyset pagination of the policy list, optionally by status
+    __table_args__ = (
+        db.Index('ix_Policies_created', 'created_at'),
+        db.Index('ix_Policies_status_created', 'status', 'created_at'),
+    )
+    
     ministry = db.relationship('Ministry', backref='policies')
     creator = db.relationship('Citizen', backref='created_policies')
     
@@ -138,7 +154,7 @@ class PolicyFeedback(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     policy_id = db.Column(db.Integer, db.ForeignKey('Policies.id'))
     citizen_id = db.Column(db.Integer, db.ForeignKey('Citizens.id'))
-    feedback_text = db.Column(db.Text)
+    feedback_text = db.deferred(db.Column(db.Text), group='text')
     sentiment = db.Column(db.String(20))
     themes = db.Column(db.Text)
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -166,7 +182,7 @@ class Complaint(db.Model):
     ministry_id = db.Column(db.Integer, db.ForeignKey('Ministries.id'))
     district_id = db.Column(db.Integer, db.ForeignKey('Districts.id'))
     category = db.Column(db.String(100))
-    description = db.Column(db.Text)
+    description = db.deferred(db.Column(db.Text), group='text')
     location = db.Column(db.String(200))
     priority = db.Column(db.String(20))
     status = db.Column(db.String(50), default='Pending')
@@ -174,7 +190,24 @@ class Complaint(db.Model):
     assigned_to = db.Column(db.Integer, db.ForeignKey('Citizens.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     resolved_at = db.Column(db.DateTime)
-    resolution_notes = db.Column(db.Text)
+    resolution_notes = db.deferred(db.Column(db.Text), group='text')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    # Analytics filters are an equality on one dimension plus a created_at
+    # range; the included columns let the aggregates run from the index alone
+    __table_args__ = (
+        db.Index('ix_Complaints_district_created', 'district_id', 'created_at',
+                 mssql_include=['ministry_id', 'category', 'status', 'priority', 'resolved_at']),
+        db.Index('ix_Complaints_ministry_created', 'ministry_id', 'created_at',
+                 mssql_include=['district_id', 'category', 'status', 'priority', 'resolved_at']),
+        db.Index('ix_Complaints_status_created', 'status', 'created_at',
+                 mssql_include=['ministry_id', 'district_id', 'category', 'priority', 'resolved_at']),
+        db.Index('ix_Complaints_priority_created', 'priority', 'created_at',
+                 mssql_include=['ministry_id', 'district_id', 'category', 'status', 'resolved_at']),
+        db.Index('ix_Complaints_created', 'created_at'),
+        # Keyset pagination of a citizen's complaints, newest first
+        db.Index('ix_Complaints_citizen_created', 'citizen_id', 'created_at'),
+    )
     
     citizen = db.relationship('Citizen', foreign_keys=[citizen_id], backref='complaints')
     ministry = db.relationship('Ministry', backref='complaints')
@@ -214,6 +247,11 @@ class ServiceRating(db.Model):
     comment = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_ServiceRatings_district_created', 'district_id', 'created_at',
+                 mssql_include=['service_type', 'rating']),
+    )
+    
     citizen = db.relationship('Citizen', backref='ratings')
     district = db.relationship('District', backref='ratings')
     
@@ -235,7 +273,7 @@ class EmailLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     recipient_email = db.Column(db.String(100))
     subject = db.Column(db.String(500))
-    body = db.Column(db.Text)
+    body = db.deferred(db.Column(db.Text), group='text')
     status = db.Column(db.String(50))
     sent_at = db.Column(db.DateTime, default=datetime.utcnow)
     error_message = db.Column(db.Text)
@@ -245,7 +283,7 @@ class AIPrediction(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     prediction_type = db.Column(db.String(100))
-    prediction_data = db.Column(db.Text)
+    prediction_data = db.deferred(db.Column(db.Text), group='text')
     confidence_score = db.Column(db.Float)
     generated_at = db.Column(db.DateTime, default=datetime.utcnow)
     valid_until = db.Column(db.DateTime)
@@ -266,10 +304,14 @@ class SystemReport(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     report_title = db.Column(db.String(500))
     report_type = db.Column(db.String(100))
-    report_data = db.Column(db.Text)
+    report_data = db.deferred(db.Column(db.Text), group='text')
     generated_by = db.Column(db.Integer, db.ForeignKey('Citizens.id'))
     generated_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_SystemReports_generated', 'generated_at'),
+    )
+    
     generator = db.relationship('Citizen', backref='reports')
     
     def to_dict(self):
@@ -307,3 +349,108 @@ class USSDSession(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+class ComplaintDailyRollup(db.Model):
+    __tablename__ = 'ComplaintDailyRollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    ministry_id = db.Column(db.Integer, db.ForeignKey('Ministries.id'))
+    district_id = db.Column(db.Integer, db.ForeignKey('Districts.id'))
+    category = db.Column(db.String(100))
+    status = db.Column(db.String(50))
+    priority = db.Column(db.String(20))
+    complaint_count = db.Column(db.Integer, nullable=False, default=0)
+    resolved_count = db.Column(db.Integer, nullable=False, default=0)
+    resolution_days_sum = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('day', 'ministry_id', 'district_id', 'category', 'status', 'priority',
+                            name='uq_complaint_rollup_bucket'),
+        db.Index('ix_ComplaintDailyRollups_district_day', 'district_id', 'day'),
+        db.Index('ix_ComplaintDailyRollups_ministry_day', 'ministry_id', 'day'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'day': self.day.isoformat() if self.day else None,
+            'ministry_id': self.ministry_id,
+            'district_id': self.district_id,
+            'category': self.category,
+            'status': self.status,
+            'priority': self.priority,
+            'complaint_count': self.complaint_count,
+            'resolved_count': self.resolved_count,
+            'resolution_days_sum': self.resolution_days_sum
+        }
+
+class ComplaintKeywordCount(db.Model):
+    __tablename__ = 'ComplaintKeywordCounts'
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    term = db.Column(db.String(100), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('day', 'term', name='uq_complaint_keyword_day_term'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'day': self.day.isoformat() if self.day else None,
+            'term': self.term,
+            'count': self.count
+        }
+
+class EngagementSketch(db.Model):
+    __tablename__ = 'EngagementSketches'
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    channel = db.Column(db.String(20), nullable=False)
+    registers = db.Column(db.LargeBinary, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('day', 'channel', name='uq_engagement_sketch_day_channel'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'day': self.day.isoformat() if self.day else None,
+            'channel': self.channel
+        }
+
+class TokenRevocation(db.Model):
+    __tablename__ = 'TokenRevocations'
+
+    # Tokens of the citizen issued up to revoked_at are no longer accepted
+    # in stateless auth mode; rows older than the token lifetime are pruned
+    id = db.Column(db.Integer, primary_key=True)
+    citizen_id = db.Column(db.Integer, db.ForeignKey('Citizens.id'), nullable=False)
+    # DATETIME2 on SQL Server: DATETIME rounds to 1/300 s, which could move
+    # a revocation before a token it should cover
+    revoked_at = db.Column(db.DateTime().with_variant(mssql.DATETIME2(), 'mssql'),
+                           nullable=False, default=datetime.utcnow, index=True)
+
+class ComplaintSearchTerm(db.Model):
+    __tablename__ = 'ComplaintSearchTerms'
+
+    # Clustered on (term, complaint_id) so a term's postings, with their
+    # frequencies, are read with one range seek
+    term = db.Column(db.String(100), primary_key=True)
+    complaint_id = db.Column(db.Integer, db.ForeignKey('Complaints.id'), primary_key=True)
+    frequency = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_ComplaintSearchTerms_complaint', 'complaint_id'),
+    )
+
+class ComplaintSearchDocument(db.Model):
+    __tablename__ = 'ComplaintSearchDocuments'
+
+    complaint_id = db.Column(db.Integer, db.ForeignKey('Complaints.id'), primary_key=True)
+    length = db.Column(db.Integer, nullable=False)
@@ -0,0 +1,132 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import request
+from sqlalchemy import and_, or_, select, func, text
+
+from config import Config
+from models import db
+from serializers import FieldsError, json_response
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(created_at, row_id):
+    raw = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise CursorError('Invalid cursor')
+
+
+def page_limit(args):
+    value = args.get('limit')
+    if value is None:
+        return Config.PAGINATION_DEFAULT_LIMIT
+    if not value.isdigit() or int(value) < 1:
+        raise CursorError('limit must be a positive integer')
+    return min(int(value), Config.PAGINATION_MAX_LIMIT)
+
+
+def _after(created_column, id_column, cursor):
+    """Rows after the cursor in (created_at DESC, id DESC) order.
+
+    Spelled out as an OR rather than a row-value comparison, which SQL Server
+    does not support; both branches seek on a (..., created_at, id) index.
+    """
+    created_at, row_id = decode_cursor(cursor)
+    if created_at is None:
+        return and_(created_column.is_(None), id_column < row_id)
+    return or_(
+        created_column < created_at,
+        and_(created_column == created_at, id_column < row_id),
+        created_column.is_(None)
+    )
+
+
+def set_next_cursor(response, cursor):
+    """Point a list response at its next page"""
+    args = request.args.to_dict()
+    args['cursor'] = cursor
+    response.headers['X-Next-Cursor'] = cursor
+    response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+
+
+def estimate_count(query, model, filtered):
+    """Total rows, estimated so it never costs a full scan.
+
+    An unfiltered SQL Server table is answered from the partition row counts
+    the engine maintains. Otherwise rows are counted up to
+    PAGINATION_COUNT_CAP and a capped result is reported as e.g. '10000+'.
+    """
+    if not filtered and db.engine.dialect.name == 'mssql':
+        estimate = db.session.execute(text(
+            "SELECT SUM(row_count) FROM sys.dm_db_partition_stats "
+            "WHERE object_id = OBJECT_ID(:table) AND index_id IN (0, 1)"
+        ), {'table': model.__tablename__}).scalar()
+        if estimate is not None:
+            return str(estimate)
+
+    cap = Config.PAGINATION_COUNT_CAP
+    capped = query.order_by(None).with_entities(model.id).limit(cap + 1).subquery()
+    count = db.session.execute(select(func.count()).select_from(capped)).scalar()
+    return f'{cap}+' if count > cap else str(count)
+
+
+def paginated_response(query, projection, filtered=False):
+    """List response ordered newest first, paginated by keyset.
+
+    Rows are selected through `projection` (see serializers), so only the
+    requested `fields` (and deferred fields named in `include`) are read.
+    Paging is opt-in so existing clients keep receiving the full list: pass
+    `limit` (at most PAGINATION_MAX_LIMIT) and/or `cursor` to get one page,
+    with the cursor of the next page in the X-Next-Cursor header (and a
+    Link rel="next"). `count=estimate` adds X-Total-Count with an estimated
+    total. The body stays a JSON array.
+    """
+    model = projection.model
+    created_column = projection.order_column
+    id_column = model.id
+
+    try:
+        names = projection.parse_fields(request.args.get('fields'), request.args.get('include'))
+        ordered = projection.select(query, names).order_by(created_column.desc(), id_column.desc())
+        paged = 'limit' in request.args or 'cursor' in request.args
+        if paged:
+            limit = page_limit(request.args)
+            cursor = request.args.get('cursor')
+            if cursor:
+                ordered = ordered.filter(_after(created_column, id_column, cursor))
+    except (CursorError, FieldsError) as e:
+        return json_response({'error': str(e)}, 400)
+
+    serialize = projection.serializer(names)
+
+    if not paged:
+        return json_response([serialize(row) for row in ordered.all()])
+
+    # One extra row tells whether there is a next page
+    rows = ordered.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    response = json_response([serialize(row) for row in rows])
+    if has_more:
+        last = rows[-1]._mapping
+        set_next_cursor(response, encode_cursor(last[created_column.key], last['id']))
+
+    if request.args.get('count') == 'estimate':
+        response.headers['X-Total-Count'] = estimate_count(query, model, filtered)
+
+    return response
@@ -0,0 +1,144 @@
+"""
+Password hashing on a bounded worker pool.
+
+Hashing is deliberately slow (tens of milliseconds of CPU per login), so
+request threads hand it to a small pool of PASSWORD_HASH_WORKERS threads
+instead of running it inline; hashlib releases the GIL while it hashes, so
+the pool uses every core it is given. At most PASSWORD_HASH_QUEUE_SIZE
+hashes wait for a worker: beyond that, and for callers that would wait
+longer than PASSWORD_HASH_TIMEOUT seconds, HashingOverloaded is raised and
+the request is shed with a 503 instead of piling up behind the pool.
+
+Hashes are written with PASSWORD_HASH_METHOD. Stored hashes made with any
+other method or cost report needs_rehash() and are replaced on the user's
+next successful login.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from config import Config
+
+
+class HashingOverloaded(Exception):
+    """The hashing pool is saturated; the request should be retried later"""
+
+
+class PasswordHasher:
+    def __init__(self):
+        self._executor = None
+        self._method_prefix = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.shed = 0
+        self.timed_out = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    @property
+    def workers(self):
+        return Config.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+    def _get_executor(self):
+        # Created on first use so a forking server starts it in each worker
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='password-hash'
+                )
+            return self._executor
+
+    def _run(self, function, args, submitted):
+        started = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return function(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.wait_seconds += started - submitted
+                self.hash_seconds += finished - started
+
+    def _enqueue(self, function, *args):
+        executor = self._get_executor()
+        with self._lock:
+            if self.queued >= Config.PASSWORD_HASH_QUEUE_SIZE:
+                self.shed += 1
+                raise HashingOverloaded()
+            self.queued += 1
+        return executor.submit(self._run, function, args, time.perf_counter())
+
+    def _wait(self, future):
+        try:
+            return future.result(timeout=Config.PASSWORD_HASH_TIMEOUT)
+        except FutureTimeout:
+            if future.cancel():
+                with self._lock:
+                    self.queued -= 1
+            with self._lock:
+                self.timed_out += 1
+            raise HashingOverloaded()
+
+    def _submit(self, function, *args):
+        return self._wait(self._enqueue(function, *args))
+
+    def hash(self, password):
+        """Hash a password with the configured method, on the pool"""
+        return self._submit(generate_password_hash, password, Config.PASSWORD_HASH_METHOD)
+
+    def hash_many(self, passwords):
+        """Hash a batch of passwords on the pool, e.g. for an import. At
+        most half the workers hash the batch at once, so sign-ins keep the
+        others."""
+        window = max(1, self.workers // 2)
+        hashes = []
+        for start in range(0, len(passwords), window):
+            futures = [
+                self._enqueue(generate_password_hash, password, Config.PASSWORD_HASH_METHOD)
+                for password in passwords[start:start + window]
+            ]
+            hashes.extend(self._wait(future) for future in futures)
+        return hashes
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash, on the pool"""
+        return self._submit(check_password_hash, password_hash, password)
+
+    def method_prefix(self):
+        """Method and cost as werkzeug writes them at the start of a hash,
+        e.g. "scrypt:32768:8:1" for a configured "scrypt" """
+        if self._method_prefix is None:
+            self._method_prefix = generate_password_hash('', Config.PASSWORD_HASH_METHOD).split('$', 1)[0]
+        return self._method_prefix
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash was made with another method or cost"""
+        return password_hash.split('$', 1)[0] != self.method_prefix()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'method': Config.PASSWORD_HASH_METHOD,
+                'workers': self.workers,
+                'queue_size': Config.PASSWORD_HASH_QUEUE_SIZE,
+                'queued': self.queued,
+                'running': self.running,
+                'completed': self.completed,
+                'shed': self.shed,
+                'timed_out': self.timed_out,
+                'avg_wait_ms': round(self.wait_seconds * 1000 / self.completed, 2) if self.completed else None,
+                'avg_hash_ms': round(self.hash_seconds * 1000 / self.completed, 2) if self.completed else None
+            }
+
+
+password_hasher = PasswordHasher()
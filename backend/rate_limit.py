@@ -0,0 +1,227 @@
+"""
+Per-client rate limits for the public endpoints (USSD, registration, login,
+complaint tracking and submission).
+
+Limits are sliding-window counters: each key keeps its count for the
+current fixed window and the previous one, and the previous count is
+weighted by how much of it still overlaps the sliding window. That is
+accurate to within a few percent of a true sliding log at constant memory
+per key. Keys are spread over lock-sharded dicts, so concurrent requests
+rarely contend, and the check runs before the view, ahead of any database
+work: a rejected request costs a dict lookup and a 429. Each shard holds at
+most its share of RATE_LIMIT_MAX_KEYS keys in least-recently-used order, so
+a flood of new keys (spoofed phone numbers, random NINs) evicts the idlest
+counters instead of growing memory.
+
+Each rule is configured as "<count>/<second|minute|hour|day>" in a
+RATE_LIMIT_<NAME> setting (empty to disable it). Counters are kept in this
+process by default; a multi-process deployment can share them by setting
+RATE_LIMIT_BACKEND to "package.module:Class" naming a RateLimitBackend.
+"""
+
+import importlib
+import math
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, jsonify
+
+from config import Config
+from auth import decode_token
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_limit(value):
+    """(count, window seconds) for "30/minute", or None when empty"""
+    if not value:
+        return None
+    count, _, period = value.partition('/')
+    period = period.strip().lower().rstrip('s')
+    if period not in PERIODS:
+        raise ValueError(f'Invalid rate limit: {value!r}')
+    return int(count), PERIODS[period]
+
+
+class RateLimitBackend(ABC):
+    """Where counters are kept. hit() counts one request for `key` and
+    returns (allowed, seconds until the next request would be allowed)."""
+
+    @abstractmethod
+    def hit(self, key, limit, window):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class MemoryBackend(RateLimitBackend):
+    """Sliding-window counters in this process, in `shards` locked LRU
+    dicts of at most max_keys // shards keys each"""
+
+    def __init__(self, shards=64, max_keys=100000):
+        self.shards = [(OrderedDict(), threading.Lock()) for _ in range(shards)]
+        self.max_keys_per_shard = max(1, max_keys // shards)
+        self.evicted = 0
+
+    def _shard(self, key):
+        return self.shards[zlib.crc32(key.encode()) % len(self.shards)]
+
+    def hit(self, key, limit, window):
+        now = time.time()
+        index, offset = divmod(now, window)
+        index = int(index)
+        entries, lock = self._shard(key)
+
+        with lock:
+            # [window length, window index, current count, previous count]
+            entry = entries.get(key)
+            if entry is None:
+                if len(entries) >= self.max_keys_per_shard:
+                    self._evict(entries, now)
+                entry = entries[key] = [window, index, 0, 0]
+            else:
+                entries.move_to_end(key)
+                if entry[1] != index:
+                    entry[3] = entry[2] if entry[1] == index - 1 else 0
+                    entry[1] = index
+                    entry[2] = 0
+
+            current, previous = entry[2], entry[3]
+            overlap = 1 - offset / window
+            if current + previous * overlap + 1 <= limit:
+                entry[2] = current + 1
+                return True, 0
+
+        # Time until the previous window's weight has decayed enough, or
+        # until this window ends when it is full on its own
+        if current + 1 > limit or not previous:
+            return False, window - offset
+        allowed_overlap = (limit - current - 1) / previous
+        return False, (overlap - allowed_overlap) * window
+
+    def _evict(self, entries, now):
+        """Make room in a full shard: drop the least recently used keys that
+        have been idle for more than a window, or else the least recently
+        used one. Each key is dropped once, so this is O(1) amortized."""
+        while entries:
+            window, index, _, _ = next(iter(entries.values()))
+            if index >= int(now // window) - 1:
+                break
+            entries.popitem(last=False)
+        if len(entries) >= self.max_keys_per_shard:
+            entries.popitem(last=False)
+            self.evicted += 1
+
+    def stats(self):
+        return {
+            'keys': sum(len(entries) for entries, _ in self.shards),
+            'max_keys': self.max_keys_per_shard * len(self.shards),
+            'evicted': self.evicted
+        }
+
+
+def _load_backend(name):
+    if name == 'memory':
+        return MemoryBackend(Config.RATE_LIMIT_SHARDS, Config.RATE_LIMIT_MAX_KEYS)
+    module, _, cls = name.partition(':')
+    backend = getattr(importlib.import_module(module), cls)
+    if not issubclass(backend, RateLimitBackend):
+        raise TypeError(f'RATE_LIMIT_BACKEND {name} is not a RateLimitBackend')
+    return backend()
+
+
+class RateLimiter:
+    def __init__(self):
+        self._backend = None
+        self._limits = {}
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = {}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = _load_backend(Config.RATE_LIMIT_BACKEND)
+        return self._backend
+
+    def set_backend(self, backend):
+        self._backend = backend
+
+    def limit(self, rule):
+        value = getattr(Config, f'RATE_LIMIT_{rule.upper()}')
+        if value not in self._limits:
+            self._limits[value] = parse_limit(value)
+        return self._limits[value]
+
+    def check(self, rule, key):
+        """(allowed, retry after seconds) for one request by `key` under `rule`"""
+        limit = self.limit(rule)
+        if limit is None:
+            return True, 0
+        allowed, retry_after = self.backend.hit(f'{rule}:{key}', *limit)
+        if allowed:
+            self.allowed += 1
+        else:
+            self.rejected[rule] = self.rejected.get(rule, 0) + 1
+        return allowed, retry_after
+
+    def stats(self):
+        return {
+            'enabled': Config.RATE_LIMIT_ENABLED,
+            'backend': type(self.backend).__name__,
+            'allowed': self.allowed,
+            'rejected': dict(self.rejected),
+            **self.backend.stats()
+        }
+
+
+rate_limiter = RateLimiter()
+
+
+def client_ip():
+    """Address of the client. Behind a reverse proxy, the app must be wrapped
+    in werkzeug's ProxyFix for this to be the real client."""
+    return request.remote_addr
+
+
+def json_field(name):
+    """Key function reading a field of the JSON body, e.g. a phone number"""
+    def key():
+        data = request.get_json(silent=True)
+        value = data.get(name) if isinstance(data, dict) else None
+        return str(value) if value not in (None, '') else None
+    return key
+
+
+def citizen_id():
+    """Citizen id from the bearer token; the signature is checked but the
+    user is not read"""
+    auth_header = request.headers.get('Authorization', '')
+    payload = decode_token(auth_header[7:]) if auth_header.startswith('Bearer ') else None
+    return payload['citizen_id'] if payload else None
+
+
+def rate_limit(rule, key):
+    """Reject requests over the RATE_LIMIT_<RULE> limit for the key returned
+    by `key()` with a 429. Requests without a key are not limited by it."""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if Config.RATE_LIMIT_ENABLED:
+                value = key()
+                if value is not None:
+                    allowed, retry_after = rate_limiter.check(rule, value)
+                    if not allowed:
+                        response = jsonify({'error': 'Too many requests, please retry later'})
+                        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                        return response, 429
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
@@ -0,0 +1,371 @@
+from models import db, Complaint, District, ComplaintDailyRollup, ComplaintKeywordCount
+from config import Config
+from ai.nlp_analyzer import NLPAnalyzer
+from sqlalchemy import func, case, cast, text, insert, select, update, bindparam
+from sqlalchemy.exc import IntegrityError
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+# Columns that make up one rollup bucket, besides the day
+BUCKET_DIMENSIONS = ('ministry_id', 'district_id', 'category', 'status', 'priority')
+ROLLUP_KEY = ('day',) + BUCKET_DIMENSIONS
+
+# Rows per statement when writing keyword counts and rollup buckets; keeps IN
+# lists and executemany batches well under SQL Server's 2100 parameter limit
+KEYWORD_BATCH_SIZE = 500
+
+# Longer keywords do not fit the term column and are not counted
+KEYWORD_TERM_LENGTH = ComplaintKeywordCount.__table__.c.term.type.length
+
+def rollup_snapshot(complaint):
+    """Capture the rollup-relevant fields of a complaint before it is modified"""
+    snapshot = {name: getattr(complaint, name) for name in BUCKET_DIMENSIONS}
+    snapshot['created_at'] = complaint.created_at
+    snapshot['resolved_at'] = complaint.resolved_at
+    return snapshot
+
+def _contribution(snapshot):
+    """Bucket key and counter values a complaint contributes to the rollup"""
+    key = {name: snapshot[name] for name in BUCKET_DIMENSIONS}
+    key['day'] = snapshot['created_at'].date()
+
+    resolved_at = snapshot['resolved_at']
+    if resolved_at is not None:
+        # Same day-boundary semantics as DATEDIFF(day, created_at, resolved_at)
+        return key, 1, (resolved_at.date() - snapshot['created_at'].date()).days
+    return key, 0, 0
+
+def _apply_delta(key, count, resolved, resolution_days):
+    """Add the given deltas to one bucket, creating the bucket if needed"""
+    values = {
+        ComplaintDailyRollup.complaint_count: ComplaintDailyRollup.complaint_count + count,
+        ComplaintDailyRollup.resolved_count: ComplaintDailyRollup.resolved_count + resolved,
+        ComplaintDailyRollup.resolution_days_sum: ComplaintDailyRollup.resolution_days_sum + resolution_days
+    }
+
+    updated = ComplaintDailyRollup.query.filter_by(**key).update(values, synchronize_session=False)
+    if updated:
+        return
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(ComplaintDailyRollup(
+                complaint_count=count,
+                resolved_count=resolved,
+                resolution_days_sum=resolution_days,
+                **key
+            ))
+    except IntegrityError:
+        # A concurrent transaction created the bucket first
+        ComplaintDailyRollup.query.filter_by(**key).update(values, synchronize_session=False)
+
+def record_complaint_created(complaint):
+    """Count a newly inserted complaint. Call after flush, before commit."""
+    key, resolved, resolution_days = _contribution(rollup_snapshot(complaint))
+    _apply_delta(key, 1, resolved, resolution_days)
+    
+    if complaint.description:
+        add_keyword_counts(complaint_keyword_counts(complaint.created_at, complaint.description))
+
+def record_complaint_changed(complaint, previous):
+    """Move a complaint between buckets after its status or assignment changed.
+
+    `previous` is the rollup_snapshot() taken before the change.
+    """
+    current = rollup_snapshot(complaint)
+    if current == previous:
+        return
+
+    old_key, old_resolved, old_days = _contribution(previous)
+    new_key, new_resolved, new_days = _contribution(current)
+    _apply_delta(old_key, -1, -old_resolved, -old_days)
+    _apply_delta(new_key, 1, new_resolved, new_days)
+
+def _add_contribution(deltas, snapshot, sign):
+    key, resolved, resolution_days = _contribution(snapshot)
+    delta = deltas[tuple(key[name] for name in ROLLUP_KEY)]
+    delta[0] += sign
+    delta[1] += sign * resolved
+    delta[2] += sign * resolution_days
+
+def _apply_deltas(deltas):
+    """Add {bucket key: [count, resolved, resolution_days]} to the rollup.
+
+    Existing buckets are found with one query per batch of days and
+    incremented with a single executemany UPDATE; missing buckets are
+    inserted in bulk. Each bucket is written once however many complaints
+    it holds.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+
+    table = ComplaintDailyRollup.__table__
+    days = sorted({key[0] for key in deltas})
+    existing = {}
+    for start in range(0, len(days), KEYWORD_BATCH_SIZE):
+        rows = db.session.execute(
+            select(table.c.id, *(table.c[name] for name in ROLLUP_KEY))
+            .where(table.c.day.in_(days[start:start + KEYWORD_BATCH_SIZE]))
+        )
+        existing.update((tuple(row[1:]), row[0]) for row in rows)
+
+    updates = [
+        {'b_id': existing[key], 'b_count': count, 'b_resolved': resolved, 'b_days': resolution_days}
+        for key, (count, resolved, resolution_days) in deltas.items() if key in existing
+    ]
+    inserts = [
+        dict(zip(ROLLUP_KEY, key), complaint_count=count, resolved_count=resolved,
+             resolution_days_sum=resolution_days)
+        for key, (count, resolved, resolution_days) in deltas.items() if key not in existing
+    ]
+
+    if updates:
+        db.session.execute(
+            update(table).where(table.c.id == bindparam('b_id')).values(
+                complaint_count=table.c.complaint_count + bindparam('b_count'),
+                resolved_count=table.c.resolved_count + bindparam('b_resolved'),
+                resolution_days_sum=table.c.resolution_days_sum + bindparam('b_days')
+            ),
+            updates
+        )
+    if inserts:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(table), inserts)
+        except IntegrityError:
+            # A concurrent transaction created some of these buckets first
+            for values in inserts:
+                key = {name: values[name] for name in ROLLUP_KEY}
+                _apply_delta(key, values['complaint_count'], values['resolved_count'],
+                             values['resolution_days_sum'])
+
+def record_complaints_changed(changes):
+    """Move many complaints between buckets at once.
+
+    `changes` is an iterable of (previous, current) rollup snapshots.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for previous, current in changes:
+        if current != previous:
+            _add_contribution(deltas, previous, -1)
+            _add_contribution(deltas, current, 1)
+    _apply_deltas(deltas)
+
+def record_complaints_created(complaints):
+    """Count many newly inserted complaints, given as dicts of column values"""
+    deltas = defaultdict(lambda: [0, 0, 0])
+    keywords = Counter()
+    for complaint in complaints:
+        _add_contribution(deltas, complaint, 1)
+        if complaint.get('description'):
+            keywords.update(complaint_keyword_counts(complaint['created_at'], complaint['description']))
+
+    _apply_deltas(deltas)
+    if keywords:
+        add_keyword_counts(keywords)
+
+def rebuild_rollups():
+    """Recompute the whole rollup table from Complaints in one transaction"""
+    day = cast(Complaint.created_at, db.Date)
+
+    source = select(
+        day,
+        Complaint.ministry_id,
+        Complaint.district_id,
+        Complaint.category,
+        Complaint.status,
+        Complaint.priority,
+        func.count(Complaint.id),
+        func.count(Complaint.resolved_at),
+        func.coalesce(func.sum(
+            case(
+                (Complaint.resolved_at.isnot(None),
+                 func.datediff(text("day"), Complaint.created_at, Complaint.resolved_at)),
+                else_=0
+            )
+        ), 0)
+    ).where(
+        Complaint.created_at.isnot(None)
+    ).group_by(
+        day,
+        Complaint.ministry_id,
+        Complaint.district_id,
+        Complaint.category,
+        Complaint.status,
+        Complaint.priority
+    )
+
+    try:
+        ComplaintDailyRollup.query.delete(synchronize_session=False)
+        result = db.session.execute(
+            insert(ComplaintDailyRollup).from_select(
+                ['day', 'ministry_id', 'district_id', 'category', 'status', 'priority',
+                 'complaint_count', 'resolved_count', 'resolution_days_sum'],
+                source
+            )
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return result.rowcount
+
+def complaint_keyword_counts(created_at, description):
+    """Keyword occurrences of one complaint, keyed by (day, term)"""
+    day = created_at.date()
+    return Counter(
+        (day, term) for term in NLPAnalyzer.extract_keywords(description)
+        if len(term) <= KEYWORD_TERM_LENGTH
+    )
+
+def add_keyword_counts(counts):
+    """Add {(day, term): n} to the keyword table with set-based statements"""
+    table = ComplaintKeywordCount.__table__
+    increment = update(table).where(
+        table.c.day == bindparam('b_day'),
+        table.c.term == bindparam('b_term')
+    ).values(count=table.c.count + bindparam('b_count'))
+
+    items = list(counts.items())
+    for start in range(0, len(items), KEYWORD_BATCH_SIZE):
+        batch = dict(items[start:start + KEYWORD_BATCH_SIZE])
+        try:
+            with db.session.begin_nested():
+                _write_keyword_batch(table, increment, batch)
+        except IntegrityError:
+            # A concurrent transaction inserted some of these terms first
+            _write_keyword_batch(table, increment, batch)
+
+def _write_keyword_batch(table, increment, batch):
+    # Days and terms are matched separately, which may return a few extra
+    # rows; only exact (day, term) pairs of the batch are kept
+    days = list({day for day, _ in batch})
+    terms = list({term for _, term in batch})
+    existing = {
+        (day, term) for day, term in db.session.execute(
+            select(table.c.day, table.c.term).where(table.c.day.in_(days), table.c.term.in_(terms))
+        )
+    } & batch.keys()
+
+    updates = [
+        {'b_day': day, 'b_term': term, 'b_count': count}
+        for (day, term), count in batch.items() if (day, term) in existing
+    ]
+    inserts = [
+        {'day': day, 'term': term, 'count': count}
+        for (day, term), count in batch.items() if (day, term) not in existing
+    ]
+
+    if updates:
+        db.session.execute(increment, updates)
+    if inserts:
+        db.session.execute(insert(table), inserts)
+
+def rebuild_keyword_counts(chunk_size=5000):
+    """Recompute the keyword table, streaming complaint descriptions in id order"""
+    counts = Counter()
+    last_id = 0
+
+    try:
+        ComplaintKeywordCount.query.delete(synchronize_session=False)
+
+        while True:
+            rows = db.session.query(
+                Complaint.id, Complaint.created_at, Complaint.description
+            ).filter(
+                Complaint.id > last_id
+            ).order_by(
+                Complaint.id
+            ).limit(chunk_size).all()
+
+            if not rows:
+                break
+
+            for row in rows:
+                if row.created_at and row.description:
+                    counts.update(complaint_keyword_counts(row.created_at, row.description))
+            last_id = rows[-1].id
+
+        rows = [{'day': day, 'term': term, 'count': count} for (day, term), count in counts.items()]
+        for start in range(0, len(rows), KEYWORD_BATCH_SIZE):
+            db.session.execute(insert(ComplaintKeywordCount.__table__), rows[start:start + KEYWORD_BATCH_SIZE])
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return len(rows)
+
+class ComplaintSource:
+    """Column accessors over either raw Complaints rows or the daily rollup.
+
+    Analytics queries are written once against this interface. On the rollup,
+    `total` and `count_where` weight each bucket by its complaint_count and
+    time filters work at day granularity.
+    """
+
+    def __init__(self, use_rollup):
+        self.use_rollup = use_rollup
+        self.model = ComplaintDailyRollup if use_rollup else Complaint
+        for name in BUCKET_DIMENSIONS:
+            setattr(self, name, getattr(self.model, name))
+
+        if use_rollup:
+            self.created = ComplaintDailyRollup.day
+            self.weight = ComplaintDailyRollup.complaint_count
+            self.total = func.sum(ComplaintDailyRollup.complaint_count)
+            self.resolved_count = func.sum(ComplaintDailyRollup.resolved_count)
+            self.resolution_days_sum = func.sum(ComplaintDailyRollup.resolution_days_sum)
+        else:
+            self.created = Complaint.created_at
+            self.weight = 1
+            self.total = func.count(Complaint.id)
+            self.resolved_count = func.count(Complaint.resolved_at)
+            self.resolution_days_sum = func.sum(
+                func.datediff(text("day"), Complaint.created_at, Complaint.resolved_at)
+            )
+
+    def count_where(self, condition):
+        return func.sum(case((condition, self.weight), else_=0))
+
+    def since(self, moment):
+        """Predicate for complaints created at or after `moment`"""
+        return self.created >= (moment.date() if self.use_rollup else moment)
+
+    def filter_conditions(self, filters):
+        """Predicates for an analytics filter dict.
+
+        Every predicate compares a bare column with a constant so it can seek
+        on the (dimension, created_at) indexes. Region becomes an IN over the
+        district ids of that region. Dates are inclusive days.
+        """
+        conditions = []
+        for name in ('ministry_id', 'district_id', 'status', 'priority'):
+            if filters.get(name) is not None:
+                conditions.append(getattr(self, name) == filters[name])
+
+        if filters.get('region'):
+            conditions.append(self.district_id.in_(
+                select(District.id).where(District.region == filters['region'])
+            ))
+
+        date_from, date_to = filters.get('date_from'), filters.get('date_to')
+        if self.use_rollup:
+            if date_from:
+                conditions.append(self.created >= date_from)
+            if date_to:
+                conditions.append(self.created <= date_to)
+        else:
+            if date_from:
+                conditions.append(self.created >= datetime.combine(date_from, datetime.min.time()))
+            if date_to:
+                conditions.append(self.created < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+
+        return conditions
+
+def complaint_source():
+    """The complaint source selected by the ANALYTICS_USE_ROLLUP switch"""
+    return ComplaintSource(Config.ANALYTICS_USE_ROLLUP)
@@ -1,6 +1,23 @@
 from flask import Blueprint, request, jsonify
 from models import db, District, Ministry, Citizen, Complaint, SystemReport, AIPrediction
-from auth import admin_required
+from auth import admin_required, principal_cache, invalidate_principal, revoke_tokens, revocations
+from instrumentation import timing_summary
+from cache import response_cache
+from rollups import rollup_snapshot, record_complaint_changed, ComplaintSource
+from events import event_bus, complaint_status_changed
+from warmer import cache_warmer
+from pagination import CursorError, paginated_response, page_limit, set_next_cursor
+from serializers import CITIZEN, COMPLAINT, SYSTEM_REPORT, FieldsError, json_response
+from search import query_terms, rank_complaints, index_complaint, index_complaints
+from ai.similarity import similarity_index
+from passwords import password_hasher
+from rate_limit import rate_limiter
+from ussd_sessions import session_store
+from triage import TriageError, triage_values, bulk_triage
+from config import Config
+from routes.analytics import parse_filters
+from importers import FORMATS, IMPORTERS, import_rows
+import io
 from datetime import datetime
 
 bp = Blueprint('admin', __name__)
@@ -136,8 +153,9 @@ def get_users(current_user):
     if role_filter:
         query = query.filter_by(role_id=int(role_filter))
     
-    users = query.all()
-    return jsonify([u.to_dict() for u in users]), 200
+    return paginated_response(
+        query, CITIZEN, filtered=bool(role_filter)
+    )
 
 @bp.route('/users/<int:id>/role', methods=['PUT'])
 @admin_required
@@ -153,7 +171,9 @@ def update_user_role(current_user, id):
         return jsonify({'error': 'Invalid role_id'}), 400
     
     user.role_id = data['role_id']
+    revoke_tokens(user.id)
     db.session.commit()
+    invalidate_principal(user.id)
     
     return jsonify({
         'message': 'User role updated successfully',
@@ -166,6 +186,7 @@ def assign_complaint(current_user, id):
     """Assign complaint to ministry and update status"""
     complaint = Complaint.query.get_or_404(id)
     data = request.get_json()
+    previous = rollup_snapshot(complaint)
     
     if 'ministry_id' in data:
         ministry = Ministry.query.get(data['ministry_id'])
@@ -182,6 +203,8 @@ def assign_complaint(current_user, id):
             return jsonify({'error': 'Assignee not found'}), 404
         complaint.assigned_to = data['assigned_to']
     
+    record_complaint_changed(complaint, previous)
+    complaint_status_changed(complaint, previous['status'])
     db.session.commit()
     
     return jsonify({
@@ -204,8 +227,119 @@ def get_all_complaints(current_user):
     if status_filter:
         query = query.filter_by(status=status_filter)
     
-    complaints = query.order_by(Complaint.created_at.desc()).all()
-    return jsonify([c.to_dict() for c in complaints]), 200
+    return paginated_response(
+        query, COMPLAINT,
+        filtered=current_user.role_id == 4 or bool(status_filter)
+    )
+
+@bp.route('/complaints/search', methods=['GET'])
+@admin_required
+def search_complaints(current_user):
+    """Search complaint descriptions, locations and resolution notes.
+
+    Results are ranked best first by BM25 and carry their `score`. Filter
+    with `status`, `district_id` and `ministry_id`; chairpersons only see
+    their district. Pages with `limit` and `cursor` like the other lists,
+    up to SEARCH_MAX_RESULTS deep; `fields`/`include` select the fields.
+    """
+    terms = query_terms(request.args.get('q'))
+    if not terms:
+        return jsonify({'error': 'q must contain at least one search term'}), 400
+    
+    conditions = []
+    if request.args.get('status'):
+        conditions.append(Complaint.status == request.args['status'])
+    for name in ('district_id', 'ministry_id'):
+        value = request.args.get(name)
+        if value:
+            if not value.isdigit():
+                return jsonify({'error': f'{name} must be a numeric id'}), 400
+            conditions.append(getattr(Complaint, name) == int(value))
+    if current_user.role_id == 4:  # Chairperson
+        conditions.append(Complaint.district_id == current_user.district_id)
+    
+    try:
+        names = COMPLAINT.parse_fields(request.args.get('fields'), request.args.get('include'))
+        limit = page_limit(request.args)
+        cursor = request.args.get('cursor', '0')
+        if not cursor.isdigit():
+            raise CursorError('Invalid cursor')
+        offset = int(cursor)
+    except (CursorError, FieldsError) as e:
+        return json_response({'error': str(e)}, 400)
+    
+    limit = min(limit, Config.SEARCH_MAX_RESULTS - offset)
+    if limit <= 0:
+        return json_response([])
+    
+    ranked = rank_complaints(terms, conditions, limit, offset)
+    has_more = len(ranked) > limit and offset + limit < Config.SEARCH_MAX_RESULTS
+    ranked = ranked[:limit]
+    
+    serialize = COMPLAINT.serializer(names)
+    rows = COMPLAINT.select(Complaint.query.filter(Complaint.id.in_([row.complaint_id for row in ranked])), names)
+    complaints = {row.id: serialize(row) for row in rows}
+    results = []
+    for complaint_id, score in ranked:
+        complaint = complaints.get(complaint_id)
+        if complaint is None:
+            continue  # deleted since it was ranked
+        complaint['score'] = round(score, 4)
+        results.append(complaint)
+    
+    response = json_response(results)
+    if has_more:
+        set_next_cursor(response, str(offset + limit))
+    return response
+
+@bp.route('/complaints/<int:id>/similar', methods=['GET'])
+@admin_required
+def similar_complaints(current_user, id):
+    """The k complaints whose description and resolution notes are most
+    like this one's (TF-IDF cosine), best first.
+
+    Each carries its `similarity` and, when resolved, `resolution_days`;
+    resolution notes are included unless `fields` says otherwise.
+    Chairpersons only see complaints from their district.
+    """
+    complaint = Complaint.query.options(db.undefer_group('text')).get_or_404(id)
+    district_id = None
+    if current_user.role_id == 4:  # Chairperson
+        if complaint.district_id != current_user.district_id:
+            return jsonify({'error': 'You can only view complaints in your district'}), 403
+        district_id = current_user.district_id
+    
+    k = request.args.get('k', '10')
+    if not k.isdigit() or not 1 <= int(k) <= Config.SIMILARITY_MAX_K:
+        return jsonify({'error': f'k must be between 1 and {Config.SIMILARITY_MAX_K}'}), 400
+    
+    try:
+        names = COMPLAINT.parse_fields(request.args.get('fields'), request.args.get('include', 'resolution_notes'))
+    except FieldsError as e:
+        return json_response({'error': str(e)}, 400)
+    
+    similar = similarity_index.similar(complaint, int(k), district_id)
+    
+    serialize = COMPLAINT.serializer(names)
+    rows = COMPLAINT.select(
+        Complaint.query.filter(Complaint.id.in_([complaint_id for complaint_id, _ in similar])),
+        list(dict.fromkeys(names + ['resolved_at']))
+    )
+    rows = {row.id: row for row in rows}
+    results = []
+    for complaint_id, similarity in similar:
+        row = rows.get(complaint_id)
+        if row is None:
+            continue  # deleted since the index was refreshed
+        result = serialize(row)
+        result['similarity'] = round(similarity, 4)
+        result['resolution_days'] = (
+            round((row.resolved_at - row.created_at).total_seconds() / 86400, 1)
+            if row.resolved_at and row.created_at else None
+        )
+        results.append(result)
+    
+    return json_response(results)
 
 @bp.route('/complaints/<int:id>/assign', methods=['PUT'])
 @admin_required
@@ -218,6 +352,8 @@ def update_complaint_status(current_user, id):
     if current_user.role_id == 4 and complaint.district_id != current_user.district_id:
         return jsonify({'error': 'You can only manage complaints in your district'}), 403
     
+    previous = rollup_snapshot(complaint)
+    
     if 'ministry_id' in data and data['ministry_id']:
         complaint.ministry_id = data['ministry_id']
     
@@ -228,10 +364,13 @@ def update_complaint_status(current_user, id):
             complaint.resolved_at = datetime.utcnow()
             if 'resolution_notes' in data:
                 complaint.resolution_notes = data['resolution_notes']
+                index_complaint(complaint)
     
     if 'assigned_to' in data:
         complaint.assigned_to = data['assigned_to']
     
+    record_complaint_changed(complaint, previous)
+    complaint_status_changed(complaint, previous['status'])
     db.session.commit()
     
     return jsonify({
@@ -239,20 +378,127 @@ def update_complaint_status(current_user, id):
         'complaint': complaint.to_dict()
     }), 200
 
+@bp.route('/complaints/assign', methods=['PUT'])
+@admin_required
+def bulk_update_complaints(current_user):
+    """Apply one status/assignment change to many complaints.
+
+    Takes either `ids` (a list of complaint ids) or `filter` (the analytics
+    filters: ministry, district, region, status, priority, from, to) plus
+    the fields of PUT /complaints/<id>/assign. Chairpersons only change
+    complaints in their district.
+    """
+    data = request.get_json() or {}
+    
+    try:
+        if ('ids' in data) == ('filter' in data):
+            raise TriageError('Give either ids or filter')
+        
+        ids = None
+        conditions = []
+        if 'ids' in data:
+            ids = data['ids']
+            if not isinstance(ids, list) or not ids or not all(type(i) is int for i in ids):
+                raise TriageError('ids must be a non-empty list of complaint ids')
+            ids = list(dict.fromkeys(ids))
+            if len(ids) > Config.BULK_TRIAGE_MAX_COMPLAINTS:
+                raise TriageError(f'At most {Config.BULK_TRIAGE_MAX_COMPLAINTS} ids per request')
+        else:
+            if not isinstance(data['filter'], dict) or not data['filter']:
+                raise TriageError('filter must be a non-empty object')
+            filters = parse_filters({name: str(value) for name, value in data['filter'].items()})
+            if not filters:
+                raise TriageError('filter has no recognised fields')
+            conditions = ComplaintSource(use_rollup=False).filter_conditions(filters)
+        
+        values = triage_values(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    district_id = current_user.district_id if current_user.role_id == 4 else None
+    try:
+        updated, results = bulk_triage(values, ids, conditions, district_id)
+    except TriageError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    order = ids if ids is not None else sorted(results)
+    return jsonify({
+        'message': f'{updated} complaints updated',
+        'updated': updated,
+        'results': [{'id': complaint_id, 'result': results[complaint_id]} for complaint_id in order]
+    }), 200
+
+@bp.route('/import/<kind>', methods=['POST'])
+@admin_required
+def import_data(current_user, kind):
+    """Import complaints, policy feedback or citizens from CSV or NDJSON - Admin only.
+
+    Send the file as multipart field `file` or as the raw request body. The
+    format comes from `?format=csv|ndjson`, else the file name or content
+    type. Bad rows are skipped and reported by line number. Citizen uploads
+    take at most IMPORT_HTTP_MAX_CITIZENS rows; when an import ends early,
+    `stopped` gives the line to send the rest from.
+    """
+    if current_user.role_id != 2:
+        return jsonify({'error': 'Admin access required'}), 403
+    if kind not in IMPORTERS:
+        return jsonify({'error': f"Unknown import type; use one of: {', '.join(IMPORTERS)}"}), 404
+    
+    upload = request.files.get('file')
+    name = upload.filename if upload else ''
+    content_type = upload.mimetype if upload else request.mimetype
+    fmt = request.args.get('format')
+    if not fmt:
+        ndjson = name.endswith(('.ndjson', '.jsonl')) or content_type in ('application/x-ndjson', 'application/jsonl')
+        fmt = 'ndjson' if ndjson else 'csv'
+    if fmt not in FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(FORMATS)}"}), 400
+    
+    raw = upload.stream if upload else request.stream
+    stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+    # Citizens' passwords are hashed in this request, so their uploads are capped
+    max_rows = Config.IMPORT_HTTP_MAX_CITIZENS if kind == 'citizens' else None
+    try:
+        result = import_rows(kind, stream, fmt, max_rows=max_rows)
+    except UnicodeDecodeError:
+        return jsonify({'error': 'The file must be UTF-8 encoded'}), 400
+    
+    if result.overloaded:
+        response = jsonify(result.to_dict())
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    return jsonify(result.to_dict()), 200
+
 @bp.route('/reports', methods=['GET'])
 @admin_required
 def get_reports(current_user):
     """Get all system reports"""
-    reports = SystemReport.query.order_by(SystemReport.generated_at.desc()).all()
-    return jsonify([r.to_dict() for r in reports]), 200
+    return paginated_response(SystemReport.query, SYSTEM_REPORT)
 
 @bp.route('/reports/<int:id>', methods=['GET'])
 @admin_required
 def get_report(current_user, id):
     """Get specific report"""
-    report = SystemReport.query.get_or_404(id)
+    report = SystemReport.query.options(db.undefer_group('text')).get_or_404(id)
     return jsonify(report.to_dict()), 200
 
+@bp.route('/metrics', methods=['GET'])
+@admin_required
+def get_metrics(current_user):
+    """Get process-level performance metrics"""
+    return jsonify({
+        'timings': timing_summary(),
+        'response_cache': response_cache.stats(),
+        'event_bus': event_bus.stats(),
+        'cache_warmer': cache_warmer.status(),
+        'similarity_index': similarity_index.stats(),
+        'principal_cache': principal_cache.stats(),
+        'token_revocations': revocations.stats(),
+        'password_hashing': password_hasher.stats(),
+        'rate_limits': rate_limiter.stats(),
+        'ussd_sessions': session_store.stats()
+    }), 200
+
 @bp.route('/users/<int:id>/status', methods=['PUT'])
 @admin_required
 def update_user_status(current_user, id):
@@ -264,7 +510,9 @@ def update_user_status(current_user, id):
         return jsonify({'error': 'is_active required'}), 400
     
     user.is_active = data['is_active']
+    revoke_tokens(user.id)
     db.session.commit()
+    invalidate_principal(user.id)
     
     return jsonify({
         'message': 'User status updated successfully',
@@ -1,76 +1,279 @@
-from flask import Blueprint, request, jsonify
-from models import db, Complaint, Ministry, District, ServiceRating, PolicyFeedback
-from sqlalchemy import func, desc, case
+from flask import Blueprint, request, jsonify, make_response, g, current_app, Response
+from models import db, Complaint, Ministry, District, Policy, ServiceRating, PolicyFeedback, ComplaintKeywordCount
+from sqlalchemy import func, desc, case, and_, cast
 from auth import token_required
 from sqlalchemy import extract
-from sqlalchemy import case, func, text
+from sqlalchemy import case, func, text, select
+from cache import response_cache
+from config import Config
+from rollups import complaint_source, ComplaintSource
+from events import event_bus
+from warmer import cache_warmer
+from ai.nlp_analyzer import NLPAnalyzer
 from datetime import datetime, timedelta
+from collections import Counter
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
 
 bp = Blueprint('analytics', __name__)
 
-@bp.route('/dashboard', methods=['GET'])
-def get_dashboard_stats():
-    """Get overall dashboard statistics - Public endpoint"""
+# Version stamps for each data source, all answerable from an index seek
+DATA_VERSION_COLUMNS = {
+    'complaints': (func.max(Complaint.id), func.max(Complaint.updated_at)),
+    'ratings': (func.max(ServiceRating.id),),
+    'feedback': (func.max(PolicyFeedback.id),)
+}
+
+def _data_version(sources):
+    """Current version of each given data source, fetched in one round-trip"""
+    columns = [
+        select(column).scalar_subquery()
+        for source in sources
+        for column in DATA_VERSION_COLUMNS[source]
+    ]
+    values = iter(db.session.query(*columns).one())
+    return {
+        source: tuple(next(values) for _ in DATA_VERSION_COLUMNS[source])
+        for source in sources
+    }
+
+# Query parameters accepted by every analytics endpoint
+DATE_FILTER_PARAMS = (('from', 'date_from'), ('to', 'date_to'))
+ID_FILTER_PARAMS = (('ministry', 'ministry_id'), ('district', 'district_id'))
+TEXT_FILTER_PARAMS = ('region', 'status', 'priority')
+
+def parse_filters(args):
+    """Analytics filters from the query string; raises ValueError on bad input"""
+    filters = {}
+    
+    for param, key in ID_FILTER_PARAMS:
+        value = args.get(param)
+        if value:
+            if not value.isdigit():
+                raise ValueError(f'{param} must be a numeric id')
+            filters[key] = int(value)
+    
+    for param in TEXT_FILTER_PARAMS:
+        value = args.get(param)
+        if value:
+            filters[param] = value
     
-    # Total counts
-    total_complaints = Complaint.query.count()
-    pending_complaints = Complaint.query.filter_by(status='Pending').count()
-    resolved_complaints = Complaint.query.filter_by(status='Resolved').count()
-    in_progress_complaints = Complaint.query.filter_by(status='In Progress').count()
+    for param, key in DATE_FILTER_PARAMS:
+        value = args.get(param)
+        if value:
+            try:
+                filters[key] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                raise ValueError(f'{param} must be a date in YYYY-MM-DD format')
     
-    # Complaints by priority
-    urgent_complaints = Complaint.query.filter_by(priority='Urgent').count()
-    high_complaints = Complaint.query.filter_by(priority='High').count()
-    normal_complaints = Complaint.query.filter_by(priority='Normal').count()
+    if filters.get('date_from') and filters.get('date_to') and filters['date_from'] > filters['date_to']:
+        raise ValueError('from must not be after to')
     
-    # Recent complaints (last 30 days)
+    return filters
+
+def _filters_key(filters):
+    return tuple(sorted(filters.items()))
+
+def _rating_conditions(filters):
+    """Filters that apply to service ratings: district, region and dates"""
+    conditions = []
+    if filters.get('district_id') is not None:
+        conditions.append(ServiceRating.district_id == filters['district_id'])
+    if filters.get('region'):
+        conditions.append(ServiceRating.district_id.in_(
+            select(District.id).where(District.region == filters['region'])
+        ))
+    conditions.extend(_date_conditions(ServiceRating.created_at, filters))
+    return conditions
+
+def _feedback_conditions(filters):
+    """Filters that apply to policy feedback: ministry (via the policy) and dates"""
+    conditions = []
+    if filters.get('ministry_id') is not None:
+        conditions.append(PolicyFeedback.policy_id.in_(
+            select(Policy.id).where(Policy.ministry_id == filters['ministry_id'])
+        ))
+    conditions.extend(_date_conditions(PolicyFeedback.submitted_at, filters))
+    return conditions
+
+def _date_conditions(column, filters):
+    conditions = []
+    if filters.get('date_from'):
+        conditions.append(column >= datetime.combine(filters['date_from'], datetime.min.time()))
+    if filters.get('date_to'):
+        conditions.append(column < datetime.combine(filters['date_to'] + timedelta(days=1), datetime.min.time()))
+    return conditions
+
+def _warm_key(name, complaints_version):
+    return ('warm', name, complaints_version, datetime.utcnow().date())
+
+def _warm_widget(name, versions, filters, compute):
+    """Unfiltered results come from the response cache, which the cache
+    warmer refreshes for each new complaints version; filtered requests are
+    computed directly"""
+    if filters:
+        return compute()
+    return cache_warmer.get(name, key=_warm_key(name, versions['complaints']))
+
+def _register_warm_widget(name, compute):
+    """Let the cache warmer precompute the unfiltered result of a widget"""
+    cache_warmer.register(
+        name,
+        lambda: compute({}),
+        key=lambda: _warm_key(name, _data_version(['complaints'])['complaints'])
+    )
+
+def conditional_get(*sources):
+    """Serve the endpoint with an ETag derived from its data version.
+
+    A request whose If-None-Match matches the current version gets a 304
+    without running the endpoint's aggregate queries. The analytics filters
+    are parsed here too and made available as `g.filters`.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            try:
+                g.filters = parse_filters(request.args)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            g.data_versions = _data_version(sources)
+            g.data_version = tuple(g.data_versions.items())
+            etag = hashlib.sha1(repr((
+                request.endpoint,
+                request.query_string,
+                datetime.utcnow().date(),
+                Config.ANALYTICS_USE_ROLLUP,
+                g.data_version
+            )).encode()).hexdigest()
+            
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+            
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = f'public, max-age={Config.ANALYTICS_CACHE_MAX_AGE}, must-revalidate'
+            return response
+        return decorated
+    return decorator
+
+@bp.route('/dashboard', methods=['GET'])
+@conditional_get('complaints', 'ratings', 'feedback')
+def get_dashboard_stats():
+    """Get overall dashboard statistics - Public endpoint"""
+    return jsonify(_dashboard_data(g.data_versions, g.filters)), 200
+
+def _dashboard_data(versions, filters):
+    """Dashboard counters, cached per data version and filter set"""
+    return response_cache.get_or_compute(
+        ('analytics.dashboard', tuple(versions.items()), _filters_key(filters)),
+        Config.DASHBOARD_CACHE_TTL,
+        lambda: _compute_dashboard_stats(filters)
+    )
+
+def _compute_dashboard_stats(filters):
+    """Compute dashboard counters in two queries"""
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    recent_complaints = Complaint.query.filter(
-        Complaint.created_at >= thirty_days_ago
-    ).count()
+    src = complaint_source()
+    
+    # All complaint counters in a single conditional-aggregate pass
+    counts = db.session.query(
+        src.total.label('total'),
+        src.count_where(src.status == 'Pending').label('pending'),
+        src.count_where(src.status == 'Resolved').label('resolved'),
+        src.count_where(src.status == 'In Progress').label('in_progress'),
+        src.count_where(src.priority == 'Urgent').label('urgent'),
+        src.count_where(src.priority == 'High').label('high'),
+        src.count_where(src.priority == 'Normal').label('normal'),
+        src.count_where(src.since(thirty_days_ago)).label('recent')
+    ).filter(
+        *src.filter_conditions(filters)
+    ).one()
     
-    # Average rating
-    avg_rating = db.session.query(func.avg(ServiceRating.rating)).scalar() or 0
+    # Average rating and total feedback
+    engagement = db.session.query(
+        select(func.avg(ServiceRating.rating)).where(
+            *_rating_conditions(filters)
+        ).scalar_subquery().label('avg_rating'),
+        select(func.count(ServiceRating.id)).where(
+            *_rating_conditions(filters)
+        ).scalar_subquery().label('total_ratings'),
+        select(func.count(PolicyFeedback.id)).where(
+            *_feedback_conditions(filters)
+        ).scalar_subquery().label('total_feedback')
+    ).one()
     
-    # Total feedback
-    total_feedback = PolicyFeedback.query.count()
+    total_complaints = counts.total or 0
+    resolved_complaints = counts.resolved or 0
+    avg_rating = engagement.avg_rating
     
-    return jsonify({
+    return {
         'total_complaints': total_complaints,
-        'pending_complaints': pending_complaints,
+        'pending_complaints': counts.pending or 0,
         'resolved_complaints': resolved_complaints,
-        'in_progress_complaints': in_progress_complaints,
-        'urgent_complaints': urgent_complaints,
-        'high_complaints': high_complaints,
-        'normal_complaints': normal_complaints,
-        'recent_complaints': recent_complaints,
+        'in_progress_complaints': counts.in_progress or 0,
+        'urgent_complaints': counts.urgent or 0,
+        'high_complaints': counts.high or 0,
+        'normal_complaints': counts.normal or 0,
+        'recent_complaints': counts.recent or 0,
         'average_rating': round(float(avg_rating), 2) if avg_rating else 0,
-        'total_feedback': total_feedback,
+        'total_ratings': engagement.total_ratings or 0,
+        'total_feedback': engagement.total_feedback or 0,
         'resolution_rate': round((resolved_complaints / total_complaints * 100), 2) if total_complaints > 0 else 0
-    }), 200
+    }
 
-@bp.route('/complaints-by-ministry', methods=['GET'])
-def complaints_by_ministry():
-    """Get complaint distribution by ministry - Public endpoint"""
+def _ministry_aggregate(filters):
+    """Per-ministry status counts and resolution times.
+
+    One query shared by complaints-by-ministry, ministry-performance and
+    unresolved-by-ministry. Complaint filters go in the join condition so
+    ministries without matching complaints are still listed.
+    """
+    src = complaint_source()
     
-    results = db.session.query(
+    query = db.session.query(
+        Ministry.id,
         Ministry.name,
         Ministry.code,
-        func.count(Complaint.id).label('total'),
-        func.sum(case((Complaint.status == 'Pending', 1), else_=0)).label('pending'),
-        func.sum(case((Complaint.status == 'In Progress', 1), else_=0)).label('in_progress'),
-        func.sum(case((Complaint.status == 'Resolved', 1), else_=0)).label('resolved')
+        src.total.label('total'),
+        src.count_where(src.status == 'Pending').label('pending'),
+        src.count_where(src.status == 'In Progress').label('in_progress'),
+        src.count_where(src.status == 'Resolved').label('resolved'),
+        # Complaints without a status are neither resolved nor unresolved
+        src.count_where(and_(src.status.isnot(None), src.status != 'Resolved')).label('unresolved'),
+        src.resolved_count.label('resolved_with_date'),
+        src.resolution_days_sum.label('resolution_days_sum')
     ).outerjoin(
-        Complaint, Ministry.id == Complaint.ministry_id
-    ).group_by(
+        src.model, and_(Ministry.id == src.ministry_id, *src.filter_conditions(filters))
+    )
+    
+    if filters.get('ministry_id') is not None:
+        query = query.filter(Ministry.id == filters['ministry_id'])
+    
+    return query.group_by(
         Ministry.id, Ministry.name, Ministry.code
     ).all()
-    
+
+def _ministry_rows(versions, filters):
+    return _warm_widget('analytics.ministry', versions, filters, lambda: _ministry_aggregate(filters))
+
+@bp.route('/complaints-by-ministry', methods=['GET'])
+@conditional_get('complaints')
+def complaints_by_ministry():
+    """Get complaint distribution by ministry - Public endpoint"""
+    return jsonify(_complaints_by_ministry_data(_ministry_rows(g.data_versions, g.filters))), 200
+
+def _complaints_by_ministry_data(results):
     data = []
     for row in results:
         total = row.total or 0
         resolved = row.resolved or 0
         data.append({
+            'ministry_id': row.id,
             'ministry': row.name,
             'code': row.code,
             'total': total,
@@ -80,21 +283,37 @@ def complaints_by_ministry():
             'resolution_rate': round((resolved / total * 100), 2) if total > 0 else 0
         })
     
-    return jsonify(data), 200
+    return data
 
 @bp.route('/complaints-by-district', methods=['GET'])
+@conditional_get('complaints')
 def complaints_by_district():
     """Get complaint distribution by district - Public endpoint"""
+    return jsonify(_warm_widget(
+        'analytics.by-district', g.data_versions, g.filters,
+        lambda: _complaints_by_district_data(g.filters)
+    )), 200
+
+def _complaints_by_district_data(filters):
+    src = complaint_source()
     
-    results = db.session.query(
+    query = db.session.query(
+        District.id,
         District.name,
         District.region,
-        func.count(Complaint.id).label('total'),
-        func.sum(case((Complaint.status == 'Pending', 1), else_=0)).label('pending'),
-        func.sum(case((Complaint.status == 'Resolved', 1), else_=0)).label('resolved')
+        src.total.label('total'),
+        src.count_where(src.status == 'Pending').label('pending'),
+        src.count_where(src.status == 'Resolved').label('resolved')
     ).outerjoin(
-        Complaint, District.id == Complaint.district_id
-    ).group_by(
+        src.model, and_(District.id == src.district_id, *src.filter_conditions(filters))
+    )
+    
+    if filters.get('district_id') is not None:
+        query = query.filter(District.id == filters['district_id'])
+    if filters.get('region'):
+        query = query.filter(District.region == filters['region'])
+    
+    results = query.group_by(
         District.id, District.name, District.region
     ).order_by(
         desc('total')
@@ -103,6 +322,7 @@ def complaints_by_district():
     data = []
     for row in results:
         data.append({
+            'district_id': row.id,
             'district': row.name,
             'region': row.region,
             'total': row.total or 0,
@@ -110,118 +330,242 @@ def complaints_by_district():
             'resolved': row.resolved or 0
         })
     
-    return jsonify(data), 200
+    return data
 
 @bp.route('/complaints-by-category', methods=['GET'])
+@conditional_get('complaints')
 def complaints_by_category():
     """Get complaint distribution by category - Public endpoint"""
+    return jsonify(_warm_widget(
+        'analytics.by-category', g.data_versions, g.filters,
+        lambda: _complaints_by_category_data(g.filters)
+    )), 200
+
+def _complaints_by_category_data(filters):
+    src = complaint_source()
     
     results = db.session.query(
-        Complaint.category,
-        func.count(Complaint.id).label('count')
+        src.category,
+        src.total.label('count')
+    ).filter(
+        *src.filter_conditions(filters)
     ).group_by(
-        Complaint.category
+        src.category
     ).order_by(
         desc('count')
     ).all()
     
-    data = [{'category': row.category, 'count': row.count} for row in results]
-    
-    return jsonify(data), 200
+    return [{'category': row.category, 'count': row.count} for row in results]
+
+TIMELINE_GRANULARITIES = ('day', 'week', 'month')
+TIMELINE_BREAKDOWNS = ('category', 'ministry')
+TIMELINE_DEFAULT_DAYS = 365
+TIMELINE_MAX_BUCKETS = 1000
 
 @bp.route('/complaints-timeline', methods=['GET'])
+@conditional_get('complaints')
 def complaints_timeline():
-    """Get complaints over time (last 12 months) - Public endpoint"""
+    """Get complaints over time - Public endpoint
+    
+    `granularity` is day, week (starting Monday) or month; the range defaults
+    to the last 365 days unless `from`/`to` are given. `breakdown` adds
+    per-category or per-ministry counts to every bucket.
+    """
+    granularity = request.args.get('granularity', 'month')
+    if granularity not in TIMELINE_GRANULARITIES:
+        return jsonify({'error': f"granularity must be one of: {', '.join(TIMELINE_GRANULARITIES)}"}), 400
+    
+    breakdown = request.args.get('breakdown')
+    if breakdown is not None and breakdown not in TIMELINE_BREAKDOWNS:
+        return jsonify({'error': f"breakdown must be one of: {', '.join(TIMELINE_BREAKDOWNS)}"}), 400
     
-    twelve_months_ago = datetime.utcnow() - timedelta(days=365)
+    first, last = _timeline_range(g.filters)
+    buckets = _timeline_buckets(first, last, granularity)
+    if len(buckets) > TIMELINE_MAX_BUCKETS:
+        return jsonify({'error': f'Timeline would have more than {TIMELINE_MAX_BUCKETS} buckets; narrow the range'}), 400
+    
+    if granularity == 'month' and breakdown is None:
+        return jsonify(_warm_widget(
+            'analytics.timeline', g.data_versions, g.filters,
+            lambda: _complaints_timeline_data(g.filters)
+        )), 200
+    
+    return jsonify(_complaints_timeline_data(g.filters, granularity, breakdown)), 200
 
-    results = db.session.query(
-        extract('year', Complaint.created_at).label('year'),
-        extract('month', Complaint.created_at).label('month'),
-        func.count(Complaint.id).label('count')
-    ).filter(
-        Complaint.created_at >= twelve_months_ago
-    ).group_by(
-        extract('year', Complaint.created_at),
-        extract('month', Complaint.created_at)
-    ).order_by(
-        extract('year', Complaint.created_at),
-        extract('month', Complaint.created_at)
-    ).all()
+def _timeline_range(filters):
+    """First and last day covered by the timeline"""
+    today = datetime.utcnow().date()
+    last = filters.get('date_to') or today
+    first = filters.get('date_from') or (last - timedelta(days=TIMELINE_DEFAULT_DAYS))
+    return first, last
+
+def _bucket_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def _timeline_buckets(first, last, granularity):
+    """Start day of every bucket from `first` to `last`, gaps included"""
+    buckets = []
+    current = _bucket_start(first, granularity)
+    while current <= last:
+        buckets.append(current)
+        if granularity == 'day':
+            current += timedelta(days=1)
+        elif granularity == 'week':
+            current += timedelta(days=7)
+        else:
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return buckets
+
+def _period_label(start, granularity):
+    return start.strftime('%Y-%m') if granularity == 'month' else start.isoformat()
+
+def _complaints_timeline_data(filters, granularity='month', breakdown=None):
+    """Daily counts from a range scan on the creation time, folded into
+    day/week/month buckets and gap-filled here rather than in SQL"""
+    src = complaint_source()
+    first, last = _timeline_range(filters)
+    
+    conditions = src.filter_conditions(filters)
+    if not filters.get('date_from'):
+        conditions.append(src.since(datetime.combine(first, datetime.min.time())))
+    
+    day = src.created if src.use_rollup else cast(src.created, db.Date)
+    columns = [day.label('day'), src.total.label('count')]
+    group_by = [day]
+    query = db.session.query(*columns)
+    
+    if breakdown == 'category':
+        query = query.add_columns(src.category.label('series'))
+        group_by.append(src.category)
+    elif breakdown == 'ministry':
+        query = query.add_columns(Ministry.name.label('series')).outerjoin(
+            Ministry, Ministry.id == src.ministry_id
+        )
+        group_by.append(Ministry.name)
+    
+    results = query.filter(*conditions).group_by(*group_by).all()
+    
+    buckets = _timeline_buckets(first, last, granularity)
+    counts = dict.fromkeys(buckets, 0)
+    series_counts = {start: Counter() for start in buckets}
+    series_names = set()
     
-    data = []
     for row in results:
-        month_str = f"{int(row.year)}-{int(row.month):02d}"
-        data.append({
-            'month': month_str,
-            'count': row.count
-        })
+        start = _bucket_start(row.day, granularity)
+        if start not in counts:
+            continue
+        counts[start] += row.count
+        if breakdown:
+            name = row.series or 'Unassigned'
+            series_counts[start][name] += row.count
+            series_names.add(name)
     
-    return jsonify(data), 200
+    data = []
+    for start in buckets:
+        bucket = {'period': _period_label(start, granularity), 'count': counts[start]}
+        if breakdown:
+            bucket['breakdown'] = {name: series_counts[start][name] for name in sorted(series_names)}
+        data.append(bucket)
+    
+    return data
 
 @bp.route('/top-issues', methods=['GET'])
+@conditional_get('complaints')
 def top_issues():
-    """Get most common complaint themes/keywords - Public endpoint"""
+    """Get most common complaint themes/keywords - Public endpoint
     
-    complaints = Complaint.query.all()
+    Optional `window` restricts the counts to the last N days.
+    """
+    window = request.args.get('window')
+    if window is not None:
+        if not window.isdigit() or int(window) < 1:
+            return jsonify({'error': 'window must be a positive number of days'}), 400
+        window = int(window)
     
-    keywords = {}
-    common_words = ['the', 'is', 'in', 'at', 'of', 'and', 'a', 'to', 'for', 'on', 'with', 'be', 'this', 'that', 'have', 'has']
+    if window is None:
+        return jsonify(_warm_widget(
+            'analytics.top-issues', g.data_versions, g.filters,
+            lambda: _top_issues_data(g.filters)
+        )), 200
     
-    for complaint in complaints:
-        if complaint.description:
-            words = complaint.description.lower().split()
-            for word in words:
-                word = word.strip('.,!?;:')
-                if len(word) > 3 and word not in common_words:
-                    keywords[word] = keywords.get(word, 0) + 1
+    return jsonify(_top_issues_data(g.filters, window)), 200
+
+def _top_issues_data(filters, window=None, limit=10):
+    first_day = (datetime.utcnow() - timedelta(days=window - 1)).date() if window else None
     
-    # Get top 10
-    top_keywords = sorted(keywords.items(), key=lambda x: x[1], reverse=True)[:10]
+    # The keyword table is only keyed by day; other filters need the complaints
+    if any(key not in ('date_from', 'date_to') for key in filters):
+        return _filtered_top_issues_data(filters, first_day, limit)
     
-    data = [{'keyword': k, 'count': v} for k, v in top_keywords]
+    query = db.session.query(
+        ComplaintKeywordCount.term,
+        func.sum(ComplaintKeywordCount.count).label('count')
+    )
     
-    return jsonify(data), 200
+    if first_day:
+        query = query.filter(ComplaintKeywordCount.day >= first_day)
+    if filters.get('date_from'):
+        query = query.filter(ComplaintKeywordCount.day >= filters['date_from'])
+    if filters.get('date_to'):
+        query = query.filter(ComplaintKeywordCount.day <= filters['date_to'])
+    
+    results = query.group_by(
+        ComplaintKeywordCount.term
+    ).order_by(
+        desc('count'), ComplaintKeywordCount.term
+    ).limit(limit).all()
+    
+    return [{'keyword': row.term, 'count': row.count} for row in results]
+
+def _filtered_top_issues_data(filters, first_day, limit):
+    """Tokenize the descriptions of just the matching complaints"""
+    src = ComplaintSource(use_rollup=False)
+    conditions = src.filter_conditions(filters)
+    if first_day:
+        conditions.append(src.created >= datetime.combine(first_day, datetime.min.time()))
+    
+    counts = Counter()
+    rows = db.session.query(Complaint.description).filter(*conditions).yield_per(1000)
+    for (description,) in rows:
+        if description:
+            counts.update(NLPAnalyzer.extract_keywords(description))
+    
+    top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return [{'keyword': term, 'count': count} for term, count in top]
 
 @bp.route('/ministry-performance', methods=['GET'])
+@conditional_get('complaints')
 def ministry_performance():
     """Get ministry performance metrics - Public endpoint"""
+    return jsonify(_ministry_performance_data(_ministry_rows(g.data_versions, g.filters))), 200
 
-    results = db.session.query(
-        Ministry.name,
-        func.count(Complaint.id).label('total_complaints'),
-        func.sum(
-            case((Complaint.status == 'Resolved', 1), else_=0)
-        ).label('resolved'),
-        func.avg(
-            case(
-                (Complaint.resolved_at.isnot(None),
-                 func.datediff(text("day"), Complaint.created_at, Complaint.resolved_at)),
-                else_=None
-            )
-        ).label('avg_resolution_days')
-    ).outerjoin(
-        Complaint, Ministry.id == Complaint.ministry_id
-    ).group_by(
-        Ministry.id, Ministry.name
-    ).all()
-
+def _ministry_performance_data(results):
     data = []
     for row in results:
-        total = row.total_complaints or 0
+        total = row.total or 0
         resolved = row.resolved or 0
+        avg_resolution_days = (
+            row.resolution_days_sum / row.resolved_with_date
+            if row.resolved_with_date and row.resolution_days_sum is not None else 0
+        )
         
         data.append({
+            'ministry_id': row.id,
             'ministry': row.name,
             'total_complaints': total,
             'resolved': resolved,
-            'avg_resolution_days': round(float(row.avg_resolution_days), 1) if row.avg_resolution_days else 0,
+            'avg_resolution_days': round(float(avg_resolution_days), 1) if avg_resolution_days else 0,
             'resolution_rate': round((resolved / total * 100), 2) if total > 0 else 0
         })
 
-    return jsonify(data), 200
+    return data
 
 @bp.route('/service-ratings-summary', methods=['GET'])
+@conditional_get('ratings')
 def service_ratings_summary():
     """Get service ratings summary - Public endpoint"""
     
@@ -229,6 +573,8 @@ def service_ratings_summary():
         ServiceRating.service_type,
         func.avg(ServiceRating.rating).label('avg_rating'),
         func.count(ServiceRating.id).label('total_ratings')
+    ).filter(
+        *_rating_conditions(g.filters)
     ).group_by(
         ServiceRating.service_type
     ).all()
@@ -244,26 +590,146 @@ def service_ratings_summary():
     return jsonify(data), 200
 
 @bp.route('/unresolved-by-ministry', methods=['GET'])
+@conditional_get('complaints')
 def unresolved_by_ministry():
     """Get ministries with highest unresolved complaints - Public endpoint"""
+    return jsonify(_unresolved_by_ministry_data(_ministry_rows(g.data_versions, g.filters))), 200
+
+def _unresolved_by_ministry_data(results):
+    unresolved = [
+        {'ministry': row.name, 'unresolved_count': row.unresolved or 0}
+        for row in results
+    ]
+    unresolved = [row for row in unresolved if row['unresolved_count'] > 0]
+    unresolved.sort(key=lambda row: row['unresolved_count'], reverse=True)
     
-    results = db.session.query(
-        Ministry.name,
-        func.count(Complaint.id).label('unresolved_count')
-    ).join(
-        Complaint, Ministry.id == Complaint.ministry_id
-    ).filter(
-        Complaint.status != 'Resolved'
-    ).group_by(
-        Ministry.id, Ministry.name
-    ).order_by(
-        desc('unresolved_count')
-    ).limit(10).all()
+    return unresolved[:10]
+
+# Unfiltered widgets the cache warmer keeps fresh
+_register_warm_widget('analytics.ministry', _ministry_aggregate)
+_register_warm_widget('analytics.by-district', _complaints_by_district_data)
+_register_warm_widget('analytics.by-category', _complaints_by_category_data)
+_register_warm_widget('analytics.timeline', _complaints_timeline_data)
+_register_warm_widget('analytics.top-issues', _top_issues_data)
+
+# Bundle widgets, grouped by the aggregate they are computed from. Widgets in
+# the same group share one query; separate groups are independent.
+BUNDLE_WIDGET_GROUPS = {
+    'dashboard': {
+        'dashboard': lambda versions, _, filters: _dashboard_data(versions, filters)
+    },
+    'ministry': {
+        'by-ministry': lambda _, rows, __: _complaints_by_ministry_data(rows),
+        'ministry-performance': lambda _, rows, __: _ministry_performance_data(rows),
+        'unresolved-by-ministry': lambda _, rows, __: _unresolved_by_ministry_data(rows)
+    },
+    'district': {
+        'by-district': lambda versions, _, filters: _warm_widget(
+            'analytics.by-district', versions, filters, lambda: _complaints_by_district_data(filters)
+        )
+    },
+    'category': {
+        'by-category': lambda versions, _, filters: _warm_widget(
+            'analytics.by-category', versions, filters, lambda: _complaints_by_category_data(filters)
+        )
+    },
+    'timeline': {
+        'timeline': lambda versions, _, filters: _warm_widget(
+            'analytics.timeline', versions, filters, lambda: _complaints_timeline_data(filters)
+        )
+    },
+    'top-issues': {
+        'top-issues': lambda versions, _, filters: _warm_widget(
+            'analytics.top-issues', versions, filters, lambda: _top_issues_data(filters)
+        )
+    }
+}
+
+BUNDLE_GROUP_AGGREGATES = {
+    'ministry': _ministry_rows
+}
+
+def _compute_widget_group(group, widgets, versions, filters):
+    aggregate = BUNDLE_GROUP_AGGREGATES.get(group)
+    shared = aggregate(versions, filters) if aggregate else None
+    builders = BUNDLE_WIDGET_GROUPS[group]
+    return {widget: builders[widget](versions, shared, filters) for widget in widgets}
+
+def _compute_widget_group_in_context(app, group, widgets, versions, filters):
+    # Each worker gets its own app context, and with it its own session
+    with app.app_context():
+        return _compute_widget_group(group, widgets, versions, filters)
+
+@bp.route('/bundle', methods=['GET'])
+@conditional_get('complaints', 'ratings', 'feedback')
+def analytics_bundle():
+    """Get several analytics widgets in one response - Public endpoint"""
+    widget_groups = {
+        widget: group
+        for group, widgets in BUNDLE_WIDGET_GROUPS.items()
+        for widget in widgets
+    }
+    
+    requested = request.args.get('widgets')
+    widgets = [w.strip() for w in requested.split(',') if w.strip()] if requested else list(widget_groups)
     
-    data = [{'ministry': row.name, 'unresolved_count': row.unresolved_count} for row in results]
+    unknown = [w for w in widgets if w not in widget_groups]
+    if unknown:
+        return jsonify({'error': f"Unknown widgets: {', '.join(unknown)}"}), 400
+    
+    groups = {}
+    for widget in widgets:
+        groups.setdefault(widget_groups[widget], []).append(widget)
+    
+    data = {}
+    workers = min(Config.ANALYTICS_BUNDLE_WORKERS, len(groups))
+    if workers > 1:
+        app = current_app._get_current_object()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_compute_widget_group_in_context, app, group, group_widgets, g.data_versions, g.filters)
+                for group, group_widgets in groups.items()
+            ]
+            for future in futures:
+                data.update(future.result())
+    else:
+        for group, group_widgets in groups.items():
+            data.update(_compute_widget_group(group, group_widgets, g.data_versions, g.filters))
     
     return jsonify(data), 200
 
+@bp.route('/stream', methods=['GET'])
+def dashboard_stream():
+    """Stream dashboard counter changes as Server-Sent Events - Public endpoint
+    
+    Sends a `ready` event on connect (clients load /dashboard then), `deltas`
+    events with summed counter changes and recent event details, and a
+    comment line as heartbeat while idle.
+    """
+    subscription = event_bus.subscribe(Config.ANALYTICS_STREAM_QUEUE_SIZE, Config.ANALYTICS_STREAM_MAX_CLIENTS)
+    if subscription is None:
+        return jsonify({'error': 'Too many live dashboard connections'}), 503
+    
+    heartbeat = Config.ANALYTICS_STREAM_HEARTBEAT
+    coalesce = Config.ANALYTICS_STREAM_COALESCE_MS / 1000
+    
+    def generate():
+        try:
+            yield 'retry: 5000\nevent: ready\ndata: {}\n\n'
+            while True:
+                batch = subscription.take(heartbeat, coalesce)
+                if batch is None:
+                    yield ': heartbeat\n\n'
+                else:
+                    yield f"event: deltas\ndata: {json.dumps(batch)}\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+    
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @bp.route('/generate-report', methods=['POST'])
 @token_required
 def generate_report_endpoint(current_user):
@@ -1,12 +1,15 @@
 from flask import Blueprint, request, jsonify
 from models import db, Citizen, District
 from auth import generate_token
+from passwords import password_hasher
+from rate_limit import rate_limit, client_ip, json_field
 from email_service import send_welcome_email
 from datetime import datetime
 
 bp = Blueprint('auth', __name__)
 
 @bp.route('/register', methods=['POST'])
+@rate_limit('register', client_ip)
 def register():
     data = request.get_json()
     
@@ -51,7 +54,7 @@ def register():
     send_welcome_email(citizen.email, citizen.name)
     
     # Generate token
-    token = generate_token(citizen.id, citizen.role_id)
+    token = generate_token(citizen.id, citizen.role_id, citizen.district_id)
     
     return jsonify({
         'message': 'Registration successful',
@@ -60,6 +63,8 @@ def register():
     }), 201
 
 @bp.route('/login', methods=['POST'])
+@rate_limit('login', client_ip)
+@rate_limit('login_account', json_field('nin'))
 def login():
     data = request.get_json()
     
@@ -76,12 +81,16 @@ def login():
     if not citizen.is_active:
         return jsonify({'error': 'Account is inactive'}), 401
     
+    # Upgrade hashes made with an older method or cost while the password is at hand
+    if password_hasher.needs_rehash(citizen.password_hash):
+        citizen.set_password(data['password'])
+    
     # Update last login
     citizen.last_login = datetime.utcnow()
     db.session.commit()
     
     # Generate token
-    token = generate_token(citizen.id, citizen.role_id)
+    token = generate_token(citizen.id, citizen.role_id, citizen.district_id)
     
     return jsonify({
         'message': 'Login successful',
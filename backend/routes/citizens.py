@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
 from models import db, Citizen
+from rate_limit import rate_limit, client_ip
 
 bp = Blueprint('citizens', __name__)
 
 @bp.route('/register', methods=['POST'])
+@rate_limit('register', client_ip)
 def register():
     data = request.get_json()
     
@@ -3,6 +3,13 @@ from models import db, PolicyFeedback, Complaint, ServiceRating, Citizen, Minist
 from ai.nlp_analyzer import NLPAnalyzer
 from email_service import send_complaint_confirmation
 from auth import token_required
+from rollups import record_complaint_created
+from search import index_complaint
+from sketches import record_engagement
+from rate_limit import rate_limit, client_ip, citizen_id
+import events
+from pagination import paginated_response
+from serializers import COMPLAINT
 import uuid
 from datetime import datetime
 
@@ -27,6 +34,8 @@ def submit_policy_feedback(current_user):
     )
     
     db.session.add(feedback)
+    record_engagement('feedback', current_user.id)
+    events.feedback_submitted(feedback)
     db.session.commit()
     
     return jsonify({
@@ -39,6 +48,7 @@ def submit_policy_feedback(current_user):
     }), 201
 
 @bp.route('/complaint', methods=['POST'])
+@rate_limit('complaint', citizen_id)
 @token_required
 def submit_complaint(current_user):
     data = request.get_json()
@@ -74,6 +84,11 @@ def submit_complaint(current_user):
     )
     
     db.session.add(complaint)
+    db.session.flush()
+    record_complaint_created(complaint)
+    index_complaint(complaint, replace=False)
+    record_engagement('complaints', current_user.id, complaint.created_at.date())
+    events.complaint_created(complaint)
     db.session.commit()
     
     # Send email confirmation
@@ -84,17 +99,21 @@ def submit_complaint(current_user):
             tracking_number,
             category,
             priority
-    )
-        return jsonify({
-    'message': 'Complaint submitted successfully',
-    'complaint': complaint.to_dict(),
-    'tracking_number': tracking_number,
-    'auto_assigned_ministry': ministry.name if ministry else 'Pending Assignment'
-}), 201
+        )
+    
+    return jsonify({
+        'message': 'Complaint submitted successfully',
+        'complaint': complaint.to_dict(),
+        'tracking_number': tracking_number,
+        'auto_assigned_ministry': ministry.name if ministry else 'Pending Assignment'
+    }), 201
 
 @bp.route('/complaint/<tracking_number>', methods=['GET'])
+@rate_limit('track', client_ip)
 def track_complaint(tracking_number):
-    complaint = Complaint.query.filter_by(tracking_number=tracking_number.upper()).first_or_404()
+    complaint = Complaint.query.options(
+        db.undefer_group('text')
+    ).filter_by(tracking_number=tracking_number.upper()).first_or_404()
     return jsonify(complaint.to_dict())
 
 @bp.route('/complaint/user/<int:user_id>', methods=['GET'])
@@ -104,8 +123,8 @@ def get_user_complaints(current_user, user_id):
     if current_user.id != user_id and current_user.role_id != 2:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    complaints = Complaint.query.filter_by(citizen_id=user_id).order_by(Complaint.created_at.desc()).all()
-    return jsonify([c.to_dict() for c in complaints])
+    query = Complaint.query.filter_by(citizen_id=user_id)
+    return paginated_response(query, COMPLAINT, filtered=True)
 
 @bp.route('/rating', methods=['POST'])
 @token_required
@@ -122,6 +141,8 @@ def submit_rating(current_user):
     )
     
     db.session.add(rating)
+    record_engagement('ratings', current_user.id)
+    events.rating_submitted(rating)
     db.session.commit()
     
     return jsonify({
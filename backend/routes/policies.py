@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from models import db, Policy, PolicyFeedback
 from sqlalchemy import func
 from auth import token_required
+from pagination import paginated_response
+from serializers import POLICY
 from datetime import datetime
 
 bp = Blueprint('policies', __name__)
@@ -18,8 +20,9 @@ def get_policies():
     if category:
         query = query.filter_by(category=category)
     
-    policies = query.order_by(Policy.created_at.desc()).all()
-    return jsonify([p.to_dict() for p in policies])
+    return paginated_response(
+        query, POLICY, filtered=bool(status or category)
+    )
 
 @bp.route('/<int:id>', methods=['GET'])
 def get_policy(id):
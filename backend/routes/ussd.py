@@ -1,6 +1,12 @@
 from flask import Blueprint, request, jsonify
-from models import db, USSDSession, Citizen, Complaint, Policy
+from models import db, Citizen, Complaint, Policy, ServiceRating
 from ai.nlp_analyzer import NLPAnalyzer
+from rollups import record_complaint_created
+from search import index_complaint
+from sketches import record_engagement
+from rate_limit import rate_limit, client_ip, json_field
+from ussd_sessions import SessionState, session_store, persist_sessions
+import events
 import json
 import uuid
 
@@ -8,22 +14,19 @@ bp = Blueprint('ussd', __name__)
 nlp = NLPAnalyzer()
 
 @bp.route('/simulate', methods=['POST'])
+@rate_limit('ussd_client', client_ip)
+@rate_limit('ussd_phone', json_field('phoneNumber'))
 def ussd_simulate():
     data = request.get_json()
     session_id = data.get('sessionId', str(uuid.uuid4()))
     phone_number = data.get('phoneNumber')
     text = data.get('text', '')
     
-    # Get or create session
-    session = USSDSession.query.filter_by(session_id=session_id).first()
+    # Get or create session; menu state stays in the session store and only
+    # hops that create data touch the database (see ussd_sessions.py)
+    session = session_store.get(session_id)
     if not session:
-        session = USSDSession(
-            session_id=session_id,
-            phone_number=phone_number,
-            current_menu='main',
-            data='{}'
-        )
-        db.session.add(session)
+        session = SessionState(session_id, phone_number)
     
     # Parse user input
     inputs = text.split('*') if text else []
@@ -31,10 +34,22 @@ def ussd_simulate():
     
     response = process_ussd_input(session, current_input, phone_number)
     
+    if response['continue']:
+        session_store.save(session)
+    else:
+        session_store.discard(session_id)
     db.session.commit()
     
     return jsonify(response)
 
+def complete_session(session, citizen_id):
+    """Reset a dialogue that created data and write its USSDSessions row in
+    the same transaction"""
+    session.citizen_id = citizen_id
+    session.current_menu = 'main'
+    session.data = '{}'
+    persist_sessions([session.to_row()])
+
 def process_ussd_input(session, user_input, phone_number):
     session_data = json.loads(session.data) if session.data else {}
     
@@ -135,9 +150,13 @@ def process_ussd_input(session, user_input, phone_number):
             tracking_number=tracking_number
         )
         db.session.add(complaint)
+        db.session.flush()
+        record_complaint_created(complaint)
+        index_complaint(complaint, replace=False)
+        record_engagement('complaints', citizen.id, complaint.created_at.date())
+        events.complaint_created(complaint)
         
-        session.current_menu = 'main'
-        session.data = '{}'
+        complete_session(session, citizen.id)
         
         return {
             'message': f'END Complaint submitted!\nTracking #: {tracking_number}\nPriority: {priority}\nSMS sent with details.',
@@ -200,9 +219,10 @@ def process_ussd_input(session, user_input, phone_number):
                     rating=rating_value
                 )
                 db.session.add(rating)
+                record_engagement('ratings', citizen.id)
+                events.rating_submitted(rating)
                 
-                session.current_menu = 'main'
-                session.data = '{}'
+                complete_session(session, citizen.id)
                 
                 return {
                     'message': 'END Thank you for your rating!',
@@ -233,9 +253,9 @@ def process_ussd_input(session, user_input, phone_number):
             district=user_input
         )
         db.session.add(citizen)
+        db.session.flush()
         
-        session.current_menu = 'main'
-        session.data = '{}'
+        complete_session(session, citizen.id)
         
         return {
             'message': 'END Registration successful! Welcome to CitizenVoice AI.',
@@ -0,0 +1,202 @@
+"""
+Full-text complaint search over an inverted index kept in the database.
+
+Each complaint's description, location and resolution notes are tokenized
+into terms; ComplaintSearchTerms holds one posting (term, complaint id,
+frequency) per distinct term and ComplaintSearchDocuments the number of
+terms per complaint. The index is written in the same transaction as the
+complaint, so it never drifts from the data, and works the same on SQL
+Server and sqlite without a full-text catalog or external service.
+
+Results are ranked with Okapi BM25. The score is computed by the database
+in one grouped query over the postings of the query terms, so only the
+requested page of ids comes back; filters on complaint columns are applied
+in the same query.
+"""
+
+import math
+import re
+from collections import Counter
+
+from sqlalchemy import select, insert, delete, func, case
+
+from config import Config
+from cache import response_cache
+from models import db, Complaint, ComplaintSearchTerm, ComplaintSearchDocument
+from ai.nlp_analyzer import NLPAnalyzer
+
+# Standard BM25 parameters: term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Complaints per DELETE/INSERT batch; keeps IN lists well under SQL Server's
+# 2100 parameter limit
+INDEX_BATCH_SIZE = 500
+
+# Terms used from one query
+MAX_QUERY_TERMS = 20
+
+STATS_KEY = ('search.stats',)
+
+TERM_LENGTH = ComplaintSearchTerm.__table__.c.term.type.length
+TOKEN = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    """Index terms of a text: lowercased words without stop words, with a
+    plural 's' removed so "boreholes" finds "borehole"."""
+    terms = []
+    for token in TOKEN.findall(text.lower()):
+        if len(token) < 2 or token in NLPAnalyzer.STOP_WORDS:
+            continue
+        if len(token) > 4 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        if len(token) <= TERM_LENGTH:
+            terms.append(token)
+    return terms
+
+
+def query_terms(query):
+    """Distinct terms of a search query, in order"""
+    return list(dict.fromkeys(tokenize(query or '')))[:MAX_QUERY_TERMS]
+
+
+def index_documents(documents, replace=False):
+    """Write postings for [(complaint id, description, location, resolution
+    notes)], replacing any the complaints already have when `replace`."""
+    postings = ComplaintSearchTerm.__table__
+    lengths = ComplaintSearchDocument.__table__
+
+    for start in range(0, len(documents), INDEX_BATCH_SIZE):
+        batch = documents[start:start + INDEX_BATCH_SIZE]
+        if replace:
+            ids = [document[0] for document in batch]
+            db.session.execute(delete(postings).where(postings.c.complaint_id.in_(ids)))
+            db.session.execute(delete(lengths).where(lengths.c.complaint_id.in_(ids)))
+
+        term_rows = []
+        length_rows = []
+        for complaint_id, *fields in batch:
+            terms = tokenize(' '.join(field for field in fields if field))
+            length_rows.append({'complaint_id': complaint_id, 'length': len(terms)})
+            term_rows.extend(
+                {'term': term, 'complaint_id': complaint_id, 'frequency': frequency}
+                for term, frequency in Counter(terms).items()
+            )
+
+        db.session.execute(insert(lengths), length_rows)
+        if term_rows:
+            db.session.execute(insert(postings), term_rows)
+
+
+def index_complaint(complaint, replace=True):
+    """Index one complaint after it was flushed or its text changed"""
+    index_documents(
+        [(complaint.id, complaint.description, complaint.location, complaint.resolution_notes)],
+        replace
+    )
+
+
+def index_complaints(ids, replace=True):
+    """Index the complaints with the given ids, reading their text in batches"""
+    ids = list(ids)
+    for start in range(0, len(ids), INDEX_BATCH_SIZE):
+        documents = db.session.execute(
+            select(Complaint.id, Complaint.description, Complaint.location, Complaint.resolution_notes)
+            .where(Complaint.id.in_(ids[start:start + INDEX_BATCH_SIZE]))
+        ).all()
+        index_documents([tuple(document) for document in documents], replace)
+
+
+def rebuild_search_index(chunk_size=5000):
+    """Recompute the search index, streaming complaints in id order"""
+    indexed = 0
+    last_id = 0
+
+    try:
+        db.session.execute(delete(ComplaintSearchTerm.__table__))
+        db.session.execute(delete(ComplaintSearchDocument.__table__))
+
+        while True:
+            documents = db.session.execute(
+                select(Complaint.id, Complaint.description, Complaint.location, Complaint.resolution_notes)
+                .where(Complaint.id > last_id)
+                .order_by(Complaint.id)
+                .limit(chunk_size)
+            ).all()
+            if not documents:
+                break
+
+            index_documents([tuple(document) for document in documents], replace=False)
+            indexed += len(documents)
+            last_id = documents[-1].id
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    invalidate_collection_stats()
+    return indexed
+
+
+def _collection_stats():
+    count, total_length = db.session.execute(
+        select(func.count(), func.sum(ComplaintSearchDocument.length))
+    ).one()
+    return count, (total_length / count if count and total_length else 1.0)
+
+
+def collection_stats():
+    """(indexed complaints, average terms per complaint), cached briefly;
+    BM25 ranks barely move as single complaints are added"""
+    return response_cache.get_or_compute(STATS_KEY, Config.SEARCH_STATS_TTL, _collection_stats)
+
+
+def invalidate_collection_stats():
+    """Drop the cached statistics after a bulk change to the index"""
+    response_cache.invalidate(STATS_KEY)
+
+
+def rank_complaints(terms, conditions=(), limit=50, offset=0):
+    """[(complaint id, score)] of the best matches for `terms`, best first.
+
+    `conditions` are filters on Complaint columns. One row more than `limit`
+    is returned when there is a further page.
+    """
+    postings = ComplaintSearchTerm.__table__
+    lengths = ComplaintSearchDocument.__table__
+
+    frequencies = dict(db.session.execute(
+        select(postings.c.term, func.count())
+        .where(postings.c.term.in_(terms))
+        .group_by(postings.c.term)
+    ).all())
+    if not frequencies:
+        return []
+
+    count, average_length = collection_stats()
+    weights = {}
+    for term, matches in frequencies.items():
+        documents = max(count, matches)
+        idf = math.log(1 + (documents - matches + 0.5) / (matches + 0.5))
+        weights[term] = idf * (BM25_K1 + 1)
+
+    # tf * (k1 + 1) * idf / (tf + k1 * (1 - b + b * length / average length))
+    weight = case(weights, value=postings.c.term, else_=0.0)
+    normalized_length = BM25_K1 * (1 - BM25_B) + (BM25_K1 * BM25_B / average_length) * lengths.c.length
+    score = func.sum(weight * postings.c.frequency / (postings.c.frequency + normalized_length)).label('score')
+
+    query = select(postings.c.complaint_id, score).join(
+        lengths, lengths.c.complaint_id == postings.c.complaint_id
+    )
+    if conditions:
+        query = query.join(Complaint.__table__, Complaint.id == postings.c.complaint_id).where(*conditions)
+
+    return db.session.execute(
+        query.where(postings.c.term.in_(list(frequencies)))
+        .group_by(postings.c.complaint_id)
+        .order_by(score.desc(), postings.c.complaint_id)
+        .limit(limit + 1)
+        .offset(offset)
+    ).all()
@@ -0,0 +1,177 @@
+"""
+Column projections for list endpoints.
+
+A Projection reproduces a model's to_dict() output from a query that selects
+only the columns needed, including the names of related rows through outer
+joins, so a list is built from plain row tuples instead of ORM instances.
+Clients can ask for a subset of the fields with `?fields=id,status,...`.
+Large text fields are deferred: they are only selected when named in
+`fields` or in `?include=description,...`.
+
+Responses are encoded with orjson when it is installed and with the standard
+library otherwise; both sort keys like jsonify, so each decoded field is the
+same as in the object's to_dict().
+"""
+
+import json
+from datetime import date
+
+from flask import current_app
+
+from models import Citizen, Complaint, District, Ministry, Policy, SystemReport, UserRole
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def _isoformat(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def dumps(data):
+    """Encode data as compact JSON with sorted keys; dates as ISO 8601"""
+    if orjson is not None:
+        # orjson writes naive datetimes exactly as isoformat() does
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(data, default=_isoformat, sort_keys=True, separators=(',', ':'))
+
+
+def json_response(data, status=200):
+    return current_app.response_class(dumps(data), status=status, mimetype='application/json')
+
+
+class Projection:
+    """The to_dict() fields of a model as labelled columns.
+
+    `fields` maps each output name to a column, in to_dict() order. Columns
+    of other tables need an entry in `joins`: table -> ON clause, joined as
+    an outer join only when one of their fields is requested. Fields named
+    in `deferred` are left out unless asked for.
+    """
+
+    def __init__(self, model, order_column, fields, joins=None, deferred=()):
+        self.model = model
+        self.order_column = order_column
+        self.fields = fields
+        self.joins = joins or {}
+        self.deferred = set(deferred)
+
+    def _names(self, value):
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            raise FieldsError(f"Unknown fields: {', '.join(unknown) or value}")
+        return set(names)
+
+    def parse_fields(self, value, include=None):
+        """Field names from the `fields` and `include` parameters.
+
+        Without `fields`, every field that is not deferred; `include` adds
+        deferred fields to that default.
+        """
+        if value:
+            names = self._names(value)
+        else:
+            names = set(self.fields) - self.deferred
+        if include:
+            names |= self._names(include)
+        return [name for name in self.fields if name in names]
+
+    def select(self, query, names):
+        """Rows of `query` holding the named columns.
+
+        The id and order column are always selected, for keyset cursors,
+        under their own names.
+        """
+        selected = list(dict.fromkeys(['id', self.order_column.key] + names))
+        columns = [self.fields[name].label(name) for name in selected]
+
+        for table, onclause in self.joins.items():
+            if any(self.fields[name].table is table for name in selected):
+                query = query.outerjoin(table, onclause)
+
+        return query.with_entities(*columns)
+
+    def serializer(self, names):
+        """Function turning a selected row into the requested fields"""
+        def serialize(row):
+            mapping = row._mapping
+            return {name: mapping[name] for name in names}
+        return serialize
+
+
+COMPLAINT = Projection(Complaint, Complaint.created_at, {
+    'id': Complaint.id,
+    'citizen_id': Complaint.citizen_id,
+    'citizen_name': Citizen.name,
+    'ministry_id': Complaint.ministry_id,
+    'ministry_name': Ministry.name,
+    'district_id': Complaint.district_id,
+    'district_name': District.name,
+    'category': Complaint.category,
+    'description': Complaint.description,
+    'location': Complaint.location,
+    'priority': Complaint.priority,
+    'status': Complaint.status,
+    'tracking_number': Complaint.tracking_number,
+    'assigned_to': Complaint.assigned_to,
+    'created_at': Complaint.created_at,
+    'resolved_at': Complaint.resolved_at,
+    'resolution_notes': Complaint.resolution_notes
+}, joins={
+    Citizen.__table__: Complaint.citizen_id == Citizen.id,
+    Ministry.__table__: Complaint.ministry_id == Ministry.id,
+    District.__table__: Complaint.district_id == District.id
+}, deferred=('description', 'resolution_notes'))
+
+CITIZEN = Projection(Citizen, Citizen.created_at, {
+    'id': Citizen.id,
+    'nin': Citizen.nin,
+    'name': Citizen.name,
+    'phone': Citizen.phone,
+    'email': Citizen.email,
+    'district_id': Citizen.district_id,
+    'district_name': District.name,
+    'role_id': Citizen.role_id,
+    'role_name': UserRole.role_name,
+    'is_active': Citizen.is_active,
+    'email_verified': Citizen.email_verified,
+    'created_at': Citizen.created_at,
+    'last_login': Citizen.last_login
+}, joins={
+    District.__table__: Citizen.district_id == District.id,
+    UserRole.__table__: Citizen.role_id == UserRole.id
+})
+
+POLICY = Projection(Policy, Policy.created_at, {
+    'id': Policy.id,
+    'title': Policy.title,
+    'description': Policy.description,
+    'category': Policy.category,
+    'ministry_id': Policy.ministry_id,
+    'ministry_name': Ministry.name,
+    'status': Policy.status,
+    'created_by': Policy.created_by,
+    'created_at': Policy.created_at,
+    'deadline': Policy.deadline,
+    'published_at': Policy.published_at
+}, joins={
+    Ministry.__table__: Policy.ministry_id == Ministry.id
+})
+
+SYSTEM_REPORT = Projection(SystemReport, SystemReport.generated_at, {
+    'id': SystemReport.id,
+    'report_title': SystemReport.report_title,
+    'report_type': SystemReport.report_type,
+    'report_data': SystemReport.report_data,
+    'generated_by': SystemReport.generated_by,
+    'generated_at': SystemReport.generated_at
+}, deferred=('report_data',))
@@ -0,0 +1,136 @@
+"""
+Test setup: the app runs against an in-memory sqlite database, with the
+SQL Server functions the queries use (DATEDIFF, DATEPART units) shimmed.
+Run from the backend folder with `python -m pytest`.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+Config.SQLALCHEMY_DATABASE_URI = 'sqlite://'
+Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+Config.CACHE_WARM_ENABLED = False
+Config.RATE_LIMIT_ENABLED = False
+Config.PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+# Read the user on every request so query counts do not depend on test order
+Config.PRINCIPAL_CACHE_TTL = 0
+
+import pytest
+from sqlalchemy import event, Date
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import TextClause, Cast
+
+
+@event.listens_for(Engine, 'connect')
+def _sqlite_functions(connection, record):
+    def datediff(unit, start, end):
+        if start is None or end is None:
+            return None
+        return (datetime.fromisoformat(str(end)).date() - datetime.fromisoformat(str(start)).date()).days
+    connection.create_function('datediff', 3, datediff)
+
+
+@compiles(TextClause, 'sqlite')
+def _date_unit(element, compiler, **kw):
+    # DATEDIFF(day, ...) takes a bare unit keyword on SQL Server
+    if element.text in ('day', 'month', 'year'):
+        return f"'{element.text}'"
+    return compiler.visit_textclause(element, **kw)
+
+
+@compiles(Cast, 'sqlite')
+def _cast_date(element, compiler, **kw):
+    if isinstance(element.type, Date):
+        return f'date({compiler.process(element.clause, **kw)})'
+    return compiler.visit_cast(element, **kw)
+
+
+from app import app as flask_app
+from models import (db, District, Ministry, UserRole, Citizen, Complaint, Policy,
+                    SystemReport, PolicyFeedback)
+from auth import generate_token, principal_cache
+from cache import response_cache
+
+STATUSES = ('Pending', 'In Progress', 'Resolved')
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+    response_cache.invalidate()
+    principal_cache.invalidate()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def seed(app):
+    """Create reference data and `count` rows in each listed table; returns
+    the admin's auth headers and ids"""
+    def seed(count):
+        districts = [District(name='Kampala', region='Central'), District(name='Gulu', region='Northern')]
+        ministries = [Ministry(name='Ministry of Health', code='MOH'), Ministry(name='Ministry of Works', code='MOWT')]
+        db.session.add_all(districts + ministries)
+        db.session.add_all([UserRole(id=role_id, role_name=name)
+                            for role_id, name in ((1, 'Citizen'), (2, 'Admin'), (3, 'Official'), (4, 'Chairperson'))])
+        db.session.flush()
+
+        admin = Citizen(nin='ADMIN', name='Admin', phone='0799999999', email='admin@example.org',
+                        district_id=districts[0].id, role_id=2, password_hash='-')
+        citizens = [
+            Citizen(nin=f'N{i}', name=f'Citizen {i}', phone=f'07{i:08d}', district_id=districts[i % 2].id,
+                    role_id=1, password_hash='-')
+            for i in range(count)
+        ]
+        db.session.add_all([admin] + citizens)
+        db.session.flush()
+
+        started = datetime(2026, 1, 1)
+        db.session.add_all([
+            Complaint(
+                citizen_id=citizens[i % 2].id, ministry_id=ministries[i % 2].id, district_id=districts[i % 2].id,
+                category='Water', description=f'Borehole {i} has been broken for weeks', location='Gulu',
+                priority='High', status=STATUSES[i % 3], tracking_number=f'CMP-{i:08d}',
+                created_at=started + timedelta(days=i), resolution_notes='Repaired' if i % 3 == 2 else None,
+                resolved_at=started + timedelta(days=i + 3) if i % 3 == 2 else None
+            )
+            for i in range(count)
+        ])
+        policies = [
+            Policy(title=f'Policy {i}', description='Draft policy text', category='Health',
+                   ministry_id=ministries[0].id, status='Active', created_by=admin.id)
+            for i in range(count)
+        ]
+        db.session.add_all(policies)
+        db.session.flush()
+        db.session.add_all([
+            PolicyFeedback(policy_id=policies[i].id, citizen_id=citizens[i].id,
+                           feedback_text='Good policy', sentiment='Positive', themes='health')
+            for i in range(count)
+        ])
+        db.session.add_all([
+            SystemReport(report_title=f'Report {i}', report_type='Monthly', report_data='{"large": true}',
+                         generated_by=admin.id)
+            for i in range(count)
+        ])
+        db.session.commit()
+
+        return {
+            'headers': {'Authorization': 'Bearer ' + generate_token(admin.id, admin.role_id, admin.district_id)},
+            'admin_id': admin.id,
+            'citizen_id': citizens[0].id if citizens else None
+        }
+    return seed
@@ -0,0 +1,21 @@
+"""
+Public analytics endpoints.
+"""
+
+from models import db, Complaint
+
+
+def test_unresolved_by_ministry_ignores_complaints_without_status(client, seed):
+    seed(6)
+    # Ministry 1 has complaints 1, 3 and 5 (Pending, Resolved, In Progress),
+    # ministry 2 complaints 2, 4 and 6 (In Progress, Pending, Resolved)
+    db.session.execute(db.update(Complaint).where(Complaint.id == 1).values(status=None))
+    db.session.commit()
+
+    response = client.get('/api/analytics/unresolved-by-ministry')
+
+    assert response.status_code == 200
+    assert response.get_json() == [
+        {'ministry': 'Ministry of Works', 'unresolved_count': 2},
+        {'ministry': 'Ministry of Health', 'unresolved_count': 1}
+    ]
@@ -0,0 +1,65 @@
+"""
+Role and status changes, and the token revocations of stateless auth.
+"""
+
+import pytest
+
+from auth import generate_token, revocations
+from config import Config
+from models import db, TokenRevocation
+
+
+@pytest.fixture
+def stateless(monkeypatch):
+    monkeypatch.setattr(Config, 'AUTH_STATELESS', True)
+    revocations.revoked.clear()
+    revocations.synced_at = None
+    yield
+    revocations.revoked.clear()
+    revocations.synced_at = None
+
+
+def _complaints(client, citizen_id, token):
+    return client.get(f'/api/feedback/complaint/user/{citizen_id}',
+                      headers={'Authorization': 'Bearer ' + token})
+
+
+def test_role_change_without_stateless_auth_records_no_revocation(client, seed):
+    seeded = seed(2)
+
+    response = client.put(f"/api/admin/users/{seeded['citizen_id']}/role",
+                          headers=seeded['headers'], json={'role_id': 3})
+
+    assert response.status_code == 200
+    assert db.session.query(TokenRevocation).count() == 0
+
+
+def test_status_change_revokes_earlier_tokens_only(client, seed, stateless):
+    seeded = seed(2)
+    citizen_id = seeded['citizen_id']
+    old_token = generate_token(citizen_id, 1, 1)
+
+    response = client.put(f'/api/admin/users/{citizen_id}/status',
+                          headers=seeded['headers'], json={'is_active': True})
+    # Signed in again within the same second as the revocation
+    new_token = generate_token(citizen_id, 1, 1)
+
+    assert response.status_code == 200
+    assert db.session.query(TokenRevocation).count() == 1
+    assert _complaints(client, citizen_id, old_token).status_code == 401
+    assert _complaints(client, citizen_id, new_token).status_code == 200
+
+
+def test_revocations_read_from_the_database(client, seed, stateless):
+    seeded = seed(2)
+    citizen_id = seeded['citizen_id']
+    old_token = generate_token(citizen_id, 1, 1)
+    client.put(f'/api/admin/users/{citizen_id}/role', headers=seeded['headers'], json={'role_id': 1})
+    new_token = generate_token(citizen_id, 1, 1)
+
+    # As another process would see them
+    revocations.revoked.clear()
+    revocations.sync()
+
+    assert _complaints(client, citizen_id, old_token).status_code == 401
+    assert _complaints(client, citizen_id, new_token).status_code == 200
@@ -0,0 +1,40 @@
+"""
+Bulk triage through PUT /api/admin/complaints/assign.
+"""
+
+import pytest
+
+from config import Config
+
+
+def test_filter_matching_too_many_complaints(client, seed, monkeypatch):
+    seeded = seed(20)
+    monkeypatch.setattr(Config, 'BULK_TRIAGE_MAX_COMPLAINTS', 5)
+
+    response = client.put('/api/admin/complaints/assign', headers=seeded['headers'],
+                          json={'filter': {'status': 'Pending'}, 'status': 'In Progress'})
+
+    assert response.status_code == 400
+    assert 'more than 5' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('value', ['abc', [1], {'id': 1}, True, 1.5])
+def test_ministry_id_must_be_an_id(client, seed, value):
+    seeded = seed(2)
+
+    response = client.put('/api/admin/complaints/assign', headers=seeded['headers'],
+                          json={'ids': [1, 2], 'ministry_id': value})
+
+    assert response.status_code == 400
+
+
+def test_bulk_update(client, seed):
+    seeded = seed(3)
+
+    response = client.put('/api/admin/complaints/assign', headers=seeded['headers'],
+                          json={'ids': [1, 2, 99], 'ministry_id': 2, 'status': 'In Progress'})
+
+    assert response.status_code == 200
+    assert response.get_json()['results'] == [
+        {'id': 1, 'result': 'updated'}, {'id': 2, 'result': 'updated'}, {'id': 99, 'result': 'not_found'}
+    ]
@@ -0,0 +1,39 @@
+"""
+ResponseCache stays within max_entries.
+"""
+
+from cache import ResponseCache
+
+
+def test_full_cache_evicts_oldest_entries():
+    cache = ResponseCache(max_entries=8)
+
+    for i in range(100):
+        cache.get_or_compute(('key', i), 60, lambda: i)
+
+    assert len(cache._entries) <= 8
+    assert len(cache._key_locks) <= 8
+    assert cache.get(('key', 99)) == 99
+    assert cache.get(('key', 0)) is None
+
+
+def test_rewritten_entry_is_kept_over_older_ones():
+    cache = ResponseCache(max_entries=4)
+    for i in range(4):
+        cache.set(i, i, 60)
+
+    cache.set(0, 'new', 60)
+    cache.set(4, 4, 60)
+
+    assert cache.get(0) == 'new'
+    assert cache.get(1) is None
+
+
+def test_lookups_that_compute_nothing_do_not_keep_locks():
+    cache = ResponseCache(max_entries=4)
+
+    for i in range(50):
+        cache.get_or_compute(('missing', i), 60, lambda: None)
+        cache.set(('key', i), i, 60)
+
+    assert len(cache._key_locks) <= 4
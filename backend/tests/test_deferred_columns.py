@@ -0,0 +1,58 @@
+"""
+List and aggregate paths never fetch the large text columns
+(complaint descriptions and resolution notes, feedback text, report data).
+"""
+
+import pytest
+
+from ai.predictions import PredictiveAnalytics
+from instrumentation import assert_columns_not_selected
+from models import Complaint, PolicyFeedback, SystemReport
+
+TEXT_COLUMNS = (
+    Complaint.description, Complaint.resolution_notes,
+    PolicyFeedback.feedback_text, SystemReport.report_data
+)
+
+
+@pytest.mark.parametrize('url', [
+    '/api/admin/complaints',
+    '/api/admin/complaints?status=Resolved',
+    '/api/admin/users',
+    '/api/admin/reports',
+    '/api/feedback/complaint/user/{citizen_id}',
+    '/api/policies/',
+    '/api/analytics/complaints-by-ministry',
+    '/api/analytics/complaints-by-district',
+    '/api/analytics/complaints-by-category',
+    '/api/analytics/ministry-performance',
+    '/api/analytics/unresolved-by-ministry',
+])
+def test_list_and_aggregate_endpoints_skip_text_columns(client, seed, url):
+    seeded = seed(6)
+
+    with assert_columns_not_selected(*TEXT_COLUMNS):
+        response = client.get(url.format(citizen_id=seeded['citizen_id']), headers=seeded['headers'])
+
+    assert response.status_code == 200
+
+
+def test_complaint_list_includes_text_fields_on_request(client, seed):
+    seeded = seed(6)
+
+    default = client.get('/api/admin/complaints', headers=seeded['headers']).get_json()
+    included = client.get('/api/admin/complaints?include=description,resolution_notes',
+                          headers=seeded['headers']).get_json()
+
+    assert all('description' not in item for item in default)
+    assert all(item['description'].startswith('Borehole') for item in included)
+    assert all('resolution_notes' in item for item in included)
+
+
+def test_systemic_issues_select_descriptions_only(app, seed):
+    seed(12)
+
+    with assert_columns_not_selected(Complaint.resolution_notes):
+        issues = PredictiveAnalytics.identify_systemic_issues()
+
+    assert issues and 'borehole' in issues[0]['common_keywords']
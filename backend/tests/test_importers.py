@@ -0,0 +1,75 @@
+"""
+Bulk import through POST /api/admin/import/<kind>.
+"""
+
+from werkzeug.security import check_password_hash
+
+from config import Config
+from models import db, Complaint, Citizen
+from passwords import password_hasher, HashingOverloaded
+
+
+def test_complaint_timestamps_with_offsets(client, seed):
+    seeded = seed(0)
+    body = (
+        'description,district,created_at,resolved_at,status\n'
+        'Water has been off for a week,Kampala,2026-03-01T10:00:00+03:00,2026-03-02T09:00:00Z,Resolved\n'
+        'Potholes on the main road,Gulu,2026-03-01T10:00:00,,Pending\n'
+    )
+
+    response = client.post('/api/admin/import/complaints?format=csv', headers=seeded['headers'], data=body)
+
+    assert response.status_code == 200, response.get_json()
+    result = response.get_json()
+    assert result['imported'] == 2, result
+    created = db.session.scalars(db.select(Complaint.created_at).order_by(Complaint.id)).all()
+    assert [value.isoformat() for value in created] == ['2026-03-01T07:00:00', '2026-03-01T10:00:00']
+
+
+def test_citizen_passwords_are_hashed_on_the_shared_pool(client, seed):
+    seeded = seed(0)
+    completed = password_hasher.completed
+    body = 'nin,name,phone,password,district\nCM1,Amina,0711000001,secret1,Gulu\nCM2,Okello,0711000002,secret2,\n'
+
+    response = client.post('/api/admin/import/citizens?format=csv', headers=seeded['headers'], data=body)
+
+    assert response.get_json()['imported'] == 2
+    assert password_hasher.completed == completed + 2
+    password_hash = db.session.scalar(db.select(Citizen.password_hash).where(Citizen.nin == 'CM1'))
+    assert check_password_hash(password_hash, 'secret1')
+
+
+def test_overloaded_citizen_import_reports_what_was_imported(client, seed, monkeypatch):
+    seeded = seed(0)
+    monkeypatch.setattr(Config, 'IMPORT_CHUNK_SIZE', 1)
+    hash_many = password_hasher.hash_many
+    calls = []
+
+    def overloaded_second_time(passwords):
+        calls.append(passwords)
+        if len(calls) == 2:
+            raise HashingOverloaded()
+        return hash_many(passwords)
+    monkeypatch.setattr(password_hasher, 'hash_many', overloaded_second_time)
+    body = 'nin,name,phone,password\nCM1,Amina,0711000001,secret1\nCM2,Okello,0711000002,secret2\n'
+
+    response = client.post('/api/admin/import/citizens?format=csv', headers=seeded['headers'], data=body)
+
+    assert response.status_code == 503
+    result = response.get_json()
+    assert result['imported'] == 1
+    assert result['stopped']['line'] == 3
+    assert db.session.query(Citizen).filter(Citizen.nin.in_(['CM1', 'CM2'])).count() == 1
+
+
+def test_citizen_uploads_are_capped(client, seed, monkeypatch):
+    seeded = seed(0)
+    monkeypatch.setattr(Config, 'IMPORT_HTTP_MAX_CITIZENS', 2)
+    body = 'nin,name,phone,password\n' + ''.join(f'CM{i},Citizen {i},07110000{i:02d},secret\n' for i in range(5))
+
+    response = client.post('/api/admin/import/citizens?format=csv', headers=seeded['headers'], data=body)
+
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['imported'] == 2
+    assert result['stopped']['line'] == 4
@@ -0,0 +1,36 @@
+"""
+Spans count queries and rows without changing how results are fetched.
+"""
+
+from sqlalchemy.engine.result import Result
+
+from instrumentation import trace
+from models import db, Complaint
+
+
+def _span_rows(query):
+    with trace('test') as span:
+        result = list(query)
+    return span, result
+
+
+def test_buffered_select_rows_are_counted(app, seed):
+    seed(5)
+
+    span, rows = _span_rows(db.session.query(Complaint.id))
+
+    assert len(rows) == 5
+    assert span.rows == 5
+
+
+def test_streamed_select_is_not_buffered(app, seed, monkeypatch):
+    seed(5)
+    frozen = []
+    freeze = Result.freeze
+    monkeypatch.setattr(Result, 'freeze', lambda self: frozen.append(self) or freeze(self))
+
+    span, rows = _span_rows(db.session.query(Complaint.id).yield_per(2))
+
+    assert len(rows) == 5
+    assert frozen == []
+    assert span.queries == 1
@@ -0,0 +1,33 @@
+"""
+List endpoints run a fixed number of queries per page, however many rows
+the page holds: one to read the signed-in user and one for the page.
+"""
+
+import pytest
+
+from instrumentation import assert_query_count
+
+ENDPOINTS = [
+    ('/api/admin/complaints', 2),
+    ('/api/admin/complaints?status=Pending', 2),
+    ('/api/admin/users', 2),
+    ('/api/admin/users?role=1', 2),
+    ('/api/admin/reports', 2),
+    ('/api/feedback/complaint/user/{citizen_id}', 2),
+    ('/api/policies/', 1),
+]
+
+
+@pytest.mark.parametrize('rows', [2, 30])
+@pytest.mark.parametrize('url,queries', ENDPOINTS)
+def test_list_query_count(client, seed, rows, url, queries):
+    seeded = seed(rows)
+    url = url.format(citizen_id=seeded['citizen_id'])
+
+    with assert_query_count(queries):
+        response = client.get(url, headers=seeded['headers'])
+
+    assert response.status_code == 200
+    body = response.get_json()
+    items = body if isinstance(body, list) else next(v for v in body.values() if isinstance(v, list))
+    assert items
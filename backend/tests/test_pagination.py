@@ -0,0 +1,47 @@
+"""
+Keyset pagination of list endpoints.
+"""
+
+from urllib.parse import urlsplit, parse_qs
+
+from config import Config
+
+
+def test_unpaged_caller_gets_the_full_list(client, seed):
+    seeded = seed(Config.PAGINATION_DEFAULT_LIMIT + 10)
+
+    response = client.get('/api/admin/users', headers=seeded['headers'])
+
+    assert response.status_code == 200
+    # Every seeded citizen plus the admin
+    assert len(response.get_json()) == Config.PAGINATION_DEFAULT_LIMIT + 11
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_pages_follow_the_cursor(client, seed):
+    seeded = seed(7)
+    seen = []
+    url = '/api/admin/complaints?limit=3'
+
+    while url:
+        response = client.get(url, headers=seeded['headers'])
+        seen.extend(item['id'] for item in response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        url = f'/api/admin/complaints?limit=3&cursor={cursor}' if cursor else None
+
+    assert sorted(seen) == list(range(1, 8))
+    assert len(seen) == 7
+
+
+def test_link_keeps_query_arguments_as_arguments(client, seed):
+    seeded = seed(3)
+
+    response = client.get('/api/admin/users?limit=1&endpoint=x&_external=1&user_id=3',
+                          headers=seeded['headers'])
+
+    assert response.status_code == 200
+    link = urlsplit(response.headers['Link'][1:].split('>')[0])
+    assert link.path == '/api/admin/users'
+    args = parse_qs(link.query)
+    assert args['endpoint'] == ['x'] and args['_external'] == ['1'] and args['user_id'] == ['3']
+    assert args['cursor'] == [response.headers['X-Next-Cursor']]
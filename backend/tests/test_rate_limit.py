@@ -0,0 +1,47 @@
+"""
+Sliding-window rate limit counters.
+"""
+
+import pytest
+
+from rate_limit import MemoryBackend, RateLimitBackend
+
+
+def test_flood_of_new_keys_stays_within_max_keys():
+    backend = MemoryBackend(shards=8, max_keys=800)
+
+    for i in range(20000):
+        backend.hit(f'ussd:07{i:08d}', 5, 60)
+
+    stats = backend.stats()
+    assert stats['keys'] <= 800
+    assert stats['evicted'] >= 20000 - 800
+
+
+def test_active_key_survives_a_flood():
+    backend = MemoryBackend(shards=1, max_keys=100)
+
+    for i in range(1000):
+        assert backend.hit('login:victim', 2000, 60)[0]
+        backend.hit(f'login:N{i}', 5, 60)
+
+    # The key that keeps being used is never the least recently used one
+    allowed, _ = backend.hit('login:victim', 1000, 60)
+    assert not allowed
+
+
+def test_limit_is_enforced():
+    backend = MemoryBackend()
+
+    results = [backend.hit('register:10.0.0.1', 3, 60)[0] for _ in range(5)]
+
+    assert results == [True, True, True, False, False]
+
+
+def test_backend_without_hit_fails_when_constructed():
+    class Incomplete(RateLimitBackend):
+        def stats(self):
+            return {}
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,20 @@
+"""
+Complaint search (GET /api/admin/complaints/search).
+"""
+
+from collections import namedtuple
+
+import routes.admin
+
+Ranked = namedtuple('Ranked', 'complaint_id score')
+
+
+def test_complaints_deleted_after_ranking_are_skipped(client, seed, monkeypatch):
+    seeded = seed(3)
+    monkeypatch.setattr(routes.admin, 'rank_complaints',
+                        lambda terms, conditions, limit, offset: [Ranked(2, 1.5), Ranked(999, 1.2), Ranked(1, 0.7)])
+
+    response = client.get('/api/admin/complaints/search?q=borehole', headers=seeded['headers'])
+
+    assert response.status_code == 200
+    assert [(item['id'], item['score']) for item in response.get_json()] == [(2, 1.5), (1, 0.7)]
@@ -0,0 +1,59 @@
+"""
+Snapshots of USSD dialogues in progress.
+"""
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import ussd_sessions
+from models import db, USSDSession
+from ussd_sessions import MemorySessionStore, SessionState, SessionStore, snapshot_sessions
+
+
+@pytest.fixture
+def store(app, monkeypatch):
+    store = MemorySessionStore()
+    monkeypatch.setattr(ussd_sessions, 'session_store', store)
+    return store
+
+
+def test_failed_snapshot_is_retried(store, monkeypatch):
+    store.save(SessionState('AT-1', '0711000001', current_menu='complaint_category'))
+
+    persist_sessions = ussd_sessions.persist_sessions
+    failures = [OperationalError('INSERT', {}, Exception('connection lost'))]
+
+    def flaky(rows):
+        if failures:
+            raise failures.pop()
+        persist_sessions(rows)
+    monkeypatch.setattr(ussd_sessions, 'persist_sessions', flaky)
+
+    with pytest.raises(OperationalError):
+        snapshot_sessions()
+
+    assert snapshot_sessions() == 1
+    assert db.session.scalar(db.select(USSDSession.current_menu)) == 'complaint_category'
+    assert snapshot_sessions() == 0
+
+
+def test_ended_sessions_are_not_restored(store):
+    store.save(SessionState('AT-1', '0711000001'))
+    rows = store.take_changed()
+    store.discard('AT-1')
+
+    store.restore_changed([row['session_id'] for row in rows])
+
+    assert store.take_changed() == []
+
+
+def test_store_without_save_fails_when_constructed():
+    class Incomplete(SessionStore):
+        def get(self, session_id):
+            return None
+
+        def discard(self, session_id):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
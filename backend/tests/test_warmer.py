@@ -0,0 +1,39 @@
+"""
+The background warmer: cached warm jobs and periodic tasks.
+"""
+
+from cache import ResponseCache
+from warmer import CacheWarmer
+
+
+def test_periodic_tasks_store_nothing_and_ignore_the_job_list(app):
+    cache = ResponseCache()
+    warmer = CacheWarmer(cache)
+    calls = []
+    warmer.register('analytics.widget', lambda: {'total': 1}, key=lambda: ('warm', 'widget', 1))
+    warmer.register_task('sync', lambda: calls.append(1) or {'synced': 1})
+    warmer.configure(False, 60, 0, scheduled=['analytics.widget'])
+
+    warmer.run_tasks(app)
+    warmer.run_tasks(app)
+
+    assert calls == [1]
+    assert cache.stats()['entries'] == 0
+    assert [task['name'] for task in warmer.status()['tasks']] == ['sync']
+
+    warmer.run_tasks(app, force=True)
+    assert calls == [1, 1]
+
+
+def test_warmer_thread_starts_for_tasks_when_warming_is_disabled(app, monkeypatch):
+    warmer = CacheWarmer(ResponseCache())
+    warmer.configure(False, 60, 0)
+    started = []
+    monkeypatch.setattr('threading.Thread.start', lambda thread: started.append(thread.name))
+
+    warmer.ensure_started(app)
+    assert started == []
+
+    warmer.register_task('sync', lambda: None)
+    warmer.ensure_started(app)
+    assert started == ['cache-warmer']
@@ -0,0 +1,144 @@
+"""
+Bulk complaint triage: one status or assignment change applied to many
+complaints in a single transaction.
+
+Complaints are read and locked with a set-based SELECT per chunk of ids and
+changed with one UPDATE per chunk. A chairperson's district is part of the
+WHERE clause of both, so complaints outside it are never read or written.
+Rollup buckets and dashboard counters are adjusted once for the whole batch,
+and the search index is rewritten when resolution notes change.
+"""
+
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from config import Config
+from models import db, Complaint, Ministry, Citizen
+from rollups import rollup_snapshot, record_complaints_changed
+from search import index_complaints
+from events import STATUS_COUNTERS, complaints_bulk_updated
+
+# Request fields a bulk change may set, as in PUT /complaints/<id>/assign
+TRIAGE_FIELDS = ('ministry_id', 'status', 'assigned_to', 'resolution_notes')
+
+# Columns read before the update: the rollup snapshot plus the id
+SNAPSHOT_COLUMNS = (
+    Complaint.id, Complaint.ministry_id, Complaint.district_id, Complaint.category,
+    Complaint.status, Complaint.priority, Complaint.created_at, Complaint.resolved_at
+)
+
+
+class TriageError(ValueError):
+    pass
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def triage_values(data):
+    """Column values for a bulk change, with the same rules as the single
+    complaint endpoint. Referenced ministry and assignee must exist."""
+    values = {}
+
+    if data.get('ministry_id') is not None:
+        if type(data['ministry_id']) is not int:
+            raise TriageError('ministry_id must be a ministry id')
+        if db.session.get(Ministry, data['ministry_id']) is None:
+            raise TriageError(f"Ministry {data['ministry_id']} does not exist")
+        values['ministry_id'] = data['ministry_id']
+
+    if 'status' in data:
+        if data['status'] not in STATUS_COUNTERS:
+            raise TriageError(f"status must be one of: {', '.join(STATUS_COUNTERS)}")
+        values['status'] = data['status']
+
+        if data['status'] == 'Resolved':
+            values['resolved_at'] = datetime.utcnow()
+            if 'resolution_notes' in data:
+                values['resolution_notes'] = data['resolution_notes']
+
+    if 'assigned_to' in data:
+        if data['assigned_to'] is not None and type(data['assigned_to']) is not int:
+            raise TriageError('assigned_to must be a user id or null')
+        if data['assigned_to'] is not None and db.session.get(Citizen, data['assigned_to']) is None:
+            raise TriageError(f"User {data['assigned_to']} does not exist")
+        values['assigned_to'] = data['assigned_to']
+
+    if not values:
+        raise TriageError(f"Nothing to change; give at least one of: {', '.join(TRIAGE_FIELDS)}")
+    return values
+
+
+def _locked_rows(conditions):
+    return db.session.execute(
+        select(*SNAPSHOT_COLUMNS).where(*conditions).order_by(Complaint.id).with_for_update()
+    ).all()
+
+
+def _target_rows(ids, conditions, scope):
+    """Rows to change and the result for each requested id that is skipped"""
+    skipped = {}
+    if ids is None:
+        rows = db.session.execute(
+            select(*SNAPSHOT_COLUMNS).where(*conditions, *scope)
+            .order_by(Complaint.id).limit(Config.BULK_TRIAGE_MAX_COMPLAINTS + 1).with_for_update()
+        ).all()
+        if len(rows) > Config.BULK_TRIAGE_MAX_COMPLAINTS:
+            raise TriageError(f'The filter matches more than {Config.BULK_TRIAGE_MAX_COMPLAINTS} complaints')
+        return rows, skipped
+
+    rows = []
+    for chunk in _chunks(ids, Config.BULK_TRIAGE_CHUNK_SIZE):
+        found = _locked_rows([Complaint.id.in_(chunk), *scope])
+        rows.extend(found)
+
+        missing = set(chunk) - {row.id for row in found}
+        if missing:
+            # Tell complaints outside the caller's district from unknown ids
+            existing = set(db.session.scalars(select(Complaint.id).where(Complaint.id.in_(missing))))
+            for complaint_id in missing:
+                skipped[complaint_id] = 'forbidden' if complaint_id in existing else 'not_found'
+    return rows, skipped
+
+
+def bulk_triage(values, ids=None, conditions=(), district_id=None):
+    """Apply `values` to the complaints with the given ids, or to those
+    matching `conditions`, optionally limited to one district.
+
+    Returns (updated count, {id: 'updated' | 'not_found' | 'forbidden'}).
+    Everything is committed together or not at all.
+    """
+    scope = [Complaint.district_id == district_id] if district_id is not None else []
+
+    try:
+        rows, results = _target_rows(ids, conditions, scope)
+
+        changed_ids = [row.id for row in rows]
+        for chunk in _chunks(changed_ids, Config.BULK_TRIAGE_CHUNK_SIZE):
+            db.session.execute(
+                update(Complaint).where(Complaint.id.in_(chunk), *scope).values(**values),
+                execution_options={'synchronize_session': False}
+            )
+
+        changes = []
+        for row in rows:
+            previous = rollup_snapshot(row)
+            current = dict(previous, **{name: values[name] for name in previous if name in values})
+            changes.append((previous, current))
+        record_complaints_changed(changes)
+        if 'resolution_notes' in values:
+            index_complaints(changed_ids)
+
+        if rows:
+            complaints_bulk_updated(Counter(row.status for row in rows), values.get('status'), len(rows))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    results.update((complaint_id, 'updated') for complaint_id in changed_ids)
+    return len(changed_ids), results
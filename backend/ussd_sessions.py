@@ -0,0 +1,191 @@
+"""
+Session state of in-progress USSD dialogues.
+
+A dialogue is a few hops, each a request that has to be answered within the
+gateway's ~2 second budget, so its state lives in a session store instead
+of the USSDSessions table: a hop that only moves through the menus does no
+database work. The USSDSessions row is written when a dialogue completes a
+transaction (complaint, rating or registration), in the same commit as the
+data it created, and, with USSD_SESSION_SNAPSHOTS, for dialogues still in
+progress by a background job.
+
+The default store keeps sessions in this process for USSD_SESSION_TTL
+seconds after their last hop, so all hops of a dialogue must reach the same
+process. Deployments that cannot route them that way can share sessions by
+setting USSD_SESSION_STORE to "package.module:Class" naming a SessionStore.
+"""
+
+import importlib
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from sqlalchemy import select, insert, update
+
+from config import Config
+from models import db, USSDSession
+from warmer import cache_warmer
+
+logger = logging.getLogger('citizenvoice.ussd')
+
+
+class SessionState:
+    """The USSDSession fields a dialogue reads and changes"""
+
+    __slots__ = ('session_id', 'phone_number', 'citizen_id', 'current_menu', 'data', 'created_at', 'updated_at')
+
+    def __init__(self, session_id, phone_number, citizen_id=None, current_menu='main', data='{}', created_at=None):
+        self.session_id = session_id
+        self.phone_number = phone_number
+        self.citizen_id = citizen_id
+        self.current_menu = current_menu
+        self.data = data
+        self.created_at = created_at or datetime.utcnow()
+        self.updated_at = self.created_at
+
+    def to_row(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SessionStore(ABC):
+    """Where sessions live between hops"""
+
+    @abstractmethod
+    def get(self, session_id):
+        pass
+
+    @abstractmethod
+    def save(self, state):
+        pass
+
+    @abstractmethod
+    def discard(self, session_id):
+        pass
+
+    def take_changed(self):
+        """Rows of the sessions changed since the last call, for snapshots"""
+        return []
+
+    def restore_changed(self, session_ids):
+        """Mark sessions taken by take_changed() as changed again, after
+        their snapshot failed"""
+
+    def stats(self):
+        return {}
+
+
+class MemorySessionStore(SessionStore):
+    """Sessions in this process, expiring USSD_SESSION_TTL seconds after
+    their last hop"""
+
+    def __init__(self):
+        self.sessions = {}
+        self.changed = set()
+        self.expired = 0
+        self.next_purge = 0
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            if now >= self.next_purge:
+                self._purge(now)
+            entry = self.sessions.get(session_id)
+            if entry is None or entry[1] <= now:
+                return None
+            return entry[0]
+
+    def save(self, state):
+        state.updated_at = datetime.utcnow()
+        with self._lock:
+            self.sessions[state.session_id] = (state, time.monotonic() + Config.USSD_SESSION_TTL)
+            self.changed.add(state.session_id)
+
+    def discard(self, session_id):
+        with self._lock:
+            self.sessions.pop(session_id, None)
+            self.changed.discard(session_id)
+
+    def _purge(self, now):
+        for session_id, (_, expires) in list(self.sessions.items()):
+            if expires <= now:
+                del self.sessions[session_id]
+                self.changed.discard(session_id)
+                self.expired += 1
+        self.next_purge = now + Config.USSD_SESSION_TTL
+
+    def take_changed(self):
+        with self._lock:
+            rows = [self.sessions[session_id][0].to_row() for session_id in self.changed]
+            self.changed.clear()
+        return rows
+
+    def restore_changed(self, session_ids):
+        with self._lock:
+            # Sessions that ended or expired meanwhile have nothing to save
+            self.changed.update(session_id for session_id in session_ids if session_id in self.sessions)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self.sessions),
+                'unsaved': len(self.changed),
+                'expired': self.expired
+            }
+
+
+def _load_store(name):
+    if name == 'memory':
+        logger.warning('USSD sessions are kept in this process (USSD_SESSION_STORE=memory); '
+                       'dialogues break unless every hop reaches the same server process')
+        return MemorySessionStore()
+    module, _, cls = name.partition(':')
+    store = getattr(importlib.import_module(module), cls)
+    if not issubclass(store, SessionStore):
+        raise TypeError(f'USSD_SESSION_STORE {name} is not a SessionStore')
+    return store()
+
+
+session_store = _load_store(Config.USSD_SESSION_STORE)
+
+
+def persist_sessions(rows):
+    """Insert or update the USSDSessions rows of sessions, in the current
+    transaction"""
+    if not rows:
+        return
+    ids = dict(db.session.execute(
+        select(USSDSession.session_id, USSDSession.id)
+        .where(USSDSession.session_id.in_([row['session_id'] for row in rows]))
+    ).all())
+
+    new_rows = [row for row in rows if row['session_id'] not in ids]
+    changed_rows = [dict(row, id=ids[row['session_id']]) for row in rows if row['session_id'] in ids]
+    for row in changed_rows:
+        del row['created_at']
+    if new_rows:
+        db.session.execute(insert(USSDSession.__table__), new_rows)
+    if changed_rows:
+        db.session.execute(update(USSDSession), changed_rows)
+
+
+def snapshot_sessions(batch_size=500):
+    """Write the sessions changed since the last snapshot"""
+    rows = session_store.take_changed()
+    try:
+        for start in range(0, len(rows), batch_size):
+            persist_sessions(rows[start:start + batch_size])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # Written by the next snapshot instead
+        session_store.restore_changed([row['session_id'] for row in rows])
+        raise
+    return len(rows)
+
+
+if Config.USSD_SESSION_SNAPSHOTS:
+    # Snapshots of dialogues in progress, written behind the requests
+    cache_warmer.register_task('ussd.snapshots', snapshot_sessions)
@@ -0,0 +1,204 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+
+from cache import response_cache
+
+logger = logging.getLogger('citizenvoice.warmer')
+
+
+class WarmJob:
+    """One expensive result the warmer keeps in the response cache"""
+
+    __slots__ = ('name', 'compute', 'key', 'versioned', 'last_run', 'last_duration_ms', 'last_error',
+                 'runs', 'unchanged')
+
+    def __init__(self, name, compute, key):
+        self.name = name
+        self.compute = compute
+        self.versioned = key is not None
+        self.key = key or (lambda: ('warm', name))
+        self.last_run = None
+        self.last_duration_ms = None
+        self.last_error = None
+        self.runs = 0
+        self.unchanged = 0
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'runs': self.runs,
+            'unchanged': self.unchanged,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'last_duration_ms': self.last_duration_ms,
+            'last_error': self.last_error
+        }
+
+
+class PeriodicTask:
+    """Background work with no result to cache, e.g. a sync with the database"""
+
+    __slots__ = ('name', 'function', 'interval', 'next_run', 'last_run', 'last_duration_ms', 'last_error', 'runs')
+
+    def __init__(self, name, function, interval):
+        self.name = name
+        self.function = function
+        self.interval = interval
+        self.next_run = 0
+        self.last_run = None
+        self.last_duration_ms = None
+        self.last_error = None
+        self.runs = 0
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'interval': self.interval,
+            'runs': self.runs,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'last_duration_ms': self.last_duration_ms,
+            'last_error': self.last_error
+        }
+
+
+class CacheWarmer:
+    """Background thread that recomputes registered results before they expire.
+
+    Jobs register a compute function and a key function; the key usually
+    embeds a data version, so a result recomputed after a write is stored
+    under the key the next request will ask for. Requests read through get(),
+    which falls back to computing inline on a cold cache.
+
+    Runs are spaced by `interval` +/- `jitter` seconds so several processes do
+    not recompute in lockstep. Entries live for two intervals, so a result is
+    always refreshed before it expires. A job whose key is still cached, i.e.
+    whose data version has not changed, only has its entry extended.
+
+    The same thread runs periodic tasks (register_task), which store nothing
+    and run whether or not cache warming is enabled.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.jobs = {}
+        self.tasks = {}
+        self.enabled = False
+        self.interval = 60
+        self.jitter = 10
+        self.scheduled = None
+        self.started_at = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.running = False
+
+    @property
+    def ttl(self):
+        return 2 * self.interval + self.jitter
+
+    def register(self, name, compute, key=None):
+        """Add a job. `key` returns the cache key for the current data
+        version; without one the key only depends on the job name and the
+        job is recomputed on every run."""
+        self.jobs[name] = WarmJob(name, compute, key)
+
+    def register_task(self, name, function, interval=None):
+        """Call `function` every `interval` seconds (the warm interval by
+        default) in the background thread; its result is discarded"""
+        self.tasks[name] = PeriodicTask(name, function, interval)
+
+    def get(self, name, key=None):
+        """A job's result, from the cache when warm. Pass `key` when the
+        caller already knows the current data version."""
+        job = self.jobs[name]
+        return self.cache.get_or_compute(key if key is not None else job.key(), self.ttl, job.compute)
+
+    def configure(self, enabled, interval, jitter, scheduled=None):
+        """Set the schedule; `scheduled` limits which jobs the thread runs
+        (all by default). Unscheduled jobs are still cached on demand."""
+        self.enabled = enabled
+        self.interval = interval
+        self.jitter = jitter
+        self.scheduled = set(scheduled) if scheduled else None
+
+    def scheduled_jobs(self):
+        return [job for name, job in self.jobs.items() if self.scheduled is None or name in self.scheduled]
+
+    def ensure_started(self, app):
+        """Start the scheduler thread once, from the first request served"""
+        if self._thread is not None or not (self.enabled or self.tasks):
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self.started_at = datetime.utcnow()
+                self._thread = threading.Thread(target=self._loop, args=(app,), name='cache-warmer', daemon=True)
+                self._thread.start()
+
+    def _loop(self, app):
+        next_warm = 0
+        while True:
+            if self.enabled and time.monotonic() >= next_warm:
+                self.run(app)
+                next_warm = time.monotonic() + self.interval + random.uniform(-self.jitter, self.jitter)
+            self.run_tasks(app)
+
+            due = [task.next_run for task in self.tasks.values()]
+            if self.enabled:
+                due.append(next_warm)
+            time.sleep(max(1, min(due, default=time.monotonic() + self.interval) - time.monotonic()))
+
+    def run_tasks(self, app, force=False):
+        """Run the periodic tasks that are due (all of them with `force`)"""
+        for task in self.tasks.values():
+            if not force and time.monotonic() < task.next_run:
+                continue
+            with app.app_context():
+                started = time.perf_counter()
+                try:
+                    task.function()
+                    task.last_error = None
+                except Exception as e:
+                    task.last_error = str(e)
+                    logger.exception('Periodic task %s failed', task.name)
+                task.runs += 1
+                task.last_run = datetime.utcnow()
+                task.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            task.next_run = time.monotonic() + (task.interval or self.interval)
+
+    def run(self, app):
+        """Refresh every scheduled job once"""
+        self.running = True
+        try:
+            for job in self.scheduled_jobs():
+                with app.app_context():
+                    started = time.perf_counter()
+                    try:
+                        key = job.key()
+                        if job.versioned and self.cache.touch(key, self.ttl):
+                            job.unchanged += 1
+                            continue
+                        self.cache.set(key, job.compute(), self.ttl)
+                        job.last_error = None
+                    except Exception as e:
+                        job.last_error = str(e)
+                        logger.exception('Cache warm job %s failed', job.name)
+                    job.runs += 1
+                    job.last_run = datetime.utcnow()
+                    job.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        finally:
+            self.running = False
+
+    def status(self):
+        return {
+            'enabled': self.enabled,
+            'running': self.running,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'interval': self.interval,
+            'jitter': self.jitter,
+            'jobs': [job.to_dict() for job in self.scheduled_jobs()],
+            'tasks': [task.to_dict() for task in self.tasks.values()]
+        }
+
+
+cache_warmer = CacheWarmer(response_cache)
@@ -0,0 +1,13 @@
+-- Track the last modification time of each complaint.
+-- Used as the data version for conditional GETs on /api/analytics.
+USE CitizenVoiceAI;
+GO
+
+ALTER TABLE Complaints ADD updated_at DATETIME NULL;
+GO
+
+UPDATE Complaints SET updated_at = COALESCE(resolved_at, created_at);
+GO
+
+CREATE INDEX ix_Complaints_updated_at ON Complaints (updated_at);
+GO
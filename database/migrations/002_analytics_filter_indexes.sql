@@ -0,0 +1,28 @@
+-- Composite indexes for the filtered /api/analytics endpoints.
+-- Each filter is an equality on one dimension plus a created_at range, so the
+-- dimension leads and created_at follows; included columns cover the aggregates.
+USE CitizenVoiceAI;
+GO
+
+CREATE INDEX ix_Complaints_district_created ON Complaints (district_id, created_at)
+    INCLUDE (ministry_id, category, status, priority, resolved_at);
+GO
+
+CREATE INDEX ix_Complaints_ministry_created ON Complaints (ministry_id, created_at)
+    INCLUDE (district_id, category, status, priority, resolved_at);
+GO
+
+CREATE INDEX ix_Complaints_status_created ON Complaints (status, created_at)
+    INCLUDE (ministry_id, district_id, category, priority, resolved_at);
+GO
+
+CREATE INDEX ix_Complaints_priority_created ON Complaints (priority, created_at)
+    INCLUDE (ministry_id, district_id, category, status, resolved_at);
+GO
+
+CREATE INDEX ix_Complaints_created ON Complaints (created_at);
+GO
+
+CREATE INDEX ix_ServiceRatings_district_created ON ServiceRatings (district_id, created_at)
+    INCLUDE (service_type, rating);
+GO
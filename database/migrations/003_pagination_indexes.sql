@@ -0,0 +1,24 @@
+-- Indexes for keyset pagination of list endpoints, ordered on (created_at, id).
+-- SQL Server appends the clustered key (id) to every nonclustered index, so
+-- (filter column, created_at) indexes already order ties by id. Complaints
+-- filtered by district or status use the indexes from 002.
+USE CitizenVoiceAI;
+GO
+
+CREATE INDEX ix_Complaints_citizen_created ON Complaints (citizen_id, created_at);
+GO
+
+CREATE INDEX ix_Citizens_created ON Citizens (created_at);
+GO
+
+CREATE INDEX ix_Citizens_role_created ON Citizens (role_id, created_at);
+GO
+
+CREATE INDEX ix_Policies_created ON Policies (created_at);
+GO
+
+CREATE INDEX ix_Policies_status_created ON Policies (status, created_at);
+GO
+
+CREATE INDEX ix_SystemReports_generated ON SystemReports (generated_at);
+GO
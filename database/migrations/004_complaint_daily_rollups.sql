@@ -0,0 +1,26 @@
+-- Daily complaint counts per (ministry, district, category, status, priority),
+-- maintained with each complaint write and read by /api/analytics when
+-- ANALYTICS_USE_ROLLUP is on. Fill it with `flask --app app rebuild-rollups`.
+USE CitizenVoiceAI;
+GO
+
+CREATE TABLE ComplaintDailyRollups (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    day DATE NOT NULL,
+    ministry_id INT NULL FOREIGN KEY REFERENCES Ministries(id),
+    district_id INT NULL FOREIGN KEY REFERENCES Districts(id),
+    category NVARCHAR(100) NULL,
+    status NVARCHAR(50) NULL,
+    priority NVARCHAR(20) NULL,
+    complaint_count INT NOT NULL DEFAULT 0,
+    resolved_count INT NOT NULL DEFAULT 0,
+    resolution_days_sum INT NOT NULL DEFAULT 0,
+    CONSTRAINT uq_complaint_rollup_bucket UNIQUE (day, ministry_id, district_id, category, status, priority)
+);
+GO
+
+CREATE INDEX ix_ComplaintDailyRollups_district_day ON ComplaintDailyRollups (district_id, day);
+GO
+
+CREATE INDEX ix_ComplaintDailyRollups_ministry_day ON ComplaintDailyRollups (ministry_id, day);
+GO
@@ -0,0 +1,13 @@
+-- Per-day term counts of complaint descriptions, behind the top-issues
+-- analytics. Fill it with `flask --app app rebuild-keywords`.
+USE CitizenVoiceAI;
+GO
+
+CREATE TABLE ComplaintKeywordCounts (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    day DATE NOT NULL,
+    term NVARCHAR(100) NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    CONSTRAINT uq_complaint_keyword_day_term UNIQUE (day, term)
+);
+GO
@@ -0,0 +1,14 @@
+-- Daily HyperLogLog sketches of active citizens per engagement channel,
+-- behind the engagement metrics of reports. Fill it with
+-- `flask --app app rebuild-sketches`.
+USE CitizenVoiceAI;
+GO
+
+CREATE TABLE EngagementSketches (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    day DATE NOT NULL,
+    channel NVARCHAR(20) NOT NULL,
+    registers VARBINARY(MAX) NOT NULL,
+    CONSTRAINT uq_engagement_sketch_day_channel UNIQUE (day, channel)
+);
+GO
@@ -0,0 +1,23 @@
+-- Inverted index of complaint descriptions, locations and resolution notes,
+-- behind GET /api/admin/complaints/search. Fill it with
+-- `flask --app app rebuild-search-index`.
+USE CitizenVoiceAI;
+GO
+
+-- Clustered on (term, complaint_id) so a term's postings are one range seek
+CREATE TABLE ComplaintSearchTerms (
+    term NVARCHAR(100) NOT NULL,
+    complaint_id INT NOT NULL FOREIGN KEY REFERENCES Complaints(id),
+    frequency INT NOT NULL,
+    CONSTRAINT pk_complaint_search_terms PRIMARY KEY CLUSTERED (term, complaint_id)
+);
+GO
+
+CREATE INDEX ix_ComplaintSearchTerms_complaint ON ComplaintSearchTerms (complaint_id);
+GO
+
+CREATE TABLE ComplaintSearchDocuments (
+    complaint_id INT PRIMARY KEY FOREIGN KEY REFERENCES Complaints(id),
+    length INT NOT NULL
+);
+GO
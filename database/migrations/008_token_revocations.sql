@@ -0,0 +1,15 @@
+-- Revoked tokens for stateless auth (AUTH_STATELESS): a citizen's tokens
+-- issued up to revoked_at are rejected. Rows older than the token lifetime
+-- are pruned by the application.
+USE CitizenVoiceAI;
+GO
+
+CREATE TABLE TokenRevocations (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    citizen_id INT NOT NULL FOREIGN KEY REFERENCES Citizens(id),
+    revoked_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+);
+GO
+
+CREATE INDEX ix_TokenRevocations_revoked_at ON TokenRevocations (revoked_at);
+GO
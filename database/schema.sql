@@ -1,3 +1,8 @@
+-- Schema for a new database. It already includes database/migrations 001
+-- and 004-008, so a database created from it only needs the index
+-- migrations 002 and 003; a database created from an earlier version of
+-- this file needs every migration, in order.
+
 -- Create Database
 CREATE DATABASE CitizenVoiceAI;
 GO
@@ -48,9 +53,13 @@ CREATE TABLE Complaints (
     status NVARCHAR(50) DEFAULT 'Pending',
     tracking_number NVARCHAR(50) UNIQUE,
     created_at DATETIME DEFAULT GETDATE(),
-    resolved_at DATETIME
+    resolved_at DATETIME,
+    updated_at DATETIME NULL
 );
 
+-- migration 001
+CREATE INDEX ix_Complaints_updated_at ON Complaints (updated_at);
+
 -- Service Ratings Table
 CREATE TABLE ServiceRatings (
     id INT IDENTITY(1,1) PRIMARY KEY,
@@ -73,4 +82,65 @@ CREATE TABLE USSDSessions (
     updated_at DATETIME DEFAULT GETDATE()
 );
 
+-- Daily Complaint Rollups Table (migration 004)
+CREATE TABLE ComplaintDailyRollups (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    day DATE NOT NULL,
+    ministry_id INT,
+    district_id INT,
+    category NVARCHAR(100),
+    status NVARCHAR(50),
+    priority NVARCHAR(20),
+    complaint_count INT NOT NULL DEFAULT 0,
+    resolved_count INT NOT NULL DEFAULT 0,
+    resolution_days_sum INT NOT NULL DEFAULT 0,
+    CONSTRAINT uq_complaint_rollup_bucket UNIQUE (day, ministry_id, district_id, category, status, priority)
+);
+
+CREATE INDEX ix_ComplaintDailyRollups_district_day ON ComplaintDailyRollups (district_id, day);
+CREATE INDEX ix_ComplaintDailyRollups_ministry_day ON ComplaintDailyRollups (ministry_id, day);
+
+-- Complaint Keyword Counts Table (migration 005)
+CREATE TABLE ComplaintKeywordCounts (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    day DATE NOT NULL,
+    term NVARCHAR(100) NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    CONSTRAINT uq_complaint_keyword_day_term UNIQUE (day, term)
+);
+
+-- Engagement Sketches Table (migration 006)
+CREATE TABLE EngagementSketches (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    day DATE NOT NULL,
+    channel NVARCHAR(20) NOT NULL,
+    registers VARBINARY(MAX) NOT NULL,
+    CONSTRAINT uq_engagement_sketch_day_channel UNIQUE (day, channel)
+);
+
+-- Complaint Search Terms Table (migration 007)
+CREATE TABLE ComplaintSearchTerms (
+    term NVARCHAR(100) NOT NULL,
+    complaint_id INT NOT NULL FOREIGN KEY REFERENCES Complaints(id),
+    frequency INT NOT NULL,
+    CONSTRAINT pk_complaint_search_terms PRIMARY KEY CLUSTERED (term, complaint_id)
+);
+
+CREATE INDEX ix_ComplaintSearchTerms_complaint ON ComplaintSearchTerms (complaint_id);
+
+-- Complaint Search Documents Table (migration 007)
+CREATE TABLE ComplaintSearchDocuments (
+    complaint_id INT PRIMARY KEY FOREIGN KEY REFERENCES Complaints(id),
+    length INT NOT NULL
+);
+
+-- Token Revocations Table (migration 008)
+CREATE TABLE TokenRevocations (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    citizen_id INT NOT NULL FOREIGN KEY REFERENCES Citizens(id),
+    revoked_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+);
+
+CREATE INDEX ix_TokenRevocations_revoked_at ON TokenRevocations (revoked_at);
+
 GO
\ No newline at end of file
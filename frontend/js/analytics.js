@@ -50,11 +50,40 @@ async function apiCall(endpoint, method = 'GET', data = null) {
     return await response.json();
 }
 
-// Load all analytics data
-async function loadAnalytics() {
+// Widgets fetched in one round-trip through the bundle endpoint
+const ANALYTICS_WIDGETS = [
+    'dashboard',
+    'by-ministry',
+    'by-district',
+    'by-category',
+    'timeline',
+    'ministry-performance',
+    'unresolved-by-ministry',
+    'top-issues'
+];
+
+// Filter controls and the analytics query parameter each one maps to
+const ANALYTICS_FILTERS = {
+    'filter-ministry': 'ministry',
+    'filter-district': 'district',
+    'filter-region': 'region',
+    'filter-status': 'status',
+    'filter-priority': 'priority',
+    'filter-from': 'from',
+    'filter-to': 'to'
+};
+
+// Load all analytics data, optionally filtered (a URLSearchParams)
+async function loadAnalytics(filters = new URLSearchParams()) {
     try {
+        filters.set('widgets', ANALYTICS_WIDGETS.join(','));
+        const bundle = await apiCall(`/analytics/bundle?${filters.toString()}`);
+        if (!bundle) {
+            return;
+        }
+
         // Load dashboard stats
-        const dashboard = await apiCall('/analytics/dashboard');
+        const dashboard = bundle['dashboard'];
         if (dashboard) {
             document.getElementById('stat-total').textContent = dashboard.total_complaints;
             document.getElementById('stat-resolution').textContent = dashboard.resolution_rate + '%';
@@ -63,14 +92,14 @@ async function loadAnalytics() {
         }
 
         // Load ministry data
-        const ministryData = await apiCall('/analytics/complaints-by-ministry');
+        const ministryData = bundle['by-ministry'];
         if (ministryData) {
             analyticsData.ministry = ministryData;
             createMinistryChart(ministryData);
         }
 
         // Load district data
-        const districtData = await apiCall('/analytics/complaints-by-district');
+        const districtData = bundle['by-district'];
         if (districtData) {
             analyticsData.district = districtData;
             createDistrictChart(districtData);
@@ -78,21 +107,21 @@ async function loadAnalytics() {
         }
 
         // Load category data
-        const categoryData = await apiCall('/analytics/complaints-by-category');
+        const categoryData = bundle['by-category'];
         if (categoryData) {
             analyticsData.category = categoryData;
             createCategoryChart(categoryData);
         }
 
         // Load timeline data
-        const timelineData = await apiCall('/analytics/complaints-timeline');
+        const timelineData = bundle['timeline'];
         if (timelineData) {
             analyticsData.timeline = timelineData;
             createTimelineChart(timelineData);
         }
 
         // Load ministry performance
-        const performanceData = await apiCall('/analytics/ministry-performance');
+        const performanceData = bundle['ministry-performance'];
         if (performanceData) {
             analyticsData.performance = performanceData;
             loadMinistryPerformance(performanceData);
@@ -100,14 +129,14 @@ async function loadAnalytics() {
         }
 
         // Load unresolved by ministry
-        const unresolvedData = await apiCall('/analytics/unresolved-by-ministry');
+        const unresolvedData = bundle['unresolved-by-ministry'];
         if (unresolvedData) {
             analyticsData.unresolved = unresolvedData;
             createUnresolvedChart(unresolvedData);
         }
 
         // Load top issues
-        const topIssues = await apiCall('/analytics/top-issues');
+        const topIssues = bundle['top-issues'];
         if (topIssues) {
             loadTopIssues(topIssues);
         }
@@ -319,7 +348,7 @@ function createTimelineChart(data) {
     charts.timeline = new Chart(ctx, {
         type: 'line',
         data: {
-            labels: data.map(d => d.month),
+            labels: data.map(d => d.period),
             datasets: [{
                 label: 'Complaints',
                 data: data.map(d => d.count),
@@ -429,49 +458,59 @@ function loadTopIssues(data) {
     `).join('');
 }
 
-// Populate filter dropdowns
-function populateMinistryFilter(data) {
-    const select = document.getElementById('filter-ministry');
-    const ministries = [...new Set(data.map(d => d.ministry))];
-    
-    ministries.forEach(ministry => {
+// Populate filter dropdowns (once; filtered reloads must not shrink the options)
+function populateSelect(select, options) {
+    if (select.options.length > 1) {
+        return;
+    }
+
+    options.forEach(([value, label]) => {
         const option = document.createElement('option');
-        option.value = ministry;
-        option.textContent = ministry;
+        option.value = value;
+        option.textContent = label;
         select.appendChild(option);
     });
 }
 
+function populateMinistryFilter(data) {
+    populateSelect(
+        document.getElementById('filter-ministry'),
+        data.map(d => [d.ministry_id, d.ministry])
+    );
+}
+
 function populateDistrictFilter(data) {
-    const select = document.getElementById('filter-district');
-    const districts = [...new Set(data.map(d => d.district))];
-    
-    districts.forEach(district => {
-        const option = document.createElement('option');
-        option.value = district;
-        option.textContent = district;
-        select.appendChild(option);
-    });
+    populateSelect(
+        document.getElementById('filter-district'),
+        data.map(d => [d.district_id, d.district])
+    );
+
+    const regions = [...new Set(data.map(d => d.region).filter(region => region))];
+    populateSelect(
+        document.getElementById('filter-region'),
+        regions.map(region => [region, region])
+    );
 }
 
-// Apply filters (simplified version - in production would filter actual data)
+// Apply filters - the API aggregates only the matching complaints
 function applyFilters() {
-    const ministry = document.getElementById('filter-ministry').value;
-    const district = document.getElementById('filter-district').value;
-    const status = document.getElementById('filter-status').value;
+    const filters = new URLSearchParams();
 
-    console.log('Filters applied:', { ministry, district, status });
-    
-    // In production, this would fetch filtered data from API
-    // For now, just log the filters
-    alert(`Filters applied:\nMinistry: ${ministry || 'All'}\nDistrict: ${district || 'All'}\nStatus: ${status || 'All'}\n\nNote: Full filtering will be implemented with backend API.`);
+    Object.entries(ANALYTICS_FILTERS).forEach(([elementId, param]) => {
+        const value = document.getElementById(elementId).value;
+        if (value) {
+            filters.set(param, value);
+        }
+    });
+
+    loadAnalytics(filters);
 }
 
 // Reset filters
 function resetFilters() {
-    document.getElementById('filter-ministry').value = '';
-    document.getElementById('filter-district').value = '';
-    document.getElementById('filter-status').value = '';
+    Object.keys(ANALYTICS_FILTERS).forEach(elementId => {
+        document.getElementById(elementId).value = '';
+    });
     loadAnalytics();
 }
 